@@ -1,6 +1,7 @@
 """Entry point: request admin (Windows), then run the GUI."""
 
 import logging
+import multiprocessing
 import sys
 import tkinter as tk
 
@@ -27,4 +28,6 @@ def main():
 
 
 if __name__ == '__main__':
+    # The playback process (playback_worker) re-runs this file in a frozen build
+    multiprocessing.freeze_support()
     main()
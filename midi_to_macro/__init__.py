@@ -1,14 +1,18 @@
 """Where Songs Meet: parse MIDI, export .mcr, play with keyboard."""
 
+from midi_to_macro.events import EventTable
 from midi_to_macro.midi import (
     build_mcr_lines,
+    compile_midi,
     export_mcr,
     map_note_to_key,
     parse_midi,
 )
 
 __all__ = [
+    'EventTable',
     'build_mcr_lines',
+    'compile_midi',
     'export_mcr',
     'map_note_to_key',
     'parse_midi',
@@ -22,10 +22,21 @@ from midi_to_macro.online_sequencer import (
     search_sequences,
     SORT_OPTIONS,
 )
+from midi_to_macro.auto_transpose import suggest_transpose
+from midi_to_macro.budget import KeyBudget
+from midi_to_macro.compiled import COMPILED_SUFFIX
+from midi_to_macro.event_cache import EventCache
+from midi_to_macro.keymap import DEFAULT_KEYMAP, Keymap, available_keymaps
 from midi_to_macro.os_favorites import OsFavorites
+from midi_to_macro.playback_worker import PlaybackWorker
 from midi_to_macro.playlist import Playlist
+from midi_to_macro.scheduler import BURST, CATCH_UP_POLICIES, CatchUp, Scheduler
+from midi_to_macro.session import PlaybackSession
 from midi_to_macro.song_settings import SongSettings
+from midi_to_macro.telemetry import TimingLog
 from midi_to_macro.sync import DEFAULT_PORT, Room, START_DELAY_SEC, get_lan_ip
+from midi_to_macro.track_index import TrackSelection, get_index
+from midi_to_macro.ui_dispatch import UiDispatcher
 from midi_to_macro.firewall import add_firewall_rules
 from midi_to_macro.updater import check_for_updates, download_update, is_newer, open_release_page
 from midi_to_macro.version import __version__ as APP_VERSION
@@ -99,6 +110,17 @@ _CTRL_BTN_H = 22
 _CTRL_BTN_R = 6
 
 
+# Files the File tab lists and plays (also the suffixes a synced client accepts for the host's file)
+_SONG_SUFFIXES = ('.mid', '.midi', '.mcr', COMPILED_SUFFIX)
+
+_NOTE_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+
+
+def _note_name(note: int) -> str:
+    """MIDI note number to a name like C4 (middle C = 60)."""
+    return f'{_NOTE_NAMES[note % 12]}{note // 12 - 1}'
+
+
 def _rounded_rect_photo(w: int, h: int, color_hex: str, radius: int):
     """Return a PhotoImage of a rounded rectangle (Pillow). Kept for GC."""
     try:
@@ -209,6 +231,7 @@ class ControlButton(tk.Frame):
 class App:
     def __init__(self, root):
         self.root = root
+        self._ui = UiDispatcher(root)  # worker threads post UI updates here instead of root.after(0, ...)
         root.title('Where Songs Meet')
         root.attributes('-topmost', True)
         self.playing = False
@@ -261,6 +284,23 @@ class App:
         self.repeat_os = tk.BooleanVar(value=False)
         self.repeat_playlist = tk.BooleanVar(value=False)
         self.save_file_var = tk.BooleanVar(value=False)
+        self.limit_key_rate = tk.BooleanVar(value=False)
+        self._key_budget: KeyBudget | None = None  # set from limit_key_rate on the main thread
+        self.catch_up_policy = tk.StringVar(value=BURST)
+        self._catch_up = BURST  # set from catch_up_policy on the main thread
+        self.separate_process = tk.BooleanVar(value=False)
+        self._use_worker = False  # set from separate_process on the main thread
+        self._worker: PlaybackWorker | None = None  # started on first use (see _get_worker)
+        self._worker_lock = threading.Lock()  # playback threads of two songs may both start it
+        # Pause/seek target of the song playing: its PlaybackSession, or the worker when playing there
+        self._controls: PlaybackSession | PlaybackWorker | None = None
+        self._session: PlaybackSession | None = None  # stop signal of the song playing (one per song)
+        self._session_lock = threading.Lock()
+        self._start_cancel: threading.Event | None = None  # set to cancel a pending synced start
+        self._play_tempo = 1.0  # tempo the playing song was compiled with (live changes are relative to it)
+        self._paused = False
+        self._status_before_pause: dict = {}
+        self._timing = TimingLog()  # key timing of the current/last song (right-click the log button to save)
         self.save_os_var = tk.BooleanVar(value=False)
         self._current_source: str | None = None
         self._stopped_by_user: bool = False
@@ -277,6 +317,11 @@ class App:
 
         self._song_settings = SongSettings()
         self._os_favorites = OsFavorites(self._song_settings.settings_dir)
+        self._event_cache = EventCache(self._song_settings.settings_dir)
+        # Key layout profiles: the default plus JSON files in <settings dir>/keymaps
+        self._keymaps = available_keymaps(self._song_settings.settings_dir)
+        self.keymap_name = tk.StringVar(value=DEFAULT_KEYMAP.name)
+        self._keymap: Keymap = DEFAULT_KEYMAP  # set from keymap_name on the main thread
 
         def _tooltip(btn, status_widget, hint: str):
             btn.bind('<Enter>', lambda e: status_widget.config(text=hint))
@@ -349,6 +394,7 @@ class App:
             **_icon_btn_kwargs('LOG', bg=BG, activebackground=BG)
         )
         self._log_btn.pack(side='right')
+        self._log_btn.bind('<Button-3>', lambda e: self._save_timing())
         self._update_btn = tk.Button(
             header_btns, command=self._check_for_updates,
             **_icon_btn_kwargs('UPDATE', bg=BG, activebackground=BG)
@@ -395,6 +441,14 @@ class App:
             **_icon_btn_kwargs('ADD_TO_PLAYLIST', small=True)
         )
         add_to_playlist_file_btn.grid(row=2, column=1, sticky='e')
+        tracks_btn = tk.Button(
+            file_inner, text='Tracks…', command=self._show_track_dialog,
+            font=SMALL_FONT, bg=CARD, fg=FG, activebackground=ACCENT, activeforeground=FG,
+            relief='flat', cursor='hand2', padx=4, pady=0,
+        )
+        tracks_btn.grid(row=2, column=0, sticky='e', padx=(0, 4), pady=(PAD, SMALL_PAD))
+        tracks_btn.bind('<Enter>', lambda e: tracks_btn.configure(bg=ACCENT))
+        tracks_btn.bind('<Leave>', lambda e: tracks_btn.configure(bg=CARD))
         add_to_playlist_file_btn.bind('<Enter>', lambda e: add_to_playlist_file_btn.configure(bg=ACCENT))
         add_to_playlist_file_btn.bind('<Leave>', lambda e: add_to_playlist_file_btn.configure(bg=CARD))
         list_frame = tk.Frame(file_inner, bg=CARD)
@@ -429,7 +483,7 @@ class App:
         opts_inner.columnconfigure(1, weight=1)
         self._tempo_scale = tk.Scale(
             tempo_row, from_=0.25, to=1.75, resolution=0.05, orient='horizontal',
-            variable=self.tempo, length=200, **scale_opts
+            variable=self.tempo, length=200, command=lambda _v: self._on_tempo_changed(), **scale_opts
         )
         self._tempo_scale.pack(side='left', fill='x', expand=True)
 
@@ -454,6 +508,14 @@ class App:
             if w != self._transpose_scale.cget('length'):
                 self._transpose_scale.config(length=w)
         transpose_row.bind('<Configure>', _resize_transpose_scale)
+        auto_transpose_btn = tk.Button(
+            opts_inner, text='Auto', command=self._auto_transpose_file,
+            font=SMALL_FONT, bg=CARD, fg=FG, activebackground=ACCENT, activeforeground=FG,
+            relief='flat', cursor='hand2', padx=4, pady=0,
+        )
+        auto_transpose_btn.grid(row=1, column=2, sticky='se', pady=(SMALL_PAD, 0))
+        auto_transpose_btn.bind('<Enter>', lambda e: auto_transpose_btn.configure(bg=ACCENT))
+        auto_transpose_btn.bind('<Leave>', lambda e: auto_transpose_btn.configure(bg=CARD))
 
         # Set initial scale lengths once (update_idletasks then direct call — no after_idle to avoid "invalid command name" when packaged)
         root.update_idletasks()
@@ -478,6 +540,30 @@ class App:
             selectcolor=ENTRY_BG, cursor='hand2', command=_on_save_file_cb
         )
         save_file_cb.grid(row=2, column=0, sticky='w', pady=(SMALL_PAD, 0))
+        limit_file_cb = tk.Checkbutton(
+            opts_inner, text='Limit key rate', variable=self.limit_key_rate,
+            font=SMALL_FONT, fg=FG, bg=CARD, activeforeground=FG, activebackground=CARD,
+            selectcolor=ENTRY_BG, cursor='hand2', command=self._on_limit_key_rate
+        )
+        limit_file_cb.grid(row=2, column=1, sticky='w', pady=(SMALL_PAD, 0))
+        catch_up_file_menu = ttk.Combobox(
+            opts_inner, textvariable=self.catch_up_policy, values=list(CATCH_UP_POLICIES),
+            state='readonly', width=7, font=SMALL_FONT
+        )
+        catch_up_file_menu.grid(row=2, column=2, sticky='e', pady=(SMALL_PAD, 0))
+        catch_up_file_menu.bind('<<ComboboxSelected>>', lambda e: self._on_catch_up_selected())
+        process_file_cb = tk.Checkbutton(
+            opts_inner, text='Separate process', variable=self.separate_process,
+            font=SMALL_FONT, fg=FG, bg=CARD, activeforeground=FG, activebackground=CARD,
+            selectcolor=ENTRY_BG, cursor='hand2', command=self._on_separate_process
+        )
+        process_file_cb.grid(row=3, column=1, sticky='w')
+        keymap_file_menu = ttk.Combobox(
+            opts_inner, textvariable=self.keymap_name, values=list(self._keymaps),
+            state='readonly', width=10, font=SMALL_FONT
+        )
+        keymap_file_menu.grid(row=3, column=0, sticky='w', padx=(0, 4))
+        keymap_file_menu.bind('<<ComboboxSelected>>', lambda e: self._on_keymap_selected())
 
         # Actions
         actions = tk.Frame(file_tab, bg=CARD)
@@ -509,6 +595,7 @@ class App:
             mode='determinate', maximum=100, value=0
         )
         self.progress_bar.pack(fill='x')
+        self._bind_seek(self.progress_bar)
 
         # Status
         status_frame = tk.Frame(file_tab, bg=CARD)
@@ -520,10 +607,16 @@ class App:
         )
         self.status.pack(anchor='w')
         _tooltip(open_folder_btn, self.status, 'Open folder')
-        _tooltip(self._log_btn, self.status, 'Open log file')
+        _tooltip(self._log_btn, self.status, 'Open log file (right-click: save key timing of the last song)')
         _tooltip(self._update_btn, self.status, 'Check for updates')
         _tooltip(add_to_playlist_file_btn, self.status, 'Add to playlist')
+        _tooltip(tracks_btn, self.status, 'Choose which tracks and channels to play')
         _tooltip(save_file_cb, self.status, 'Save tempo/transpose for this song')
+        _tooltip(limit_file_cb, self.status, 'Thin dense passages to what the game can register')
+        _tooltip(catch_up_file_menu, self.status, 'Late notes: burst plays them at once, skip drops them, stretch delays the rest')
+        _tooltip(process_file_cb, self.status, 'Send keys from a separate process (steadier timing while the window is busy)')
+        _tooltip(keymap_file_menu, self.status, 'Key layout (JSON profiles in the keymaps folder of the settings folder)')
+        _tooltip(auto_transpose_btn, self.status, 'Pick the transpose that fits the keyboard best')
         _tooltip(self.play_btn, self.status, 'Play')
         _tooltip(self.stop_btn, self.status, 'Stop')
 
@@ -673,7 +766,7 @@ class App:
         os_opts_inner.columnconfigure(1, weight=1)
         self._os_tempo_scale = tk.Scale(
             os_tempo_row, from_=0.25, to=1.75, resolution=0.05, orient='horizontal',
-            variable=self.tempo, length=200, **os_scale_opts
+            variable=self.tempo, length=200, command=lambda _v: self._on_tempo_changed(), **os_scale_opts
         )
         self._os_tempo_scale.pack(side='left', fill='x', expand=True)
 
@@ -718,6 +811,34 @@ class App:
         )
         save_os_cb.grid(row=2, column=0, sticky='w', pady=(SMALL_PAD, 0))
         _tooltip(save_os_cb, self.os_status, 'Save tempo/transpose for this song')
+        limit_os_cb = tk.Checkbutton(
+            os_opts_inner, text='Limit key rate', variable=self.limit_key_rate,
+            font=SMALL_FONT, fg=FG, bg=CARD, activeforeground=FG, activebackground=CARD,
+            selectcolor=ENTRY_BG, cursor='hand2', command=self._on_limit_key_rate
+        )
+        limit_os_cb.grid(row=2, column=1, sticky='w', pady=(SMALL_PAD, 0))
+        _tooltip(limit_os_cb, self.os_status, 'Thin dense passages to what the game can register')
+        catch_up_os_menu = ttk.Combobox(
+            os_opts_inner, textvariable=self.catch_up_policy, values=list(CATCH_UP_POLICIES),
+            state='readonly', width=7, font=SMALL_FONT
+        )
+        catch_up_os_menu.grid(row=2, column=2, sticky='e', pady=(SMALL_PAD, 0))
+        catch_up_os_menu.bind('<<ComboboxSelected>>', lambda e: self._on_catch_up_selected())
+        _tooltip(catch_up_os_menu, self.os_status, 'Late notes: burst plays them at once, skip drops them, stretch delays the rest')
+        process_os_cb = tk.Checkbutton(
+            os_opts_inner, text='Separate process', variable=self.separate_process,
+            font=SMALL_FONT, fg=FG, bg=CARD, activeforeground=FG, activebackground=CARD,
+            selectcolor=ENTRY_BG, cursor='hand2', command=self._on_separate_process
+        )
+        process_os_cb.grid(row=3, column=1, sticky='w')
+        _tooltip(process_os_cb, self.os_status, 'Send keys from a separate process (steadier timing while the window is busy)')
+        keymap_os_menu = ttk.Combobox(
+            os_opts_inner, textvariable=self.keymap_name, values=list(self._keymaps),
+            state='readonly', width=10, font=SMALL_FONT
+        )
+        keymap_os_menu.grid(row=3, column=0, sticky='w', padx=(0, 4))
+        keymap_os_menu.bind('<<ComboboxSelected>>', lambda e: self._on_keymap_selected())
+        _tooltip(keymap_os_menu, self.os_status, 'Key layout (JSON profiles in the keymaps folder of the settings folder)')
 
         # OS tab: actions (Play, Stop), progress bar (same style as File tab)
         self._os_last_midi_path: str | None = None
@@ -751,6 +872,7 @@ class App:
             mode='determinate', maximum=100, value=0
         )
         self.os_progress_bar.pack(fill='x')
+        self._bind_seek(self.os_progress_bar)
         # Bottom: only "Ready — focus..." message
         os_ready_frame = tk.Frame(os_tab, bg=CARD)
         os_ready_frame.pack(fill='x', padx=PAD, pady=(2, PAD))
@@ -830,6 +952,7 @@ class App:
             mode='determinate', maximum=100, value=0
         )
         self.pl_progress_bar.pack(fill='x')
+        self._bind_seek(self.pl_progress_bar)
         # Status (same style as other tabs)
         pl_status_frame = tk.Frame(playlist_tab, bg=CARD)
         pl_status_frame.pack(fill='x', padx=PAD, pady=(2, PAD))
@@ -994,22 +1117,22 @@ class App:
         self._sync_register_room_callbacks()
 
     def _sync_register_room_callbacks(self):
-        """Register room callbacks; all run via root.after on main thread."""
+        """Register room callbacks; all run on the main thread via the UI dispatcher."""
         def on_clients_changed(n: int):
             log.debug("Room participants: %s", n)
-            self.root.after(0, lambda: self._sync_update_host_status(n))
+            self._ui.post(lambda: self._sync_update_host_status(n))
         def on_connected():
             log.info("Room callback: connected")
-            self.root.after(0, self._sync_update_joined_ui)
+            self._ui.post(self._sync_update_joined_ui)
         def on_disconnected():
             log.info("Room callback: disconnected")
-            self.root.after(0, self._sync_update_disconnected_ui)
-        def on_play_file(start_in: float, midi_bytes: bytes, tempo: float, transpose: int, host_send_time: float | None = None, host_playing_label: str = ''):
-            self.root.after(0, lambda: self._sync_received_play_file(start_in, midi_bytes, tempo, transpose, host_send_time, host_playing_label))
+            self._ui.post(self._sync_update_disconnected_ui)
+        def on_play_file(start_in: float, midi_bytes: bytes, tempo: float, transpose: int, host_send_time: float | None = None, host_playing_label: str = '', suffix: str = '.mid'):
+            self._ui.post(lambda: self._sync_received_play_file(start_in, midi_bytes, tempo, transpose, host_send_time, host_playing_label, suffix))
         def on_play_os(start_in: float, sid: str, tempo: float, transpose: int, host_send_time: float | None = None, host_playing_label: str = ''):
-            self.root.after(0, lambda: self._sync_received_play_os(start_in, sid, tempo, transpose, host_send_time, host_playing_label))
+            self._ui.post(lambda: self._sync_received_play_os(start_in, sid, tempo, transpose, host_send_time, host_playing_label))
         def on_room_playing(players: list):
-            self.root.after(0, lambda: self._sync_update_now_playing(players))
+            self._ui.post(lambda: self._sync_update_now_playing(players))
         self._room.on_clients_changed = on_clients_changed
         self._room.on_connected = on_connected
         self._room.on_disconnected = on_disconnected
@@ -1031,6 +1154,23 @@ class App:
         except OSError as e:
             messagebox.showerror('Log', f'Could not open log: {e}')
 
+    def _save_timing(self):
+        """Save scheduled vs actual key times of the last song as CSV or JSON."""
+        if self.playing or not len(self._timing):
+            messagebox.showinfo('Key timing', 'Play a song first; timing is saved after it ends.')
+            return
+        out = filedialog.asksaveasfilename(
+            defaultextension='.csv',
+            filetypes=[('CSV', '*.csv'), ('JSON', '*.json')],
+            initialfile='timing.csv',
+        )
+        if not out:
+            return
+        try:
+            self._timing.dump(out)
+        except OSError as e:
+            messagebox.showerror('Key timing', f'Could not save timing: {e}')
+
     def _check_for_updates(self):
         """Run update check in a background thread and show result on main thread."""
         self._update_btn.config(state='disabled')
@@ -1042,7 +1182,7 @@ class App:
                 result = check_for_updates()
             except Exception as e:
                 result = (None, None, None, None, str(e))
-            self.root.after(0, lambda: self._on_update_check_done(result))
+            self._ui.post(lambda: self._on_update_check_done(result))
 
         threading.Thread(target=do_check, daemon=True).start()
 
@@ -1342,8 +1482,9 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
         self.sync_host_btn.config(state='normal')
         self.sync_status.config(text='Disconnected.')
 
-    def _sync_received_play_file(self, start_in_sec: float, midi_bytes: bytes, tempo: float, transpose: int, host_send_time: float | None = None, host_playing_label: str = ''):
-        """Client received play_file: play host's file or own selection at same time; report what we're playing."""
+    def _sync_received_play_file(self, start_in_sec: float, midi_bytes: bytes, tempo: float, transpose: int, host_send_time: float | None = None, host_playing_label: str = '', suffix: str = '.mid'):
+        """Client received play_file: play host's file or own selection at same time; report what we're playing.
+        The host's file is written with its own suffix (MIDI, .mcr or compiled) so it plays as that format."""
         log.info("Client received play_file (start_in=%.1fs, %s bytes)", start_in_sec, len(midi_bytes))
         if not playback.KEYBOARD_AVAILABLE:
             return
@@ -1353,7 +1494,8 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
             my_label = os.path.basename(path)
         else:
             try:
-                f = tempfile.NamedTemporaryFile(suffix='.mid', delete=False)
+                suffix = suffix.lower() if suffix.lower() in _SONG_SUFFIXES else '.mid'
+                f = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
                 f.write(midi_bytes)
                 f.close()
                 path = f.name
@@ -1368,12 +1510,7 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
         self._sync_my_reported_label = my_label
         self._room.send_report_playing(my_label)
 
-        def wait_then_play():
-            delay = start_at - time.time()
-            if delay > 0:
-                time.sleep(delay)
-            self.root.after(0, lambda: self._sync_start_file_playback(path, tempo, transpose))
-        threading.Thread(target=wait_then_play, daemon=True).start()
+        self._schedule_start(start_at, lambda: self._sync_start_file_playback(path, tempo, transpose))
 
     def _sync_start_file_playback(self, path: str, tempo: float, transpose: int):
         """Start playback from a path (sync received file); runs on main thread."""
@@ -1389,11 +1526,7 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
         self.os_status.config(text='Playing… (synced)')
         if hasattr(self, 'sync_status'):
             self.sync_status.config(text='Playing…')
-        threading.Thread(
-            target=self._play_thread,
-            args=(path, tempo, transpose),
-            daemon=True
-        ).start()
+        self._start_play_thread(path, tempo, transpose)
 
     def _sync_received_play_os(self, start_in_sec: float, sid: str, tempo: float, transpose: int, host_send_time: float | None = None, host_playing_label: str = ''):
         """Client received play_os: play host's OS or own selection at same time; report what we're playing."""
@@ -1413,23 +1546,22 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
         self._sync_my_reported_label = my_label
         self._room.send_report_playing(my_label)
 
+        cancel = self._new_scheduled_start()
+
         def download_and_schedule():
             if use_my:
                 try:
                     path = download_sequence_midi(my_sid, bpm=110, timeout=20)
                 except Exception:
-                    self.root.after(0, lambda: self.sync_status.config(text='Download failed.'))
+                    self._ui.post(lambda: self.sync_status.config(text='Download failed.'))
                     return
             else:
                 try:
                     path = download_sequence_midi(sid, bpm=110, timeout=20)
                 except Exception:
-                    self.root.after(0, lambda: self.sync_status.config(text='Download failed.'))
+                    self._ui.post(lambda: self.sync_status.config(text='Download failed.'))
                     return
-            delay = start_at - time.time()
-            if delay > 0:
-                time.sleep(delay)
-            self.root.after(0, lambda: self._sync_start_os_playback(path, tempo, transpose))
+            self._wait_then_start(cancel, start_at, lambda: self._sync_start_os_playback(path, tempo, transpose))
         threading.Thread(target=download_and_schedule, daemon=True).start()
 
     def _sync_start_os_playback(self, path: str, tempo: float, transpose: int):
@@ -1448,11 +1580,7 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
         if hasattr(self, 'sync_status'):
             self.sync_status.config(text='Playing…')
         self._os_playing_path = path
-        threading.Thread(
-            target=self._play_thread,
-            args=(path, tempo, transpose),
-            daemon=True
-        ).start()
+        self._start_play_thread(path, tempo, transpose)
 
     def _load_sequences(self):
         label = (self.os_sort_menu.get() or 'Newest').strip()
@@ -1464,9 +1592,9 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
         def do_fetch():
             try:
                 pairs = fetch_sequences(sort=sort or '1')
-                self.root.after(0, lambda: self._on_sequences_loaded(pairs, None))
+                self._ui.post(lambda: self._on_sequences_loaded(pairs, None))
             except Exception as e:
-                self.root.after(0, lambda: self._on_sequences_loaded([], str(e)))
+                self._ui.post(lambda msg=str(e): self._on_sequences_loaded([], msg))
 
         threading.Thread(target=do_fetch, daemon=True).start()
 
@@ -1481,9 +1609,9 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
         def do_search():
             try:
                 pairs = search_sequences(query=query, sort=sort or '1')
-                self.root.after(0, lambda: self._on_sequences_loaded(pairs, None, from_search=bool(query)))
+                self._ui.post(lambda: self._on_sequences_loaded(pairs, None, from_search=bool(query)))
             except Exception as e:
-                self.root.after(0, lambda: self._on_sequences_loaded([], str(e), from_search=False))
+                self._ui.post(lambda msg=str(e): self._on_sequences_loaded([], msg, from_search=False))
 
         threading.Thread(target=do_search, daemon=True).start()
 
@@ -1599,10 +1727,10 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
         def do_load_and_play():
             try:
                 path = download_sequence_midi(sid, bpm=110, timeout=20)
-                self.root.after(0, lambda: self._on_os_downloaded_for_play(path, sid, tempo, transpose))
+                self._ui.post(lambda: self._on_os_downloaded_for_play(path, sid, tempo, transpose))
             except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror('Load failed', str(e)))
-                self.root.after(0, lambda: self.os_status.config(text='Load failed.'))
+                self._ui.post(lambda msg=str(e): messagebox.showerror('Load failed', msg))
+                self._ui.post(lambda: self.os_status.config(text='Load failed.'))
 
         threading.Thread(target=do_load_and_play, daemon=True).start()
 
@@ -1615,12 +1743,7 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
             self._room.send_play_os(START_DELAY_SEC, sid, tempo, transpose, host_playing_label=host_label)
             self._room.host_report_playing(host_label)
             start_at = time.time() + START_DELAY_SEC
-            def wait_then_play():
-                delay = start_at - time.time()
-                if delay > 0:
-                    time.sleep(delay)
-                self.root.after(0, lambda: self._sync_start_os_playback(path, tempo, transpose))
-            threading.Thread(target=wait_then_play, daemon=True).start()
+            self._schedule_start(start_at, lambda: self._sync_start_os_playback(path, tempo, transpose))
             self.os_status.config(text=f'Starting in {int(START_DELAY_SEC)}s… (synced)')
         else:
             self._os_start_playback(path, tempo, transpose)
@@ -1642,11 +1765,7 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
         # Stop buttons enabled in _set_progress when playback actually starts
         self.status.config(text='Playing… (focus game window)')
         self._os_playing_path = path
-        threading.Thread(
-            target=self._play_thread,
-            args=(path, tempo_multiplier, transpose),
-            daemon=True
-        ).start()
+        self._start_play_thread(path, tempo_multiplier, transpose)
 
     def _download_os_midi(self):
         """Download selected sequence as MIDI and save to a file chosen by the user."""
@@ -1666,10 +1785,10 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
         def do_download():
             try:
                 path = download_sequence_midi(sid, bpm=110, timeout=20)
-                self.root.after(0, lambda: self._on_os_midi_downloaded(path, sid, title))
+                self._ui.post(lambda: self._on_os_midi_downloaded(path, sid, title))
             except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror('Download failed', str(e)))
-                self.root.after(0, lambda: self.os_status.config(text='Download failed.'))
+                self._ui.post(lambda msg=str(e): messagebox.showerror('Download failed', msg))
+                self._ui.post(lambda: self.os_status.config(text='Download failed.'))
 
         threading.Thread(target=do_download, daemon=True).start()
 
@@ -1695,7 +1814,7 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
             self.os_status.config(text='Save failed.')
 
     def open_folder(self):
-        folder = filedialog.askdirectory(title='Select folder with MIDI files')
+        folder = filedialog.askdirectory(title='Select folder with MIDI or .mcr files')
         if not folder:
             return
         self.folder_path = folder
@@ -1704,7 +1823,7 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
         try:
             names = sorted(
                 n for n in os.listdir(folder)
-                if n.lower().endswith('.mid') or n.lower().endswith('.midi')
+                if n.lower().endswith(_SONG_SUFFIXES)
             )
             for n in names:
                 self.file_listbox.insert(tk.END, n)
@@ -1829,20 +1948,16 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
             self.pl_play_btn.config(state='disabled')
         # Stop buttons enabled in _set_progress when playback actually starts
         self.status.config(text='Playing... (focus game window)')
-        threading.Thread(
-            target=self._play_thread,
-            args=(path, self.tempo.get(), self.transpose.get()),
-            daemon=True
-        ).start()
+        self._start_play_thread(path, self.tempo.get(), self.transpose.get())
 
     def _start_next_playlist_item(self):
         """Start playback of the current playlist item (main thread). Advances to next when finished via _on_playback_finished."""
         if self._playlist.current_index() >= len(self._playlist):
-            self.root.after(0, self._progress_done)
+            self._ui.post(self._progress_done)
             return
         item = self._playlist.current_item()
         if not item:
-            self.root.after(0, self._progress_done)
+            self._ui.post(self._progress_done)
             return
         n = len(self._playlist)
         self.status.config(text=f'Playing {self._playlist.current_index() + 1}/{n}… (focus game window)')
@@ -1859,12 +1974,12 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
             def do_download():
                 try:
                     path = download_sequence_midi(sid, bpm=110, timeout=20)
-                    self.root.after(0, lambda: self._os_start_playback(path, tempo, transpose, keep_source=True))
+                    self._ui.post(lambda: self._os_start_playback(path, tempo, transpose, keep_source=True))
                 except Exception as e:
-                    self.root.after(0, lambda: messagebox.showerror('Load failed', str(e)))
-                    self.root.after(0, lambda: self.pl_status.config(text='Load failed.'))
+                    self._ui.post(lambda msg=str(e): messagebox.showerror('Load failed', msg))
+                    self._ui.post(lambda: self.pl_status.config(text='Load failed.'))
                     self.playing = False
-                    self.root.after(0, self._progress_done)
+                    self._ui.post(self._progress_done)
 
             threading.Thread(target=do_download, daemon=True).start()
 
@@ -1891,6 +2006,106 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
         except tk.TclError:
             pass
 
+    def _show_track_dialog(self):
+        """Per-track/channel note counts for the selected MIDI file; unchecked ones are muted and saved per song."""
+        path = self.get_selected_file()
+        key = self._get_file_song_key()
+        if not path or not path.lower().endswith(('.mid', '.midi')):
+            messagebox.showwarning('No selection', 'Select a MIDI file first.')
+            return
+        try:
+            index = get_index(path)
+        except (OSError, ValueError, EOFError) as e:
+            messagebox.showerror('Error', str(e))
+            return
+        muted_tracks, muted_channels = self._song_settings.get_mutes(key)
+        top = tk.Toplevel(self.root)
+        top.title(f'Tracks — {os.path.basename(path)}')
+        top.configure(bg=BG)
+        top.transient(self.root)
+        top.grab_set()
+        frame = tk.Frame(top, bg=BG, padx=PAD, pady=PAD)
+        frame.pack(fill='both', expand=True)
+        check_opts = dict(
+            font=SMALL_FONT, fg=FG, bg=BG, activeforeground=FG, activebackground=BG,
+            selectcolor=ENTRY_BG, anchor='w', cursor='hand2',
+        )
+
+        def describe(stats) -> str:
+            return (
+                f'{stats.notes} notes, {_note_name(stats.low)}–{_note_name(stats.high)}, '
+                f'{stats.density:.1f}/s'
+            )
+
+        tk.Label(frame, text='Tracks', font=LABEL_FONT, fg=FG, bg=BG).pack(anchor='w')
+        track_vars: dict[int, tk.BooleanVar] = {}
+        for t in index.tracks:
+            if not t.notes:
+                continue
+            var = tk.BooleanVar(value=t.index not in muted_tracks)
+            track_vars[t.index] = var
+            channels = ', '.join(str(c + 1) for c in sorted(t.channels))
+            name = t.name or f'Track {t.index + 1}'
+            tk.Checkbutton(
+                frame, text=f'{name}  (ch {channels}; {describe(t)})', variable=var, **check_opts
+            ).pack(fill='x')
+        tk.Label(frame, text='Channels', font=LABEL_FONT, fg=FG, bg=BG).pack(anchor='w', pady=(PAD, 0))
+        channel_vars: dict[int, tk.BooleanVar] = {}
+        for c in index.channels:
+            var = tk.BooleanVar(value=c.channel not in muted_channels)
+            channel_vars[c.channel] = var
+            label = f'Channel {c.channel + 1}' + (' (drums)' if c.is_drums else '')
+            tk.Checkbutton(frame, text=f'{label}  ({describe(c)})', variable=var, **check_opts).pack(fill='x')
+
+        def save():
+            tracks = [i for i, v in track_vars.items() if not v.get()]
+            channels = [c for c, v in channel_vars.items() if not v.get()]
+            self._song_settings.set_mutes(key, tracks, channels)
+            if tracks or channels:
+                self.status.config(text=f'Muted {len(tracks)} track(s), {len(channels)} channel(s) for this song.')
+            else:
+                self.status.config(text='Playing all tracks for this song.')
+            top.destroy()
+
+        btn_frame = tk.Frame(frame, bg=BG)
+        btn_frame.pack(fill='x', pady=(PAD, 0))
+        btn_style = dict(
+            font=LABEL_FONT, bg=SUBTLE, fg=FG,
+            activebackground=ACCENT, activeforeground=FG,
+            relief='flat', padx=BTN_PAD[0], pady=BTN_PAD[1], cursor='hand2',
+        )
+        tk.Button(btn_frame, text='Save', command=save, **btn_style).pack(side='left', padx=(0, BTN_GAP))
+        tk.Button(btn_frame, text='Cancel', command=top.destroy, **btn_style).pack(side='left')
+
+    def _auto_transpose_file(self):
+        """Set Transpose to the suggestion for the selected MIDI file (cached per file content and track selection)."""
+        path = self.get_selected_file()
+        key = self._get_file_song_key()
+        if not path or not path.lower().endswith(('.mid', '.midi')):
+            messagebox.showwarning('No selection', 'Select a MIDI file first.')
+            return
+        selection = TrackSelection(*self._song_settings.get_mutes(key))
+        keymap = self._keymap
+        try:
+            source = f'{self._event_cache.key_for_file(path, selection.cache_variant())}:{keymap.name}'
+            result = self._song_settings.get_auto_transpose(key, source)
+            if result is None:
+                song = midi.load_song(path, self._event_cache, selection)
+                best = suggest_transpose(song.notes, keymap)
+                result = {
+                    'transpose': best.transpose, 'clamped': best.clamped,
+                    'collided': best.collided, 'black': best.black,
+                }
+                self._song_settings.set_auto_transpose(key, source, result)
+        except (OSError, ValueError, EOFError) as e:
+            messagebox.showerror('Error', str(e))
+            return
+        self.transpose.set(max(-12, min(12, int(result['transpose']))))
+        self.status.config(
+            text=f"Transpose {result['transpose']:+d}: {result.get('clamped', 0)} out of range, "
+            f"{result.get('collided', 0)} sharing a key, {result.get('black', 0)} with Shift/Ctrl."
+        )
+
     def _get_file_song_key(self) -> str | None:
         path = self.get_selected_file()
         return os.path.normpath(path) if path else None
@@ -1983,22 +2198,24 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
             transpose = self.transpose.get()
             host_label = os.path.basename(path)
             log.info("Host sending play_file (synced, %s bytes)", len(midi_bytes))
-            self._room.send_play_file(START_DELAY_SEC, midi_bytes, tempo, transpose, host_playing_label=host_label)
+            self._room.send_play_file(
+                START_DELAY_SEC, midi_bytes, tempo, transpose, host_playing_label=host_label,
+                suffix=os.path.splitext(path)[1].lower(),
+            )
             self._room.host_report_playing(host_label)
             start_at = time.time() + START_DELAY_SEC
-            def wait_then_play():
-                delay = start_at - time.time()
-                if delay > 0:
-                    time.sleep(delay)
-                self.root.after(0, lambda: self._sync_start_file_playback(path, tempo, transpose))
-            threading.Thread(target=wait_then_play, daemon=True).start()
+            self._schedule_start(start_at, lambda: self._sync_start_file_playback(path, tempo, transpose))
             self.status.config(text=f'Starting in {int(START_DELAY_SEC)}s… (synced)')
             return
         self._start_file_playback(path)
 
+    def _progress_bars(self) -> list:
+        bars = [self.progress_bar, self.os_progress_bar]
+        if hasattr(self, 'pl_progress_bar'):
+            bars.append(self.pl_progress_bar)
+        return bars
+
     def _set_progress(self, current, total):
-        if total <= 0:
-            return
         # Enable stop buttons only when playback has actually started (first progress)
         if not self._stop_buttons_enabled:
             self._stop_buttons_enabled = True
@@ -2006,19 +2223,65 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
                 self.pl_stop_btn.config(state='normal', bg=STOP_RED)
             self.stop_btn.config(state='normal', bg=STOP_RED)
             self.os_stop_btn.config(state='normal', bg=STOP_RED)
-        self.progress_bar['maximum'] = total
-        self.progress_bar['value'] = current
-        self.os_progress_bar['maximum'] = total
-        self.os_progress_bar['value'] = current
-        if hasattr(self, 'pl_progress_bar'):
-            self.pl_progress_bar['maximum'] = total
-            self.pl_progress_bar['value'] = current
+        if total <= 0:
+            # Streamed playback: length unknown until the last event
+            for bar in self._progress_bars():
+                if str(bar['mode']) != 'indeterminate':
+                    bar.config(mode='indeterminate')
+                    bar.start(40)
+            return
+        for bar in self._progress_bars():
+            if str(bar['mode']) == 'indeterminate':
+                bar.stop()
+                bar.config(mode='determinate')
+            bar['maximum'] = total
+            bar['value'] = current
+
+    def _bind_seek(self, bar):
+        """Click the progress bar to jump there, right-click it to pause or resume."""
+        bar.bind('<Button-1>', lambda e: self._seek_to(e.x / max(1, bar.winfo_width())))
+        bar.bind('<Button-3>', lambda e: self._toggle_pause())
+
+    def _status_labels(self) -> list:
+        labels = [self.status, self.os_status]
+        if hasattr(self, 'pl_status'):
+            labels.append(self.pl_status)
+        return labels
+
+    def _seek_to(self, fraction: float):
+        controls = self._controls
+        if not self.playing or controls is None:
+            return
+        controls.seek_fraction(fraction)
+
+    def _toggle_pause(self):
+        controls = self._controls
+        if not self.playing or controls is None:
+            return
+        if self._paused:
+            controls.resume()
+            self._end_pause()
+            return
+        controls.pause()
+        self._paused = True
+        self._status_before_pause = {label: label.cget('text') for label in self._status_labels()}
+        for label in self._status_labels():
+            label.config(text='Paused (right-click the progress bar to resume)')
+
+    def _end_pause(self):
+        """Forget the pause state and restore the status text (resume or playback ended)."""
+        if self._paused:
+            self._paused = False
+            for label, text in self._status_before_pause.items():
+                label.config(text=text)
+            self._status_before_pause = {}
 
     def _progress_done(self):
-        self.progress_bar['value'] = self.progress_bar['maximum']
-        self.os_progress_bar['value'] = self.os_progress_bar['maximum']
-        if hasattr(self, 'pl_progress_bar'):
-            self.pl_progress_bar['value'] = self.pl_progress_bar['maximum']
+        for bar in self._progress_bars():
+            if str(bar['mode']) == 'indeterminate':
+                bar.stop()
+                bar.config(mode='determinate')
+            bar['value'] = bar['maximum']
         # Only switch to "stopped" state if we're not playing (e.g. we didn't just start a repeat)
         if not self.playing:
             if getattr(self, '_os_playing_path', None):
@@ -2041,6 +2304,15 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
     def stop(self):
         self._stopped_by_user = True
         self.playing = False
+        self._end_pause()
+        if self._start_cancel is not None:
+            self._start_cancel.set()
+        with self._session_lock:
+            session, controls = self._session, self._controls
+        if session is not None:
+            session.stop()
+        if controls is not None and controls is not session:
+            controls.stop()  # playback worker: tell the process now rather than at its next poll
         self.status.config(text='Stopped')
         if self._current_source == 'playlist' and hasattr(self, 'pl_status'):
             self.pl_status.config(text='Stopped.')
@@ -2056,33 +2328,155 @@ start /b "" cmd /c "timeout /t 1 >nul & del \"%ME%\""
         self.os_stop_btn.config(state='disabled', bg=SUBTLE)
         self._stop_buttons_enabled = False
 
-    def _play_thread(self, path, tempo_multiplier, transpose):
-        def on_done(finished_naturally: bool):
-            self.playing = False
-            self.root.after(0, lambda: self._on_playback_finished(finished_naturally))
+    def _on_limit_key_rate(self):
+        self._key_budget = KeyBudget() if self.limit_key_rate.get() else None
+
+    def _on_catch_up_selected(self):
+        self._catch_up = self.catch_up_policy.get()
+
+    def _on_tempo_changed(self):
+        """Tempo slider moved by the user: apply it to the song playing from the current position on."""
+        controls = self._controls
+        if not self.playing or controls is None:
+            return
+        try:
+            tempo = self.tempo.get()
+        except tk.TclError:
+            return
+        if tempo > 0:
+            controls.set_rate(tempo / self._play_tempo)
+
+    def _on_keymap_selected(self):
+        self._keymap = self._keymaps.get(self.keymap_name.get(), DEFAULT_KEYMAP)
+
+    def _on_separate_process(self):
+        self._use_worker = self.separate_process.get()
+
+    def _get_worker(self) -> PlaybackWorker:
+        """The playback process, started on first use (and again if it died)."""
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = PlaybackWorker()
+            return self._worker
+
+    def _new_scheduled_start(self) -> threading.Event:
+        """Cancel the pending synced start, if any; returns the cancel Event for a new one."""
+        if self._start_cancel is not None:
+            self._start_cancel.set()
+        cancel = self._start_cancel = threading.Event()
+        return cancel
+
+    def _schedule_start(self, start_at: float, start):
+        """Call start on the main thread at start_at (time.time()) unless stop() or a newer start cancels it."""
+        cancel = self._new_scheduled_start()
+        threading.Thread(target=self._wait_then_start, args=(cancel, start_at, start), daemon=True).start()
+
+    def _wait_then_start(self, cancel: threading.Event, start_at: float, start):
+        # Background thread: returns at once when cancelled instead of sleeping out the delay.
+        # Not through self._ui: its frame interval would add up to FRAME_MS of drift between synced players.
+        if cancel.wait(max(0.0, start_at - time.time())):
+            return
+        self.root.after(0, lambda: None if cancel.is_set() else start())
+
+    def _start_play_thread(self, path, tempo_multiplier, transpose):
+        """Play path in a new thread with its own PlaybackSession. The previous song's session is stopped,
+        so its thread ends within a frame instead of lingering (or finishing into the new song's UI)."""
+        with self._session_lock:
+            if self._session is not None:
+                self._session.stop()
+            session = self._session = PlaybackSession()
+            self._controls = session
+            self._play_tempo = tempo_multiplier
+        threading.Thread(
+            target=self._play_thread,
+            args=(path, tempo_multiplier, transpose, session),
+            daemon=True
+        ).start()
+
+    def _play_thread(self, path, tempo_multiplier, transpose, session: PlaybackSession):
+        muted_tracks, muted_channels = self._song_settings.get_mutes(os.path.normpath(path))
+        selection = TrackSelection(muted_tracks, muted_channels)
 
+        def on_done(finished_naturally: bool):
+            with self._session_lock:
+                if self._session is not session:
+                    return  # replaced by a newer song, which owns the UI now
+                self._session = None
+                self._controls = None
+                self.playing = False
+            self._ui.post(lambda: self._on_playback_finished(finished_naturally))
+
+        if self._use_worker:
+            self._play_in_worker(path, tempo_multiplier, transpose, selection, session, on_done)
+            return
         try:
             playback.run_playback_from_file(
                 path, tempo_multiplier, transpose,
-                is_playing=lambda: self.playing,
-                progress_callback=lambda c, t: self.root.after(0, lambda c=c, t=t: self._set_progress(c, t)),
+                is_playing=session.is_playing,
+                progress_callback=lambda c, t: self._ui.post_latest('progress', self._set_progress, c, t),
                 done_callback=on_done,
+                keymap=self._keymap,
+                cache=self._event_cache,
+                budget=self._key_budget,
+                selection=selection,
+                scheduler=Scheduler(catch_up=CatchUp(self._catch_up)),
+                timing=self._timing,
+                session=session,
             )
         except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror('Playback error', str(e)))
-            self.root.after(0, lambda: self.status.config(text='Error'))
+            msg = str(e)  # e is unbound once the except block ends, before the UI runs the lambda
+            self._ui.post(lambda msg=msg: messagebox.showerror('Playback error', msg))
+            self._ui.post(lambda: self.status.config(text='Error'))
             # run_playback_from_file's finally already calls on_done(False) when we raise
 
+    def _play_in_worker(self, path, tempo_multiplier, transpose, selection, session, on_done):
+        """Like _play_thread, but the song is compiled here and its keys are sent by the playback process."""
+        finished_naturally = False
+        try:
+            events = playback.load_events(
+                path, tempo_multiplier, transpose,
+                keymap=self._keymap, cache=self._event_cache, budget=self._key_budget, selection=selection,
+            )
+            if not session.is_playing():
+                return  # stopped or replaced while loading: never reaches the worker
+            worker = self._get_worker()
+            worker.catch_up = self._catch_up
+
+            def use_worker_controls():
+                # Main thread, like the pause/seek/tempo handlers: none of their requests fall between
+                # forwarding what the session holds and pointing _controls at the worker.
+                with self._session_lock:
+                    if self._session is not session:
+                        return
+                    self._controls = worker
+                session.forward_to(worker)
+
+            finished_naturally = worker.run(
+                events,
+                is_playing=session.is_playing,
+                progress_callback=lambda c, t: self._ui.post_latest('progress', self._set_progress, c, t),
+                timing=self._timing,
+                on_started=lambda: self._ui.post(use_worker_controls),
+            )
+        except Exception as e:
+            log.exception("Playback in separate process failed")
+            msg = str(e)
+            self._ui.post(lambda msg=msg: messagebox.showerror('Playback error', msg))
+            self._ui.post(lambda: self.status.config(text='Error'))
+        finally:
+            on_done(finished_naturally)
+
     def _on_playback_finished(self, finished_naturally: bool):
         """Run on main thread when playback thread exits. Updates UI and optionally starts repeat or next playlist item."""
+        self._end_pause()
         if finished_naturally and not self._stopped_by_user:
             if self._current_source == 'playlist':
                 if self._playlist.advance():
-                    self.root.after(0, self._start_next_playlist_item)
+                    self._ui.post(self._start_next_playlist_item)
                     return
                 if self.repeat_playlist.get():
                     self._playlist.reset_to_start()
-                    self.root.after(0, self._start_next_playlist_item)
+                    self._ui.post(self._start_next_playlist_item)
                     return
             else:
                 self._maybe_repeat_current()
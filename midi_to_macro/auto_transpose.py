@@ -0,0 +1,147 @@
+"""Suggest a transpose for a song from its pitch histogram, scored against a keymap (no UI)."""
+
+from array import array
+from typing import Iterable
+
+from midi_to_macro.keymap import DEFAULT_KEYMAP, NOTE_COUNT, Keymap
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Transposes the UI offers
+MIN_TRANSPOSE = -12
+MAX_TRANSPOSE = 12
+
+# Cost per note: pushed outside the keymap's range, sharing a key with another pitch, needing a modifier
+CLAMP_WEIGHT = 4.0
+COLLIDE_WEIGHT = 2.0
+BLACK_WEIGHT = 1.0
+
+# Phrase length for octave folds
+PHRASE_MS = 4000.0
+
+
+class TransposeScore:
+    """How a song fits a keymap at one transpose. Counts are notes; lower score is better."""
+
+    __slots__ = ('transpose', 'clamped', 'collided', 'black', 'score')
+
+    def __init__(self, transpose: int, clamped: int, collided: int, black: int):
+        self.transpose = transpose
+        self.clamped = clamped
+        self.collided = collided
+        self.black = black
+        self.score = CLAMP_WEIGHT * clamped + COLLIDE_WEIGHT * collided + BLACK_WEIGHT * black
+
+    def __repr__(self) -> str:
+        return (
+            f'TransposeScore({self.transpose:+d}: {self.clamped} clamped, '
+            f'{self.collided} collided, {self.black} black)'
+        )
+
+
+def pitch_histogram(notes: Iterable[int]) -> list[int]:
+    """Note-on count per MIDI note 0–127."""
+    if np is not None and isinstance(notes, (array, bytes)):
+        return np.bincount(np.frombuffer(notes, dtype=np.uint8), minlength=NOTE_COUNT)[:NOTE_COUNT].tolist()
+    hist = [0] * NOTE_COUNT
+    for n in notes:
+        hist[n] += 1
+    return hist
+
+
+def _key_ids(keymap: Keymap) -> list[int]:
+    return [(m << 8) | c for m, c in zip(keymap.masks, keymap.codes)]
+
+
+def score_transposes(
+    hist: list[int],
+    keymap: Keymap | None = None,
+    candidates: Iterable[int] = range(MIN_TRANSPOSE, MAX_TRANSPOSE + 1),
+) -> list[TransposeScore]:
+    """Score every candidate transpose in one pass over (candidate x pitch). Vectorized with NumPy when available.
+
+    collided counts notes whose key is also used by a more frequent pitch (they no longer sound distinct).
+    """
+    keymap = keymap or DEFAULT_KEYMAP
+    candidates = list(candidates)
+    if not candidates:
+        return []
+    lo, hi = keymap.note_min, keymap.note_max
+    ids = _key_ids(keymap)
+    if np is not None:
+        h = np.asarray(hist, dtype=np.int64)
+        t = np.asarray(candidates, dtype=np.int64)[:, None]
+        shifted = np.arange(NOTE_COUNT)[None, :] + t
+        idx = np.clip(shifted, 0, NOTE_COUNT - 1)
+        weights = np.broadcast_to(h, idx.shape)
+        clamped = (weights * ((shifted < lo) | (shifted > hi))).sum(axis=1)
+        black = (weights * (np.frombuffer(keymap.masks, dtype=np.uint8)[idx] != 0)).sum(axis=1)
+        # Per (candidate, key): total notes and the count of its most frequent pitch
+        stride = max(ids) + 1
+        key = np.asarray(ids, dtype=np.int64)[idx] + (np.arange(len(candidates)) * stride)[:, None]
+        flat_key = key.ravel()
+        flat_w = weights.ravel()
+        size = len(candidates) * stride
+        totals = np.bincount(flat_key, weights=flat_w, minlength=size).astype(np.int64)
+        peak = np.zeros(size, dtype=np.int64)
+        np.maximum.at(peak, flat_key, flat_w)
+        collided = (totals - peak).reshape(len(candidates), stride).sum(axis=1)
+        return [
+            TransposeScore(c, int(cl), int(co), int(bl))
+            for c, cl, co, bl in zip(candidates, clamped, collided, black)
+        ]
+    used = [n for n in range(NOTE_COUNT) if hist[n]]
+    masks = keymap.masks
+    scores = []
+    for c in candidates:
+        clamped = black = 0
+        per_key: dict[int, list[int]] = {}
+        for n in used:
+            count = hist[n]
+            s = n + c
+            if s < lo or s > hi:
+                clamped += count
+            i = min(max(s, 0), NOTE_COUNT - 1)
+            if masks[i]:
+                black += count
+            per_key.setdefault(ids[i], []).append(count)
+        collided = sum(sum(v) - max(v) for v in per_key.values())
+        scores.append(TransposeScore(c, clamped, collided, black))
+    return scores
+
+
+def suggest_transpose(
+    notes: Iterable[int] | list[int],
+    keymap: Keymap | None = None,
+    candidates: Iterable[int] = range(MIN_TRANSPOSE, MAX_TRANSPOSE + 1),
+) -> TransposeScore:
+    """Best transpose for notes (raw MIDI notes, e.g. Song.notes): lowest score, then the smallest shift."""
+    scores = score_transposes(pitch_histogram(notes), keymap, candidates)
+    if not scores:
+        raise ValueError('No transpose candidates')
+    return min(scores, key=lambda s: (s.score, abs(s.transpose), -s.transpose))
+
+
+def suggest_octave_folds(
+    times: Iterable[float],
+    notes: Iterable[int],
+    transpose: int,
+    keymap: Keymap | None = None,
+    phrase_ms: float = PHRASE_MS,
+) -> list[tuple[float, int]]:
+    """Per-phrase octave shifts on top of transpose: [(phrase_start_ms, semitones), ...] for phrases where
+    moving by -12/+12 scores better than staying. Phrases are fixed windows of phrase_ms."""
+    phrases: dict[int, list[int]] = {}
+    for ms, note in zip(times, notes):
+        phrases.setdefault(int(ms // phrase_ms), []).append(note)
+    folds = []
+    for phrase in sorted(phrases):
+        hist = pitch_histogram(phrases[phrase])
+        scores = score_transposes(hist, keymap, (transpose - 12, transpose, transpose + 12))
+        best = min(scores, key=lambda s: (s.score, s.transpose != transpose))
+        if best.transpose != transpose:
+            folds.append((phrase * phrase_ms, best.transpose - transpose))
+    return folds
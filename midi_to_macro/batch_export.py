@@ -0,0 +1,146 @@
+"""Convert a folder of MIDI files to .mcr (or compiled songs) on a process pool (no UI)."""
+
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable
+
+from midi_to_macro.compiled import COMPILED_SUFFIX, write_compiled
+from midi_to_macro.keymap import Keymap
+from midi_to_macro.midi import compile_midi, convert_midi_to_mcr
+
+log = logging.getLogger("midi_to_macro.batch_export")
+
+MIDI_EXTENSIONS = ('.mid', '.midi')
+
+# Conversions queued per worker. Bounds pending futures (and memory) however large the library is.
+QUEUE_PER_WORKER = 2
+
+
+class BatchResult:
+    """Outcome of a batch export: converted .mcr paths and (midi_path, error) failures."""
+
+    __slots__ = ('converted', 'failed', 'events')
+
+    def __init__(self):
+        self.converted: list[str] = []
+        self.failed: list[tuple[str, str]] = []
+        self.events = 0
+
+    def __len__(self) -> int:
+        return len(self.converted) + len(self.failed)
+
+
+def find_midi_files(folder: str) -> list[str]:
+    """Every .mid/.midi under folder (including subfolders), sorted."""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(MIDI_EXTENSIONS):
+                found.append(os.path.join(dirpath, name))
+    return found
+
+
+def mcr_path_for(midi_path: str, folder: str, out_dir: str | None = None, suffix: str = '.mcr') -> str:
+    """Output path: next to the MIDI file, or mirrored under out_dir relative to folder."""
+    base = os.path.splitext(midi_path)[0] + suffix
+    if not out_dir:
+        return base
+    return os.path.join(out_dir, os.path.relpath(base, folder))
+
+
+def _convert_one(
+    midi_path: str,
+    mcr_path: str,
+    tempo_multiplier: float,
+    transpose: int,
+    keymap: Keymap | None,
+) -> tuple[str, int, str]:
+    """Worker: convert one file (compiled song if mcr_path ends with COMPILED_SUFFIX).
+    Returns (mcr_path, event_count, error); error is '' on success."""
+    try:
+        os.makedirs(os.path.dirname(mcr_path) or '.', exist_ok=True)
+        if mcr_path.endswith(COMPILED_SUFFIX):
+            table = compile_midi(midi_path, tempo_multiplier, transpose, keymap)
+            write_compiled(mcr_path, table)
+            return (mcr_path, len(table), '')
+        return (mcr_path, convert_midi_to_mcr(midi_path, mcr_path, tempo_multiplier, transpose, keymap), '')
+    except Exception as e:  # corrupt files must not stop the batch
+        return (mcr_path, 0, f'{type(e).__name__}: {e}')
+
+
+def _convert_on_pool(
+    paths: list[str],
+    folder: str,
+    out_dir: str | None,
+    tempo_multiplier: float,
+    transpose: int,
+    keymap: Keymap | None,
+    workers: int,
+    suffix: str,
+    record: Callable[..., None],
+) -> None:
+    """Run conversions on a process pool with at most QUEUE_PER_WORKER files queued per worker."""
+    todo = iter(paths)
+    limit = workers * QUEUE_PER_WORKER
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        pending = {}
+        while True:
+            while len(pending) < limit:
+                midi_path = next(todo, None)
+                if midi_path is None:
+                    break
+                future = pool.submit(
+                    _convert_one, midi_path, mcr_path_for(midi_path, folder, out_dir, suffix),
+                    tempo_multiplier, transpose, keymap,
+                )
+                pending[future] = midi_path
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                record(pending.pop(future), *future.result())
+
+
+def convert_folder(
+    folder: str,
+    out_dir: str | None = None,
+    tempo_multiplier: float = 1.0,
+    transpose: int = 0,
+    keymap: Keymap | None = None,
+    workers: int | None = None,
+    progress_callback: Callable[[int, int, str], None] | None = None,
+    suffix: str = '.mcr',
+) -> BatchResult:
+    """Convert every MIDI file under folder to .mcr (or compiled songs with suffix=COMPILED_SUFFIX).
+
+    workers: process count (default: all cores); 1 converts in this process.
+    progress_callback(done, total, midi_path) is called after each file.
+    """
+    paths = find_midi_files(folder)
+    total = len(paths)
+    result = BatchResult()
+    workers = max(1, workers or os.cpu_count() or 1)
+
+    def record(midi_path: str, mcr_path: str, count: int, error: str) -> None:
+        if error:
+            log.warning("Batch export failed for %s: %s", midi_path, error)
+            result.failed.append((midi_path, error))
+        else:
+            result.converted.append(mcr_path)
+            result.events += count
+        if progress_callback:
+            progress_callback(len(result), total, midi_path)
+
+    if workers == 1 or total <= 1:
+        for midi_path in paths:
+            record(midi_path, *_convert_one(
+                midi_path, mcr_path_for(midi_path, folder, out_dir, suffix), tempo_multiplier, transpose, keymap,
+            ))
+    else:
+        _convert_on_pool(paths, folder, out_dir, tempo_multiplier, transpose, keymap, workers, suffix, record)
+    log.info(
+        "Batch export of %s: %s converted, %s failed", folder, len(result.converted), len(result.failed),
+    )
+    return result
@@ -0,0 +1,125 @@
+"""Keystroke-rate budget: thin compiled events so the game can register every key that is sent."""
+
+import logging
+from array import array
+from math import ceil
+
+from midi_to_macro.events import EventTable
+
+log = logging.getLogger("midi_to_macro.budget")
+
+DEFAULT_KEYS_PER_SEC = 40.0
+DEFAULT_BURST = 8
+DEFAULT_SAME_KEY_GAP_MS = 40
+DEFAULT_MAX_SHIFT_MS = 25
+
+
+class KeyBudget:
+    """Limits for what the game can take in.
+
+    keys_per_sec: sustained key presses per second; burst: presses allowed at once (chords) before the rate applies.
+    same_key_gap_ms: a key pressed again sooner than this is merged into the earlier press.
+    max_shift_ms: how far the top note of a chord may be delayed to fit the rate instead of being dropped.
+    """
+
+    __slots__ = ('keys_per_sec', 'burst', 'same_key_gap_ms', 'max_shift_ms')
+
+    def __init__(
+        self,
+        keys_per_sec: float = DEFAULT_KEYS_PER_SEC,
+        burst: int = DEFAULT_BURST,
+        same_key_gap_ms: int = DEFAULT_SAME_KEY_GAP_MS,
+        max_shift_ms: int = DEFAULT_MAX_SHIFT_MS,
+    ):
+        if keys_per_sec <= 0:
+            raise ValueError(f'keys_per_sec must be positive, got {keys_per_sec}')
+        if burst < 1:
+            raise ValueError(f'burst must be at least 1, got {burst}')
+        self.keys_per_sec = keys_per_sec
+        self.burst = burst
+        self.same_key_gap_ms = max(0, same_key_gap_ms)
+        self.max_shift_ms = max(0, max_shift_ms)
+
+
+class BudgetReport:
+    """What apply_budget changed: notes dropped for rate, merged into a recent press of the same key, or delayed."""
+
+    __slots__ = ('total', 'dropped', 'merged', 'shifted')
+
+    def __init__(self, total: int = 0, dropped: int = 0, merged: int = 0, shifted: int = 0):
+        self.total = total
+        self.dropped = dropped
+        self.merged = merged
+        self.shifted = shifted
+
+    @property
+    def changed(self) -> int:
+        return self.dropped + self.merged + self.shifted
+
+    def __str__(self) -> str:
+        return (
+            f'{self.changed} of {self.total} notes changed '
+            f'({self.dropped} dropped, {self.merged} merged, {self.shifted} shifted)'
+        )
+
+
+def apply_budget(
+    table: EventTable,
+    budget: KeyBudget,
+    pitches: bytes | array | None = None,
+) -> tuple[EventTable, BudgetReport]:
+    """Return (events that fit the budget, report). table must be sorted by time.
+
+    Within a chord, notes are kept highest pitch first (pitches: MIDI note per event, e.g. Song.notes), so the
+    melody/top voice survives and lower voices are thinned. Without pitches the original order is the priority.
+    The rate is a token bucket kept as a theoretical arrival time (GCRA), which also stays exact for shifted notes.
+    """
+    times, keys, mods = table.times, table.keys, table.mods
+    n = len(times)
+    report = BudgetReport(total=n)
+    interval = 1000.0 / budget.keys_per_sec
+    tolerance = (budget.burst - 1) * interval
+    gap = budget.same_key_gap_ms
+    max_shift = budget.max_shift_ms
+    tat = float('-inf')
+    last_press: dict[int, int] = {}
+    kept: list[tuple[int, int]] = []  # (time_ms, original index)
+    i = 0
+    while i < n:
+        t = times[i]
+        j = i + 1
+        while j < n and times[j] == t:
+            j += 1
+        frame = range(i, j)
+        if pitches is not None and j - i > 1:
+            frame = sorted(frame, key=lambda k: -pitches[k])
+        for rank, k in enumerate(frame):
+            code = keys[k]
+            prev = last_press.get(code)
+            if prev is not None and t - prev < gap:
+                report.merged += 1
+                continue
+            at = t
+            earliest = tat - tolerance
+            if at < earliest:
+                if rank or earliest - t > max_shift:
+                    report.dropped += 1
+                    continue
+                at = int(ceil(earliest))
+                report.shifted += 1
+            tat = max(tat, at) + interval
+            last_press[code] = at
+            kept.append((at, k))
+        i = j
+    if report.shifted:
+        kept.sort()
+    elif pitches is not None:
+        kept.sort(key=lambda e: e[1])
+    out = EventTable(
+        array('i', [at for at, _ in kept]),
+        array('B', [keys[k] for _, k in kept]),
+        array('B', [mods[k] for _, k in kept]),
+    )
+    if report.changed:
+        log.info("Key budget (%.0f keys/s, same-key gap %s ms): %s", budget.keys_per_sec, gap, report)
+    return out, report
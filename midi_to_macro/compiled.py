@@ -0,0 +1,112 @@
+"""Compiled song files: a fixed header and packed event arrays, loaded through mmap without copying.
+
+Layout (little-endian): 16-byte header (magic, format version, reserved, event count, reserved), then
+int32 times in ms, then uint8 key codes, then uint8 modifier masks. Opening maps the file read-only,
+so load time does not depend on song length and processes playing the same file share its pages.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from midi_to_macro.events import Event, EventTable
+
+COMPILED_SUFFIX = '.mcrc'
+FORMAT_VERSION = 1
+
+_MAGIC = b'WSMC'
+_HEADER = struct.Struct('<4sHHII')  # magic, version, reserved, event count, reserved (16 bytes keeps times aligned)
+
+
+def write_compiled(path: str, events: EventTable | list[Event]) -> None:
+    """Write events (EventTable or list) as a compiled song file (atomically)."""
+    table = EventTable.coerce(events)
+    times = table.times
+    if not isinstance(times, array) or times.typecode != 'i' or sys.byteorder == 'big':
+        times = array('i', times)
+        if sys.byteorder == 'big':
+            times.byteswap()
+    tmp = path + '.tmp'
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, FORMAT_VERSION, 0, len(table), 0))
+            f.write(times)
+            f.write(table.keys)
+            f.write(table.mods)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class CompiledSong:
+    """A compiled song file mapped read-only. table is an EventTable whose arrays are memoryviews into
+    the mapping (no copy); it is valid until close(). Use as a context manager."""
+
+    __slots__ = ('path', 'table', '_mmap', '_views')
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mmap = None
+        self._views: list[memoryview] = []
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f'Not a compiled song: {path}')
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.table = self._map_table(size)
+        except Exception:
+            self.close()
+            raise
+
+    def _map_table(self, size: int) -> EventTable:
+        magic, version, _, count, _ = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC:
+            raise ValueError(f'Not a compiled song: {self.path}')
+        if version != FORMAT_VERSION:
+            raise ValueError(f'Unsupported compiled song version {version}: {self.path}')
+        if size != _HEADER.size + 6 * count:
+            raise ValueError(f'Compiled song is truncated: {self.path}')
+        view = memoryview(self._mmap)
+        keys_at = _HEADER.size + 4 * count
+        mods_at = keys_at + count
+        self._views = [view]
+        times = view[_HEADER.size:keys_at].cast('i')
+        if sys.byteorder == 'big':
+            times = array('i', times)
+            times.byteswap()
+        else:
+            self._views.append(times)
+        keys = view[keys_at:mods_at]
+        mods = view[mods_at:]
+        self._views += [keys, mods]
+        return EventTable(times, keys, mods)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def close(self) -> None:
+        """Release the views and unmap the file."""
+        for v in reversed(self._views):
+            v.release()
+        self._views = []
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> 'CompiledSong':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def load_compiled(path: str) -> CompiledSong:
+    """Map a compiled song file. Raises ValueError if it is not one (or is truncated)."""
+    return CompiledSong(path)
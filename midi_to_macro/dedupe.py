@@ -0,0 +1,60 @@
+"""Collapse chord notes that land on the same key after mapping."""
+
+import logging
+
+from midi_to_macro.events import EventTable, iter_frames
+
+log = logging.getLogger("midi_to_macro.dedupe")
+
+
+def _keystrokes(mask: int) -> int:
+    """Key presses one note costs: the key plus one per modifier."""
+    return 1 + bin(mask).count('1')
+
+
+class DedupeReport:
+    """Notes removed from chord frames and the keystrokes that saves."""
+
+    __slots__ = ('total', 'removed', 'keystrokes_saved')
+
+    def __init__(self):
+        self.total = 0
+        self.removed = 0
+        self.keystrokes_saved = 0
+
+    def __str__(self) -> str:
+        return (
+            f'{self.removed} of {self.total} notes were duplicate keys '
+            f'({self.keystrokes_saved} keystrokes saved)'
+        )
+
+    def log(self, name: str) -> None:
+        if self.removed:
+            log.info("%s: %s", name, self)
+
+
+def dedupe_frame(frame: list[tuple[int, int]], report: DedupeReport | None = None) -> list[tuple[int, int]]:
+    """One chord frame of (mask, key_code) with repeated presses removed, first occurrences kept in order.
+
+    The order keys are sent in is decided later, per frame, by modifiers.ModifierState.order.
+    """
+    if report is not None:
+        report.total += len(frame)
+    if len(frame) == 1:
+        return frame
+    kept = list(dict.fromkeys(frame))
+    if report is not None and len(kept) != len(frame):
+        report.removed += len(frame) - len(kept)
+        report.keystrokes_saved += sum(_keystrokes(m) for m, _ in frame) - sum(_keystrokes(m) for m, _ in kept)
+    return kept
+
+
+def dedupe(table: EventTable) -> tuple[EventTable, DedupeReport]:
+    """Return (table with every chord frame deduped, report)."""
+    report = DedupeReport()
+    out = EventTable()
+    append = out.append
+    for time_ms, frame in iter_frames(table.iter_raw()):
+        for mask, code in dedupe_frame(frame, report):
+            append(time_ms, mask, code)
+    return out, report
@@ -0,0 +1,195 @@
+"""On-disk cache of decoded notes keyed by file content hash and parser version (no UI)."""
+
+import hashlib
+import logging
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Iterable, Iterator
+
+log = logging.getLogger("midi_to_macro.event_cache")
+
+# Bump when decoding changes so entries written by older parsers are never reused
+PARSER_VERSION = 1
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Entry file: header, then little-endian float64 times (ms) and uint8 notes
+_MAGIC = b'WSMN'
+_HEADER = struct.Struct('<4sHIf')  # magic, parser version, note count, decode time (ms)
+_SUFFIX = '.notes'
+
+
+class EventCache:
+    """Directory of decoded (times_ms, notes) entries with LRU eviction by total size.
+    Recency is the entry file's mtime, refreshed on every hit.
+    """
+
+    def __init__(self, settings_dir: str = "", max_bytes: int = DEFAULT_MAX_BYTES):
+        base = settings_dir or os.path.join(os.path.expanduser("~"), ".midi_to_macro")
+        self._dir = os.path.join(base, "cache")
+        self.max_bytes = max_bytes
+
+    @property
+    def cache_dir(self) -> str:
+        return self._dir
+
+    @staticmethod
+    def key_for_bytes(data: bytes, variant: str = "") -> str:
+        """Key for file content; variant (e.g. a track selection) gets its own entry."""
+        key = f"{hashlib.blake2b(data, digest_size=16).hexdigest()}-v{PARSER_VERSION}"
+        return f"{key}-{variant}" if variant else key
+
+    def key_for_file(self, path: str, variant: str = "") -> str:
+        with open(path, "rb") as f:
+            return self.key_for_bytes(f.read(), variant)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._dir, key + _SUFFIX)
+
+    def load(self, key: str) -> tuple[array, array] | None:
+        """Return (times_ms, notes) for key, or None on a miss or unreadable entry."""
+        t0 = time.perf_counter()
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            log.info("Event cache miss %s", key)
+            return None
+        try:
+            magic, version, count, decode_ms = _HEADER.unpack_from(data)
+            if magic != _MAGIC or version != PARSER_VERSION:
+                raise ValueError("stale entry")
+            times_end = _HEADER.size + 8 * count
+            if len(data) != times_end + count:
+                raise ValueError("truncated entry")
+            times = array('d')
+            times.frombytes(data[_HEADER.size:times_end])
+            notes = array('B', data[times_end:])
+        except (struct.error, ValueError) as e:
+            log.warning("Event cache entry %s unusable (%s); discarding", key, e)
+            self._remove(path)
+            return None
+        if sys.byteorder == "big":
+            times.byteswap()
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        load_ms = (time.perf_counter() - t0) * 1000
+        log.info(
+            "Event cache hit %s: %s notes in %.1f ms (decode took %.1f ms, saved %.1f ms)",
+            key, count, load_ms, decode_ms, max(0.0, decode_ms - load_ms),
+        )
+        return times, notes
+
+    def store(self, key: str, times: array, notes: array, decode_ms: float = 0.0) -> None:
+        """Write an entry (atomically) and evict least recently used entries over max_bytes."""
+        if len(times) != len(notes):
+            raise ValueError("times and notes must have the same length")
+        if times.typecode != 'd':
+            times = array('d', times)
+        if sys.byteorder == "big":
+            times = array('d', times)
+            times.byteswap()
+        path = self._path(key)
+        tmp = path + ".tmp"
+        try:
+            os.makedirs(self._dir, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, PARSER_VERSION, len(notes), decode_ms))
+                f.write(times.tobytes())
+                f.write(bytes(notes))
+            os.replace(tmp, path)
+        except OSError as e:
+            log.warning("Event cache store failed for %s: %s", key, e)
+            self._remove(tmp)
+            return
+        log.info("Event cache store %s: %s notes (decode took %.1f ms)", key, len(notes), decode_ms)
+        self.evict()
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        """(mtime, size, path) for every entry, oldest first."""
+        entries = []
+        try:
+            names = os.listdir(self._dir)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(_SUFFIX):
+                continue
+            path = os.path.join(self._dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        return entries
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the total size fits max_bytes. Returns entries removed."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if self._remove(path):
+                total -= size
+                removed += 1
+        if removed:
+            log.info("Event cache evicted %s entries; %s bytes left", removed, total)
+        return removed
+
+    def clear(self) -> None:
+        for _, _, path in self._entries():
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+
+class NoteCollector:
+    """Wraps a (time_ms, note) stream during playback, keeping a copy and the time spent decoding,
+    so the decoded notes can be stored once the stream is done (complete: the whole stream was read)."""
+
+    def __init__(self, stream: Iterable[tuple[float, int]]):
+        self._it = iter(stream)
+        self.times = array('d')
+        self.notes = array('B')
+        self.decode_ms = 0.0
+        self.complete = False
+
+    def __iter__(self) -> Iterator[tuple[float, int]]:
+        return self
+
+    def __next__(self) -> tuple[float, int]:
+        t0 = time.perf_counter()
+        try:
+            ms, note = next(self._it)
+        except StopIteration:
+            self.complete = True
+            raise
+        finally:
+            self.decode_ms += (time.perf_counter() - t0) * 1000
+        self.times.append(ms)
+        self.notes.append(note)
+        return (ms, note)
+
+    def finish(self) -> tuple[array, array]:
+        """Decode whatever playback did not consume (e.g. after Stop) and return (times_ms, notes)."""
+        for _ in self:
+            pass
+        return self.times, self.notes
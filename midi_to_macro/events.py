@@ -0,0 +1,133 @@
+"""Compact event table: times, key codes and modifier flags in parallel arrays."""
+
+from array import array
+from typing import Iterable, Iterator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Modifier flags (bit mask). Order here is the press order used by playback and .mcr export.
+MOD_SHIFT = 1
+MOD_CTRL = 2
+MOD_NAMES = (('SHIFT', MOD_SHIFT), ('CTRL', MOD_CTRL))
+
+# Legacy event tuple: (time_ms, modifiers, key)
+Event = tuple[int, list[str], str]
+
+
+def mods_to_mask(mods: Iterable[str]) -> int:
+    """Convert ['SHIFT', 'CTRL', ...] to a modifier mask. Unknown names are ignored."""
+    mask = 0
+    for name, flag in MOD_NAMES:
+        if name in mods:
+            mask |= flag
+    return mask
+
+
+def mask_to_mods(mask: int) -> list[str]:
+    """Convert a modifier mask back to a fresh ['SHIFT', ...] list."""
+    return [name for name, flag in MOD_NAMES if mask & flag]
+
+
+def key_to_code(key: str) -> int:
+    """Key name ('Q', 'Z', ...) to the 1-byte code stored in the table."""
+    code = ord(key) if len(key) == 1 else -1
+    if not 0 <= code < 256:
+        raise ValueError(f'Key must be a single 8-bit character: {key!r}')
+    return code
+
+
+class EventTable:
+    """Events stored as parallel arrays instead of one tuple (and modifier list) per note.
+
+    times: absolute ms ('i'), keys: key code ('B', see key_to_code), mods: modifier mask ('B').
+    Iterating yields legacy (time_ms, [mods], key) tuples for old callers; iter_raw() yields
+    (time_ms, mask, key_code) without allocating modifier lists.
+    """
+
+    __slots__ = ('times', 'keys', 'mods')
+
+    def __init__(self, times: array | None = None, keys: array | None = None, mods: array | None = None):
+        self.times = times if times is not None else array('i')
+        self.keys = keys if keys is not None else array('B')
+        self.mods = mods if mods is not None else array('B')
+        if not len(self.times) == len(self.keys) == len(self.mods):
+            raise ValueError('times, keys and mods must have the same length')
+
+    @classmethod
+    def from_events(cls, events: Iterable[Event]) -> 'EventTable':
+        """Build a table from legacy (time_ms, [mods], key) tuples."""
+        table = cls()
+        for time_ms, mods, key in events:
+            table.append(time_ms, mods_to_mask(mods), key_to_code(key))
+        return table
+
+    @classmethod
+    def coerce(cls, events: 'EventTable | Iterable[Event]') -> 'EventTable':
+        """Return events as an EventTable (no copy if it already is one)."""
+        if isinstance(events, cls):
+            return events
+        return cls.from_events(events)
+
+    def append(self, time_ms: int, mask: int, key_code: int) -> None:
+        self.times.append(time_ms)
+        self.keys.append(key_code)
+        self.mods.append(mask)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getitem__(self, i: int) -> Event:
+        return (self.times[i], mask_to_mods(self.mods[i]), chr(self.keys[i]))
+
+    def __iter__(self) -> Iterator[Event]:
+        for time_ms, mask, code in self.iter_raw():
+            yield (time_ms, mask_to_mods(mask), chr(code))
+
+    def iter_raw(self, start: int = 0) -> Iterator[tuple[int, int, int]]:
+        """Yield (time_ms, modifier_mask, key_code) per event, from index start (sliced views, no copy)."""
+        if start:
+            return zip(memoryview(self.times)[start:], memoryview(self.mods)[start:], memoryview(self.keys)[start:])
+        return zip(self.times, self.mods, self.keys)
+
+    def frames(self) -> Iterator[tuple[int, list[tuple[int, int]]]]:
+        """Chord frames: see iter_frames."""
+        return iter_frames(self.iter_raw())
+
+    def to_list(self) -> list[Event]:
+        return list(self)
+
+    def duration_ms(self) -> int:
+        return self.times[-1] if self.times else 0
+
+    def nbytes(self) -> int:
+        """Memory held by the three arrays."""
+        return sum(a.itemsize * len(a) for a in (self.times, self.keys, self.mods))
+
+    def as_numpy(self):
+        """Zero-copy NumPy views (times, keys, mods). Raises RuntimeError if NumPy is not installed."""
+        if np is None:
+            raise RuntimeError('numpy not available')
+        return (
+            np.frombuffer(self.times, dtype=np.intc),
+            np.frombuffer(self.keys, dtype=np.uint8),
+            np.frombuffer(self.mods, dtype=np.uint8),
+        )
+
+
+def iter_frames(events: Iterable[tuple[int, int, int]]) -> Iterator[tuple[int, list[tuple[int, int]]]]:
+    """Group consecutive (time_ms, mask, key_code) events that share a time into chord frames:
+    (time_ms, [(mask, key_code), ...]). Works on streams; holds only the frame being built.
+    """
+    frame_time = 0
+    frame: list[tuple[int, int]] = []
+    for time_ms, mask, code in events:
+        if time_ms != frame_time and frame:
+            yield (frame_time, frame)
+            frame = []
+        frame_time = time_ms
+        frame.append((mask, code))
+    if frame:
+        yield (frame_time, frame)
@@ -0,0 +1,178 @@
+"""Keymap profiles: MIDI note -> (modifier mask, key), compiled once into a 128-entry table."""
+
+import json
+import os
+
+from midi_to_macro.events import MOD_CTRL, MOD_NAMES, MOD_SHIFT, key_to_code
+
+NOTE_COUNT = 128
+
+# Default clamp range: notes outside 0–95 get the closest key
+NOTE_MIN = 0
+NOTE_MAX = 95
+
+# Keys per octave: 7 naturals then 5 blacks (with modifier)
+LOW_KEYS = ['Z', 'X', 'C', 'V', 'B', 'N', 'M']   # low row
+MID_KEYS = ['A', 'S', 'D', 'F', 'G', 'H', 'J']   # mid row
+HIGH_KEYS = ['Q', 'W', 'E', 'R', 'T', 'Y', 'U']  # high row
+
+# Black key semitones in an octave (C#=1, D#=3, F#=6, G#=8, A#=10)
+BLACK = (1, 3, 6, 8, 10)
+
+# 12 semitones -> 7 key indices (C,C#=0; D,D#=1; E=2; F,F#=3; G,G#=4; A,A#=5; B=6)
+SEMITONE_KEY_INDEX = (0, 0, 1, 1, 2, 3, 3, 4, 4, 5, 5, 6)
+
+_MOD_BY_NAME = dict(MOD_NAMES)
+
+
+class Keymap:
+    """Compiled keymap. masks[note] and codes[note] give the modifier mask and key code for notes 0–127.
+    Notes outside note_min–note_max reuse the nearest playable note's key (clamped).
+    """
+
+    __slots__ = ('name', 'masks', 'codes', 'note_min', 'note_max', '_transposed')
+
+    def __init__(
+        self,
+        name: str,
+        entries: list[tuple[int, str]],
+        note_min: int = 0,
+        note_max: int = NOTE_COUNT - 1,
+    ):
+        if len(entries) != NOTE_COUNT:
+            raise ValueError(f'Keymap {name!r} needs {NOTE_COUNT} entries, got {len(entries)}')
+        self.name = name
+        self.note_min = note_min
+        self.note_max = note_max
+        self.masks = bytes(mask for mask, _ in entries)
+        self.codes = bytes(key_to_code(key) for _, key in entries)
+        self._transposed: dict[int, tuple[bytes, bytes]] = {}
+
+    @classmethod
+    def from_rows(
+        cls,
+        name: str,
+        rows: list[tuple[int, list[str]]],
+        ctrl: set[tuple[int, int]] = frozenset(),
+        note_min: int = NOTE_MIN,
+        note_max: int = NOTE_MAX,
+        overrides: dict[int, tuple[int, str]] | None = None,
+    ) -> 'Keymap':
+        """Build a keymap from rows of 7 keys, each starting at a note (ascending).
+
+        Black keys use SHIFT on the natural below them, or CTRL when (row_index, key_index) is in ctrl.
+        Notes are clamped to note_min–note_max first; overrides replace single notes after that.
+        """
+        if not rows:
+            raise ValueError(f'Keymap {name!r} has no rows')
+        for _, keys in rows:
+            if len(keys) != 7:
+                raise ValueError(f'Keymap {name!r}: each row needs 7 keys, got {len(keys)}')
+        entries: list[tuple[int, str]] = []
+        for note in range(NOTE_COUNT):
+            n = min(max(note, note_min), note_max)
+            semitone = n % 12
+            key_index = SEMITONE_KEY_INDEX[semitone]
+            row_index = 0
+            for i, (start, _) in enumerate(rows):
+                if n >= start:
+                    row_index = i
+            if semitone in BLACK:
+                mask = MOD_CTRL if (row_index, key_index) in ctrl else MOD_SHIFT
+            else:
+                mask = 0
+            entries.append((mask, rows[row_index][1][key_index]))
+        for note, entry in (overrides or {}).items():
+            if 0 <= note < NOTE_COUNT:
+                entries[note] = entry
+        return cls(name, entries, note_min, note_max)
+
+    def lookup(self, note: int) -> tuple[int, str]:
+        """(modifier_mask, key) for a note; notes outside 0–127 use the nearest entry."""
+        if note < 0:
+            note = 0
+        elif note >= NOTE_COUNT:
+            note = NOTE_COUNT - 1
+        return (self.masks[note], chr(self.codes[note]))
+
+    def transposed(self, transpose: int) -> tuple[bytes, bytes]:
+        """256-byte (masks, codes) translation tables indexed by untransposed note, for bytes.translate()."""
+        tables = self._transposed.get(transpose)
+        if tables is None:
+            top = NOTE_COUNT - 1
+            index = [min(max(n + transpose, 0), top) for n in range(256)]
+            tables = (bytes(self.masks[i] for i in index), bytes(self.codes[i] for i in index))
+            self._transposed[transpose] = tables
+        return tables
+
+
+# Default profile: rows split at 60/72, only X (D# on low row) uses CTRL
+DEFAULT_KEYMAP = Keymap.from_rows(
+    'Default',
+    [(0, LOW_KEYS), (60, MID_KEYS), (72, HIGH_KEYS)],
+    ctrl={(0, 1)},
+)
+
+
+def _parse_key_spec(spec: str) -> tuple[int, str]:
+    """'SHIFT+A' -> (MOD_SHIFT, 'A')."""
+    *mods, key = [p.strip() for p in str(spec).split('+')]
+    mask = 0
+    for m in mods:
+        if m.upper() not in _MOD_BY_NAME:
+            raise ValueError(f'Unknown modifier {m!r} in {spec!r}')
+        mask |= _MOD_BY_NAME[m.upper()]
+    key_to_code(key)
+    return (mask, key)
+
+
+def load_keymap(path: str) -> Keymap:
+    """Load a keymap profile from a JSON file.
+
+    Format: {"name": str, "note_min": int, "note_max": int,
+             "rows": [{"start": int, "keys": [7 keys], "ctrl": [key indices using CTRL]}, ...],
+             "notes": {"<note>": "SHIFT+A", ...}}
+    Only "rows" is required. Raises ValueError on malformed profiles.
+    """
+    with open(path, encoding='utf-8') as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f'Invalid keymap file {path}: {e}') from e
+    if not isinstance(data, dict) or not isinstance(data.get('rows'), list):
+        raise ValueError(f'Invalid keymap file {path}: missing "rows"')
+    name = str(data.get('name') or os.path.splitext(os.path.basename(path))[0])
+    rows: list[tuple[int, list[str]]] = []
+    ctrl: set[tuple[int, int]] = set()
+    try:
+        for row_index, row in enumerate(sorted(data['rows'], key=lambda r: int(r['start']))):
+            rows.append((int(row['start']), [str(k) for k in row['keys']]))
+            ctrl.update((row_index, int(i)) for i in row.get('ctrl', []))
+        overrides = {int(n): _parse_key_spec(spec) for n, spec in data.get('notes', {}).items()}
+        return Keymap.from_rows(
+            name, rows, ctrl=ctrl,
+            note_min=int(data.get('note_min', NOTE_MIN)),
+            note_max=int(data.get('note_max', NOTE_MAX)),
+            overrides=overrides,
+        )
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f'Invalid keymap file {path}: {e}') from e
+
+
+def available_keymaps(settings_dir: str = '') -> dict[str, Keymap]:
+    """Default profile plus every valid *.json profile in <settings_dir>/keymaps, by name."""
+    settings_dir = settings_dir or os.path.join(os.path.expanduser('~'), '.midi_to_macro')
+    keymaps = {DEFAULT_KEYMAP.name: DEFAULT_KEYMAP}
+    folder = os.path.join(settings_dir, 'keymaps')
+    try:
+        names = sorted(os.listdir(folder))
+    except OSError:
+        return keymaps
+    for fname in names:
+        if fname.lower().endswith('.json'):
+            try:
+                km = load_keymap(os.path.join(folder, fname))
+            except (ValueError, OSError):
+                continue
+            keymaps[km.name] = km
+    return keymaps
@@ -0,0 +1,103 @@
+"""Read .mcr macros back into timed key events (line by line, without loading the whole file)."""
+
+from typing import Iterable, Iterator
+
+from midi_to_macro.events import MOD_CTRL, MOD_SHIFT, EventTable, key_to_code
+
+# Modifier key names written by .mcr tools -> modifier flag
+MODIFIER_KEYS = {
+    'ShiftLeft': MOD_SHIFT,
+    'ShiftRight': MOD_SHIFT,
+    'ControlLeft': MOD_CTRL,
+    'ControlRight': MOD_CTRL,
+}
+
+_DELAY = 0
+_DOWN = 1
+_UP = 2
+_MOD_DOWN = 3
+_MOD_UP = 4
+_SKIP = 5
+
+
+def _parse_line(line: str) -> tuple[int, int]:
+    """One .mcr line -> (kind, value): DELAY ms, key code, or modifier flag. Raises ValueError if unknown."""
+    parts = [p.strip() for p in line.split(':')]
+    if parts == ['']:
+        return (_SKIP, 0)
+    if parts[0] == 'DELAY' and len(parts) == 2:
+        ms = int(parts[1])
+        if ms < 0:
+            raise ValueError(f'Negative delay: {line.strip()!r}')
+        return (_DELAY, ms)
+    if parts[0] == 'Keyboard' and len(parts) == 3 and parts[2] in ('KeyDown', 'KeyUp'):
+        down = parts[2] == 'KeyDown'
+        flag = MODIFIER_KEYS.get(parts[1])
+        if flag is not None:
+            return (_MOD_DOWN if down else _MOD_UP, flag)
+        return (_DOWN if down else _UP, key_to_code(parts[1]))
+    raise ValueError(f'Unrecognized .mcr line: {line.strip()!r}')
+
+
+def iter_mcr_events(lines: Iterable[str]) -> Iterator[tuple[int, int, int]]:
+    """Yield (time_ms, modifier_mask, key_code) for each KeyDown of a non-modifier key.
+
+    Time is the sum of the DELAY lines so far. A DELAY right after a Shift/Ctrl KeyDown (the pause export_mcr
+    inserts so the game registers the modifier) does not move the note timeline, so exported files read back
+    to the events they were written from, including modifiers held across notes and rests.
+    Blank lines are ignored; anything else raises ValueError.
+    """
+    parsed: dict[str, tuple[int, int]] = {}
+    time_ms = 0
+    held = 0
+    settling = False
+    for lineno, line in enumerate(lines, 1):
+        # Macros repeat the same few dozen lines, so each distinct line is parsed once
+        entry = parsed.get(line)
+        if entry is None:
+            try:
+                entry = parsed[line] = _parse_line(line)
+            except ValueError as e:
+                raise ValueError(f'Line {lineno}: {e}') from None
+        kind, value = entry
+        if kind == _SKIP:
+            continue
+        if kind == _DOWN:
+            yield (time_ms, held, value)
+        elif kind == _DELAY:
+            if not settling:
+                time_ms += value
+        elif kind == _MOD_DOWN:
+            held |= value
+        elif kind == _MOD_UP:
+            held &= ~value
+        settling = kind == _MOD_DOWN
+
+
+def iter_mcr_file(path: str) -> Iterator[tuple[int, int, int]]:
+    """Stream (time_ms, modifier_mask, key_code) events from a .mcr file (see iter_mcr_events)."""
+    with open(path, encoding='utf-8') as f:
+        yield from iter_mcr_events(f)
+
+
+def read_mcr(path: str) -> EventTable:
+    """Load a .mcr file into an EventTable (playable with run_playback)."""
+    table = EventTable()
+    append = table.append
+    for time_ms, mask, code in iter_mcr_file(path):
+        append(time_ms, mask, code)
+    return table
+
+
+def first_difference(a: EventTable, b: EventTable, tolerance_ms: int = 0) -> int | None:
+    """Index of the first event that differs in key, modifiers or time (beyond tolerance_ms), or None
+    if the tables match. A length mismatch reports the length of the shorter table."""
+    if a.keys == b.keys and a.mods == b.mods and a.times == b.times:
+        return None
+    rows = zip(a.times, a.keys, a.mods, b.times, b.keys, b.mods)
+    for i, (ta, ka, ma, tb, kb, mb) in enumerate(rows):
+        if ka != kb or ma != mb or abs(ta - tb) > tolerance_ms:
+            return i
+    if len(a) != len(b):
+        return min(len(a), len(b))
+    return None
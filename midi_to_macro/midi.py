@@ -1,18 +1,40 @@
 """Parse MIDI, map notes to keys, build .mcr lines, export."""
 
+import heapq
+import logging
+import time
+from array import array
+from itertools import islice
+from operator import itemgetter
+from typing import Iterable, Iterator, TextIO
+
 import mido
 
-# Note range: row is chosen by pitch, not clamp. Low row < 60, mid 60–71, high 72+ (clamp note to 0–95).
-NOTE_MIN = 0
-NOTE_MAX = 95
+from midi_to_macro.dedupe import DedupeReport, dedupe_frame
+from midi_to_macro.event_cache import EventCache
+from midi_to_macro.events import MOD_CTRL, MOD_SHIFT, Event, EventTable, iter_frames, mask_to_mods
+# Row and clamp constants live in keymap (default profile); re-exported here for existing callers.
+from midi_to_macro.keymap import (
+    BLACK,
+    DEFAULT_KEYMAP,
+    HIGH_KEYS,
+    LOW_KEYS,
+    MID_KEYS,
+    NOTE_COUNT,
+    NOTE_MAX,
+    NOTE_MIN,
+    Keymap,
+)
+from midi_to_macro.modifiers import MODIFIER_HOLD_MS, ModifierState, modifier_flags
+from midi_to_macro.smf import TEMPO, read_smf
+from midi_to_macro.song import Song
+from midi_to_macro.tempo_map import TempoMap
+from midi_to_macro.track_index import TrackSelection, mido_track_notes
 
-# Keys per octave: 7 naturals then 5 blacks (with modifier)
-LOW_KEYS = ['Z', 'X', 'C', 'V', 'B', 'N', 'M']   # low row
-MID_KEYS = ['A', 'S', 'D', 'F', 'G', 'H', 'J']   # mid row
-HIGH_KEYS = ['Q', 'W', 'E', 'R', 'T', 'Y', 'U']  # high row
+log = logging.getLogger("midi_to_macro.midi")
 
-# Black key semitones in an octave (C#=1, D#=3, F#=6, G#=8, A#=10)
-BLACK = (1, 3, 6, 8, 10)
+# Decoded note stream item: (abs_tick, channel, note, velocity); channel == TEMPO for set_tempo (note = tempo)
+NoteStream = Iterator[tuple[int, int, int, int]]
 
 
 def _clamp_note(note: int) -> int:
@@ -24,85 +46,286 @@ def _clamp_note(note: int) -> int:
     return note
 
 
-def map_note_to_key(note: int) -> tuple[list[str], str]:
-    """Map MIDI note number to (modifiers, key). Row by threshold: <60 low, 60–71 mid, 72+ high; pitch = note % 12."""
-    note = _clamp_note(note)
-    semitone = note % 12
-    # 12 semitones -> 7 key indices (C,C#=0; D,D#=1; E=2; F,F#=3; G,G#=4; A,A#=5; B=6)
-    key_index = (0, 0, 1, 1, 2, 3, 3, 4, 4, 5, 5, 6)[semitone]
-    if semitone in BLACK:
-        # Black key: only X (D# on low row) uses CTRL; all others use SHIFT
-        use_low_row = note < 60
-        mods = ['CTRL'] if (use_low_row and key_index == 1) else ['SHIFT']
-    else:
-        mods = []
-    if note < 60:
-        key = LOW_KEYS[key_index]
-    elif note < 72:
-        key = MID_KEYS[key_index]
+def map_note_to_key(note: int, keymap: Keymap | None = None) -> tuple[list[str], str]:
+    """Map MIDI note number to (modifiers, key) via the keymap's precompiled table (default profile:
+    row by threshold <60 low, 60–71 mid, 72+ high; pitch = note % 12; notes clamped to 0–95)."""
+    mask, key = (keymap or DEFAULT_KEYMAP).lookup(note)
+    return (mask_to_mods(mask), key)
+
+
+def _unmuted(stream: NoteStream, muted_track: bool, channels: frozenset[int]) -> NoteStream:
+    """One track's stream with a selection applied: tempo changes only if the track is muted, no muted channels."""
+    for item in stream:
+        if item[1] == TEMPO or (not muted_track and item[1] not in channels):
+            yield item
+
+
+def _mido_note_stream(path: str, selection: TrackSelection | None = None) -> tuple[int, NoteStream]:
+    mid = mido.MidiFile(path)
+    streams = [mido_track_notes(t) for t in mid.tracks]
+    if selection:
+        muted, channels = selection.muted_tracks, selection.muted_channels
+        streams = [_unmuted(stream, i in muted, channels) for i, stream in enumerate(streams)]
+    return mid.ticks_per_beat, heapq.merge(*streams, key=itemgetter(0))
+
+
+def _native_with_fallback(stream: NoteStream, path: str, selection: TrackSelection | None = None) -> NoteStream:
+    """Pass through the native stream; if it hits data it cannot decode, continue from mido where it stopped."""
+    n = 0
+    try:
+        for item in stream:
+            yield item
+            n += 1
+    except ValueError as e:
+        log.info("Native MIDI decoder stopped (%s); falling back to mido for %s", e, path)
+        _, fallback = _mido_note_stream(path, selection)
+        yield from islice(fallback, n, None)
+
+
+def open_note_stream(path: str, selection: TrackSelection | None = None) -> tuple[int, NoteStream]:
+    """Return (ticks_per_beat, note-on/tempo stream merged across tracks in tick order).
+    Decoded with the built-in SMF reader (no mido Message objects); mido is used for files it rejects.
+    With a selection, muted tracks only contribute tempo changes and muted channels are dropped while decoding.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        smf = read_smf(data)
+    except ValueError as e:
+        log.info("Native MIDI decoder rejected %s (%s); using mido", path, e)
+        return _mido_note_stream(path, selection)
+    if selection:
+        stream = smf.iter_merged(selection.muted_tracks, selection.channel_mask)
     else:
-        key = HIGH_KEYS[key_index]
-    return (mods, key)
+        stream = smf.iter_merged()
+    return smf.ticks_per_beat, _native_with_fallback(stream, path, selection)
+
+
+def decode_notes(path: str, selection: TrackSelection | None = None) -> tuple[TempoMap, array, array]:
+    """Decode every note-on into parallel (ticks, notes) arrays in time order, plus the file's tempo map."""
+    ticks_per_beat, stream = open_note_stream(path, selection)
+    tempo_map = TempoMap(ticks_per_beat)
+    ticks = array('q')
+    notes = array('B')
+    for tick, channel, note, _velocity in stream:
+        if channel == TEMPO:
+            tempo_map.add(tick, note)
+        else:
+            ticks.append(tick)
+            notes.append(note)
+    return tempo_map, ticks, notes
+
+
+def load_notes(
+    path: str,
+    cache: EventCache | None = None,
+    selection: TrackSelection | None = None,
+) -> tuple[array, array]:
+    """Return (times_ms, notes) for every note-on: absolute ms ('d') and raw note numbers ('B').
+    With a cache, a file whose content was decoded before (with the same selection) is not parsed again.
+    """
+    key = None
+    if cache is not None:
+        key = cache.key_for_file(path, selection.cache_variant() if selection else '')
+        hit = cache.load(key)
+        if hit is not None:
+            return hit
+    t0 = time.perf_counter()
+    tempo_map, ticks, notes = decode_notes(path, selection)
+    times = tempo_map.to_ms_many(ticks)
+    if cache is not None:
+        cache.store(key, times, notes, (time.perf_counter() - t0) * 1000)
+    return times, notes
+
+
+def iter_note_times(path: str, selection: TrackSelection | None = None) -> Iterator[tuple[float, int]]:
+    """Lazily yield (time_ms, note) per note-on in time order, before tempo multiplier, transpose or keymap.
+    Tracks are decoded and merged on the fly (same order as mido.merge_tracks) instead of building a merged list.
+    """
+    ticks_per_beat, stream = open_note_stream(path, selection)
+    # Tempo changes arrive in tick order, so the map is complete up to every note that follows
+    tempo_map = TempoMap(ticks_per_beat)
+    to_ms = tempo_map.to_ms
+    for time_ticks, channel, note, _velocity in stream:
+        if channel == TEMPO:
+            tempo_map.add(time_ticks, note)
+        else:
+            yield (to_ms(time_ticks), note)
+
+
+def map_note_times(
+    notes: Iterable[tuple[float, int]],
+    tempo_multiplier: float = 1.0,
+    transpose: int = 0,
+    keymap: Keymap | None = None,
+) -> Iterator[tuple[int, int, int]]:
+    """Turn (time_ms, note) pairs into (time_ms, modifier_mask, key_code) events."""
+    keymap = keymap or DEFAULT_KEYMAP
+    masks, codes = keymap.masks, keymap.codes
+    top = NOTE_COUNT - 1
+    for ms, note in notes:
+        note += transpose
+        note = 0 if note < 0 else (top if note > top else note)
+        yield (int(ms * tempo_multiplier), masks[note], codes[note])
+
+
+def iter_raw_events(
+    path: str,
+    tempo_multiplier: float = 1.0,
+    transpose: int = 0,
+    keymap: Keymap | None = None,
+    selection: TrackSelection | None = None,
+) -> Iterator[tuple[int, int, int]]:
+    """Lazily yield (time_ms, modifier_mask, key_code) per note in time order (see iter_note_times)."""
+    return map_note_times(iter_note_times(path, selection), tempo_multiplier, transpose, keymap)
+
+
+def iter_events(
+    path: str,
+    tempo_multiplier: float = 1.0,
+    transpose: int = 0,
+    keymap: Keymap | None = None,
+) -> Iterator[Event]:
+    """Lazily yield (time_ms, modifiers, key) per note; see iter_raw_events."""
+    for time_ms, mask, code in iter_raw_events(path, tempo_multiplier, transpose, keymap):
+        yield (time_ms, mask_to_mods(mask), chr(code))
+
+
+def load_song(path: str, cache: EventCache | None = None, selection: TrackSelection | None = None) -> Song:
+    """Parse a MIDI file once into canonical form (see Song); cached when a cache is given."""
+    return Song(*load_notes(path, cache, selection))
+
+
+def compile_midi(
+    path: str,
+    tempo_multiplier: float = 1.0,
+    transpose: int = 0,
+    keymap: Keymap | None = None,
+    cache: EventCache | None = None,
+    selection: TrackSelection | None = None,
+) -> EventTable:
+    """Parse MIDI file into an EventTable (parallel time/key/modifier arrays) using keymap (default profile).
+    selection leaves muted tracks and channels out."""
+    return load_song(path, cache, selection).compile(tempo_multiplier, transpose, keymap)
 
 
 def parse_midi(
     path: str,
     tempo_multiplier: float = 1.0,
     transpose: int = 0,
-) -> list[tuple[int, list[str], str]]:
-    """Parse MIDI file into events: (time_ms, modifiers, key)."""
-    mid = mido.MidiFile(path)
-    ticks_per_beat = mid.ticks_per_beat
-    tempo = 500_000  # default
-    time_ticks = 0
-    events: list[tuple[int, list[str], str]] = []
-    for msg in mido.merge_tracks(mid.tracks):
-        time_ticks += msg.time
-        if msg.type == 'set_tempo':
-            tempo = msg.tempo
-        if msg.type == 'note_on' and getattr(msg, 'velocity', 0) > 0:
-            time_ms = int(mido.tick2second(time_ticks, ticks_per_beat, tempo) * 1000)
-            time_ms = int(time_ms * tempo_multiplier)
-            note = _clamp_note(msg.note + transpose)
-            mods, key = map_note_to_key(note)
-            events.append((time_ms, mods, key))
-    return events
-
-
-def build_mcr_lines(events: list[tuple[int, list[str], str]]) -> list[str]:
-    """Build .mcr command lines from events. Chords: no delay between key down/up.
-    A 2ms delay is inserted after modifier KeyDown so the game registers the modifier before the key.
+    keymap: Keymap | None = None,
+) -> list[Event]:
+    """Parse MIDI file into events: (time_ms, modifiers, key). Use compile_midi for the compact table."""
+    return compile_midi(path, tempo_multiplier, transpose, keymap).to_list()
+
+
+# Pause after modifier KeyDown so the game registers the modifier before the key
+MODIFIER_DELAY_MS = 2
+
+# Write buffer for .mcr export
+MCR_BUFFER_SIZE = 1 << 16
+
+
+# .mcr names of the modifier keys
+_MCR_MODIFIER_KEYS = {MOD_SHIFT: 'ShiftLeft', MOD_CTRL: 'ControlLeft'}
+
+
+def _mcr_key_block(code: int) -> str:
+    key = chr(code)
+    return f'Keyboard : {key} : KeyDown\nKeyboard : {key} : KeyUp\n'
+
+
+def _mcr_modifier_block(release: int, press: int) -> str:
+    """Lines releasing then pressing modifier masks; a short DELAY after a press lets the game register it."""
+    lines = [f'Keyboard : {_MCR_MODIFIER_KEYS[f]} : KeyUp\n' for f in reversed(modifier_flags(release))]
+    lines += [f'Keyboard : {_MCR_MODIFIER_KEYS[f]} : KeyDown\n' for f in modifier_flags(press)]
+    if press:
+        lines.append(f'DELAY : {MODIFIER_DELAY_MS}\n')
+    return ''.join(lines)
+
+
+def iter_mcr_text(
+    events: EventTable | list[Event] | Iterable[tuple[int, int, int]],
+    report: DedupeReport | None = None,
+    modifiers: ModifierState | None = None,
+) -> Iterator[str]:
+    """Yield .mcr text one chord frame at a time (each chunk ends with a newline).
+    Accepts an EventTable, a legacy event list or a (time_ms, mask, key_code) stream such as iter_raw_events.
+    Notes sharing a time form one frame: a single DELAY before it (none when zero), no delay between notes,
+    and repeated keys written once (see dedupe.dedupe_frame; counted in report if given).
+    Shift/Ctrl are pressed and released only when the next note needs a different modifier (held across
+    notes, but not over rests longer than MODIFIER_HOLD_MS); pass modifiers to count the presses.
     """
-    lines: list[str] = []
+    if isinstance(events, (EventTable, list)):
+        events = EventTable.coerce(events).iter_raw()
+    if modifiers is None:
+        modifiers = ModifierState()
+    keys: dict[int, str] = {}
+    changes: dict[tuple[int, int], str] = {}
     prev_time = 0
-    MODIFIER_DELAY_MS = 2
-    for time_ms, mods, key in events:
+    for time_ms, frame in iter_frames(events):
+        parts = []
         delay = time_ms - prev_time
-        if delay < 0:
-            delay = 0
-        lines.append(f'DELAY : {delay}')
-        # Modifiers down
-        for m in mods:
-            if m == 'SHIFT':
-                lines.append('Keyboard : ShiftLeft : KeyDown')
-            elif m == 'CTRL':
-                lines.append('Keyboard : ControlLeft : KeyDown')
-        if mods:
-            lines.append(f'DELAY : {MODIFIER_DELAY_MS}')
-        # Key down/up (chord: no delay between)
-        lines.append(f'Keyboard : {key} : KeyDown')
-        lines.append(f'Keyboard : {key} : KeyUp')
-        for m in reversed(mods):
-            if m == 'SHIFT':
-                lines.append('Keyboard : ShiftLeft : KeyUp')
-            elif m == 'CTRL':
-                lines.append('Keyboard : ControlLeft : KeyUp')
+        if modifiers.held and delay > MODIFIER_HOLD_MS:
+            parts.append(_mcr_modifier_block(modifiers.release_all(), 0))
+        if delay > 0:
+            parts.append(f'DELAY : {delay}\n')
+        for mask, code in modifiers.order(dedupe_frame(frame, report)):
+            change = modifiers.change(mask)
+            if change != (0, 0):
+                block = changes.get(change)
+                if block is None:
+                    block = changes[change] = _mcr_modifier_block(*change)
+                parts.append(block)
+            block = keys.get(code)
+            if block is None:
+                block = keys[code] = _mcr_key_block(code)
+            parts.append(block)
         prev_time = time_ms
-    return lines
+        yield ''.join(parts)
+    if modifiers.held:
+        yield _mcr_modifier_block(modifiers.release_all(), 0)
 
 
-def export_mcr(path: str, events: list[tuple[int, list[str], str]]) -> None:
-    """Write events to a .mcr file."""
-    lines = build_mcr_lines(events)
-    with open(path, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(lines) + '\n')
+def build_mcr_lines(events: EventTable | list[Event]) -> list[str]:
+    """Build .mcr command lines from events (EventTable or (time_ms, modifiers, key) list).
+    Notes sharing a time form one chord frame: a single DELAY before it (none when zero), no delay between notes.
+    A 2ms delay is inserted after modifier KeyDown so the game registers the modifier before the key;
+    modifiers stay down across notes that use them (see iter_mcr_text).
+    """
+    return ''.join(iter_mcr_text(events)).splitlines()
+
+
+def write_mcr(
+    f: TextIO,
+    events: EventTable | list[Event] | Iterable[tuple[int, int, int]],
+    report: DedupeReport | None = None,
+    modifiers: ModifierState | None = None,
+) -> None:
+    """Stream events as .mcr text to an open text file, one chord frame at a time."""
+    f.writelines(iter_mcr_text(events, report, modifiers))
+
+
+def export_mcr(path: str, events: EventTable | list[Event] | Iterable[tuple[int, int, int]]) -> None:
+    """Write events (EventTable, list or raw event stream) to a .mcr file through a buffered writer,
+    without building the whole text in memory."""
+    report = DedupeReport()
+    modifiers = ModifierState()
+    with open(path, 'w', encoding='utf-8', buffering=MCR_BUFFER_SIZE) as f:
+        write_mcr(f, events, report, modifiers)
+    report.log(path)
+    modifiers.log(path)
+
+
+def convert_midi_to_mcr(
+    midi_path: str,
+    mcr_path: str,
+    tempo_multiplier: float = 1.0,
+    transpose: int = 0,
+    keymap: Keymap | None = None,
+    cache: EventCache | None = None,
+) -> int:
+    """Parse a MIDI file with the given keymap and write it as .mcr. Returns the number of events."""
+    table = compile_midi(midi_path, tempo_multiplier, transpose, keymap, cache)
+    export_mcr(mcr_path, table)
+    return len(table)
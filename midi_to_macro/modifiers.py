@@ -0,0 +1,89 @@
+"""Modifier (Shift/Ctrl) state carried across notes, so a modifier is pressed or released only when it changes."""
+
+import logging
+
+from midi_to_macro.events import MOD_CTRL, MOD_SHIFT, EventTable, iter_frames
+
+log = logging.getLogger("midi_to_macro.modifiers")
+
+# Press order of modifier flags (released in reverse)
+MODIFIER_FLAGS = (MOD_SHIFT, MOD_CTRL)
+
+# A modifier is not held over a rest longer than this (released before the wait)
+MODIFIER_HOLD_MS = 500
+
+
+def modifier_flags(mask: int) -> list[int]:
+    """Modifier flags set in mask, in press order."""
+    return [f for f in MODIFIER_FLAGS if mask & f]
+
+
+class ModifierState:
+    """Modifiers currently held by playback or export.
+
+    Each note calls change(mask) before its key: only the difference to what is held is released or pressed,
+    so a run of Shift notes holds Shift once instead of wrapping every note. Chords are ordered with the group
+    that matches the held modifiers first (see order), so the order of a chord depends on the note before it.
+    presses counts modifier KeyDowns actually sent, naive what wrapping every note would have sent, and
+    reordered the chords sent in a different order than the song has them.
+    """
+
+    __slots__ = ('held', 'presses', 'naive', 'reordered')
+
+    def __init__(self):
+        self.held = 0
+        self.presses = 0
+        self.naive = 0
+        self.reordered = 0
+
+    def order(self, frame: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """Chord frame of (mask, key_code) grouped by modifiers: held group first, then plain, Shift, Ctrl."""
+        if len(frame) == 1:
+            return frame
+        held = self.held
+        ordered = sorted(frame, key=lambda note: (note[0] != held, note[0]))
+        if ordered != frame:
+            self.reordered += 1
+        return ordered
+
+    def change(self, mask: int) -> tuple[int, int]:
+        """Switch to mask for the next note; returns (flags to release, flags to press) as masks."""
+        held = self.held
+        self.naive += len(modifier_flags(mask))
+        if mask == held:
+            return 0, 0
+        release = held & ~mask
+        press = mask & ~held
+        self.held = mask
+        self.presses += len(modifier_flags(press))
+        return release, press
+
+    def release_all(self) -> int:
+        """Forget held modifiers; returns the mask to release."""
+        held = self.held
+        self.held = 0
+        return held
+
+    def __str__(self) -> str:
+        return f'{self.presses} modifier presses instead of {self.naive}, {self.reordered} chords reordered'
+
+    def log(self, name: str) -> None:
+        if self.naive > self.presses or self.reordered:
+            log.info("%s: %s", name, self)
+
+
+def group_modifiers(table: EventTable) -> EventTable:
+    """Table with every chord frame in the order playback and export send it (see ModifierState.order).
+    Frames should already be deduped (dedupe.dedupe)."""
+    state = ModifierState()
+    out = EventTable()
+    append = out.append
+    prev_ms = 0
+    for time_ms, frame in iter_frames(table.iter_raw()):
+        if state.held and time_ms - prev_ms > MODIFIER_HOLD_MS:
+            state.release_all()
+        for mask, code in state.order(frame):
+            state.change(mask)
+            append(time_ms, mask, code)
+        prev_ms = time_ms
+    return out
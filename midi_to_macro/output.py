@@ -0,0 +1,117 @@
+"""Where playback sends key presses: the real keyboard (pynput), nowhere (benchmarks) or a recording (tests)."""
+
+import time
+from typing import Iterable
+
+try:
+    from pynput.keyboard import Controller, Key
+    KEYBOARD_AVAILABLE = True
+except ImportError:
+    Controller = None
+    Key = None
+    KEYBOARD_AVAILABLE = False
+
+# Modifier key names; other keys are lowercase characters
+SHIFT = 'shift'
+CTRL = 'ctrl'
+
+KeyOp = tuple[bool, str]  # (is_press, key)
+
+
+class KeyOutput:
+    """Receives key operations from playback. Subclasses implement press/release; send may batch them."""
+
+    name = ''
+
+    def press(self, key: str) -> None:
+        raise NotImplementedError
+
+    def release(self, key: str) -> None:
+        raise NotImplementedError
+
+    def send(self, ops: Iterable[KeyOp]) -> None:
+        """Perform (is_press, key) operations in order."""
+        press, release = self.press, self.release
+        for is_press, key in ops:
+            if is_press:
+                press(key)
+            else:
+                release(key)
+
+    def close(self) -> None:
+        """Release anything the output holds (called when playback ends)."""
+
+
+class PynputOutput(KeyOutput):
+    """Real key presses through pynput."""
+
+    name = 'pynput'
+
+    def __init__(self):
+        if not KEYBOARD_AVAILABLE:
+            raise RuntimeError('pynput not available')
+        self._ctrl = Controller()
+        self._keys = {SHIFT: Key.shift, CTRL: Key.ctrl}
+
+    def press(self, key: str) -> None:
+        self._ctrl.press(self._keys.get(key, key))
+
+    def release(self, key: str) -> None:
+        self._ctrl.release(self._keys.get(key, key))
+
+    def send(self, ops: Iterable[KeyOp]) -> None:
+        press, release, keys = self._ctrl.press, self._ctrl.release, self._keys
+        for is_press, key in ops:
+            if is_press:
+                press(keys.get(key, key))
+            else:
+                release(keys.get(key, key))
+
+
+class NullOutput(KeyOutput):
+    """Discards every key (scheduler benchmarks without touching the keyboard)."""
+
+    name = 'null'
+
+    def press(self, key: str) -> None:
+        pass
+
+    def release(self, key: str) -> None:
+        pass
+
+    def send(self, ops: Iterable[KeyOp]) -> None:
+        pass
+
+
+class RecordingOutput(KeyOutput):
+    """Keeps (perf_counter_ns, is_press, key) for every operation."""
+
+    name = 'record'
+
+    def __init__(self):
+        self.ops: list[tuple[int, bool, str]] = []
+
+    def press(self, key: str) -> None:
+        self.ops.append((time.perf_counter_ns(), True, key))
+
+    def release(self, key: str) -> None:
+        self.ops.append((time.perf_counter_ns(), False, key))
+
+    def send(self, ops: Iterable[KeyOp]) -> None:
+        now = time.perf_counter_ns()
+        self.ops.extend((now, is_press, key) for is_press, key in ops)
+
+    def presses(self) -> list[str]:
+        """Keys pressed, in order (modifiers included)."""
+        return [key for _, is_press, key in self.ops if is_press]
+
+
+OUTPUTS: dict[str, type[KeyOutput]] = {cls.name: cls for cls in (PynputOutput, NullOutput, RecordingOutput)}
+
+
+def create_output(name: str = PynputOutput.name) -> KeyOutput:
+    """Output by name ('pynput', 'null' or 'record'). Raises ValueError for an unknown name."""
+    cls = OUTPUTS.get(name)
+    if cls is None:
+        raise ValueError(f'Unknown key output {name!r} (choose from {", ".join(OUTPUTS)})')
+    return cls()
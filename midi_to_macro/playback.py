@@ -1,62 +1,252 @@
-"""Play back events as keyboard input using pynput."""
+"""Play back events as keyboard input (pynput by default, see output)."""
 
 import time
-from typing import Callable
+from array import array
+from collections import deque
+from itertools import islice
+from typing import Callable, Iterable
 
-try:
-    from pynput.keyboard import Controller, Key
-    KEYBOARD_AVAILABLE = True
-except ImportError:
-    Controller = None
-    Key = None
-    KEYBOARD_AVAILABLE = False
+from midi_to_macro import mcr
+from midi_to_macro.budget import KeyBudget, apply_budget
+from midi_to_macro.compiled import COMPILED_SUFFIX, load_compiled
+from midi_to_macro.dedupe import DedupeReport, dedupe_frame
+from midi_to_macro.event_cache import EventCache, NoteCollector
+from midi_to_macro.events import MOD_CTRL, MOD_SHIFT, Event, EventTable, iter_frames
+from midi_to_macro.keymap import Keymap
+from midi_to_macro.modifiers import MODIFIER_HOLD_MS, ModifierState, modifier_flags
+from midi_to_macro.output import CTRL, KEYBOARD_AVAILABLE, SHIFT, KeyOp, KeyOutput, PynputOutput
+from midi_to_macro.scheduler import Scheduler
+from midi_to_macro.session import PAUSE_POLL_S, PlaybackSession
+from midi_to_macro.telemetry import TimingLog
+from midi_to_macro.song import Song
+from midi_to_macro.track_index import TrackSelection
 
-# Map key letter to pynput Key or char
+# Map key letter to the character sent
 KEY_MAP = {
     'Q': 'q', 'W': 'w', 'E': 'e', 'R': 'r', 'T': 't', 'Y': 'y', 'U': 'u',
     'A': 'a', 'S': 's', 'D': 'd', 'F': 'f', 'G': 'g', 'H': 'h', 'J': 'j',
     'Z': 'z', 'X': 'x', 'C': 'c', 'V': 'v', 'B': 'b', 'N': 'n', 'M': 'm',
 }
 
+# Chord frames decoded ahead of the one playing (streamed playback)
+LOOKAHEAD = 64
+
+
+def _key_char(code: int) -> str:
+    key = chr(code)
+    return KEY_MAP.get(key, key.lower())
+
+
+# Output key name per modifier flag
+_MODIFIER_KEYS = {MOD_SHIFT: SHIFT, MOD_CTRL: CTRL}
+
+
+def _key_ops(code: int) -> tuple[KeyOp, ...]:
+    char = _key_char(code)
+    return ((True, char), (False, char))
+
+
+def _modifier_ops(release: int, press: int) -> tuple[KeyOp, ...]:
+    """(is_press, key) operations releasing then pressing modifier masks (see ModifierState.change)."""
+    ops = [(False, _MODIFIER_KEYS[f]) for f in reversed(modifier_flags(release))]
+    ops += [(True, _MODIFIER_KEYS[f]) for f in modifier_flags(press)]
+    return tuple(ops)
+
+
+def _scale_times(events: Iterable[tuple[int, int, int]], tempo_multiplier: float) -> Iterable[tuple[int, int, int]]:
+    if tempo_multiplier == 1.0:
+        return events
+    return ((int(t * tempo_multiplier), mask, code) for t, mask, code in events)
+
 
 def run_playback(
-    events: list[tuple[int, list[str], str]],
+    events: EventTable | list[Event],
     is_playing: Callable[[], bool],
     progress_callback: Callable[[int, int], None] | None = None,
-) -> None:
-    """Run playback: sleep to time_ms then press modifiers + key. progress_callback(current_index, total)."""
-    if not KEYBOARD_AVAILABLE:
-        raise RuntimeError('pynput not available')
-    ctrl = Controller()
-    total = len(events)
-    t0 = time.perf_counter()
+    scheduler: Scheduler | None = None,
+    timing: TimingLog | None = None,
+    output: KeyOutput | None = None,
+    session: PlaybackSession | None = None,
+) -> bool:
+    """Run playback: wait until time_ms then press modifiers + key. progress_callback(current_index, total).
+    events may be an EventTable or a list of (time_ms, modifiers, key) tuples.
+    session (optional) pauses, resumes and seeks while playing.
+    Returns True if every event was played, False if stopped.
+    """
+    table = EventTable.coerce(events)
+    return run_playback_stream(
+        table.iter_raw(), is_playing, progress_callback, total=len(table), scheduler=scheduler, timing=timing,
+        output=output, session=session, table=table,
+    )
+
+
+def run_playback_stream(
+    events: Iterable[tuple[int, int, int]],
+    is_playing: Callable[[], bool],
+    progress_callback: Callable[[int, int], None] | None = None,
+    total: int = 0,
+    lookahead: int = LOOKAHEAD,
+    scheduler: Scheduler | None = None,
+    timing: TimingLog | None = None,
+    output: KeyOutput | None = None,
+    session: PlaybackSession | None = None,
+    table: EventTable | None = None,
+    load_table: Callable[[], EventTable] | None = None,
+) -> bool:
+    """Play (time_ms, modifier_mask, key_code) events as they are produced (e.g. midi.iter_raw_events), one chord
+    frame at a time. progress_callback(events_done, total) gets total=0 while the length is unknown. session pauses,
+    seeks (in table, or in load_table() built on the first seek) and changes tempo. Returns False if stopped.
+    """
+    own_output = output is None
+    if own_output:
+        output = PynputOutput()  # the real keyboard
+    send = output.send
+    ops_by_key: dict[int, tuple] = {}
+    ops_by_change: dict[tuple[int, int], tuple] = {}
+    modifiers = ModifierState()
+    dedupe_report = DedupeReport()
+    # Only `lookahead` frames are decoded ahead of the one playing, so the first key does not wait for the whole file
+    source = iter_frames(events)
+    buf = deque(islice(source, lookahead))
+    if scheduler is None:
+        scheduler = Scheduler()
+    wait_frame = scheduler.wait_frame
+    if timing is not None:
+        # Deadline and send time of every key press; the lateness summary is logged when playback ends
+        timing.reset()
+        record = timing.record
+        clock = time.perf_counter_ns
+    wake = None
+    prev_interrupt = scheduler.interrupt
+    if session is not None:
+        # Every wait (including the spin) returns as soon as the session has a request, so stop() takes about a ms
+        wake = scheduler.interrupt = session.wake
+        playing = is_playing
+        is_playing = lambda: session.is_playing() and playing()
+    i = 0
     prev_ms = 0
-    for i, (time_ms, mods, key) in enumerate(events):
-        if not is_playing():
-            return
-        if progress_callback:
-            progress_callback(i, total)
-        # Wait until this event's time
-        elapsed_ms = (time.perf_counter() - t0) * 1000
-        wait_ms = time_ms - elapsed_ms
-        if wait_ms > 0:
-            time.sleep(wait_ms / 1000.0)
-        # Press modifiers + key (chord: no delay)
-        shift_down = 'SHIFT' in mods
-        ctrl_down = 'CTRL' in mods
-        if shift_down:
-            ctrl.press(Key.shift)
-        if ctrl_down:
-            ctrl.press(Key.ctrl)
-        char = KEY_MAP.get(key, key.lower())
-        ctrl.press(char)
-        ctrl.release(char)
-        if ctrl_down:
-            ctrl.release(Key.ctrl)
-        if shift_down:
-            ctrl.release(Key.shift)
+    scheduler.start()
+    try:
+        while buf:
+            if wake is not None and wake.is_set():
+                # A request on the session (stop, pause, resume or seek): act on it before the next frame
+                wake.clear()
+                if not is_playing():
+                    return False
+                if session.pending and modifiers.held:
+                    send(_modifier_ops(modifiers.release_all(), 0))
+                if session.paused:
+                    paused_at_ms = scheduler.position_ms()
+                    while session.paused and is_playing():
+                        wake.wait(PAUSE_POLL_S)
+                        wake.clear()
+                    if not is_playing():
+                        return False
+                    scheduler.rebase(paused_at_ms)
+                # Tempo change: the interrupted frame is waited for again on the new time warp
+                rate = session.take_rate()
+                if rate is not None:
+                    scheduler.set_rate(rate)
+                if table is None and load_table is not None and session.seeking:
+                    # First seek on a streamed song: build the whole table once
+                    table = load_table()
+                    total = len(table)
+                seek = session.take_seek(table)
+                if seek is not None:
+                    i, prev_ms = seek
+                    source = iter_frames(table.iter_raw(i))
+                    buf = deque(islice(source, lookahead))
+                    scheduler.rebase(prev_ms)
+                    if progress_callback:
+                        progress_callback(i, total)
+                    continue
+            time_ms, frame = buf.popleft()
+            if not is_playing():
+                return False
+            if progress_callback:
+                progress_callback(i, total)
+            # Top up the lookahead before waiting so decoding overlaps the gap before this frame
+            buf.extend(islice(source, lookahead - len(buf)))
+            if modifiers.held and time_ms - prev_ms > MODIFIER_HOLD_MS:
+                # Nothing stays held through a long rest
+                send(_modifier_ops(modifiers.release_all(), 0))
+            # One wake-up per chord frame (a frame the catch-up policy skips is counted as played)
+            if not wait_frame(time_ms, len(frame)):
+                if wake is not None and wake.is_set():
+                    # Interrupted by the session: handle the request, then wait for this frame again
+                    buf.appendleft((time_ms, frame))
+                    continue
+                i += len(frame)
+                prev_ms = time_ms
+                continue
+            if timing is not None:
+                scheduled_ns = int(scheduler.warp.clock_at(time_ms) * 1_000_000)
+            # Repeated keys are dropped; Shift/Ctrl are only pressed or released when a note needs a different mask
+            for mask, code in modifiers.order(dedupe_frame(frame, dedupe_report)):
+                note_ops = ops_by_key.get(code)
+                if note_ops is None:
+                    note_ops = ops_by_key[code] = _key_ops(code)
+                change = modifiers.change(mask)
+                if change != (0, 0):
+                    change_ops = ops_by_change.get(change)
+                    if change_ops is None:
+                        change_ops = ops_by_change[change] = _modifier_ops(*change)
+                    note_ops = change_ops + note_ops
+                if timing is not None:
+                    record(scheduled_ns, clock() - scheduler.t0_ns)
+                send(note_ops)
+            i += len(frame)
+            prev_ms = time_ms
+    finally:
+        scheduler.interrupt = prev_interrupt
+        if modifiers.held:
+            send(_modifier_ops(modifiers.release_all(), 0))
+        if own_output:
+            output.close()
+        scheduler.catch_up.log('Playback')
+        if timing is not None:
+            timing.log_summary('Playback')
+    dedupe_report.log('Playback')
+    modifiers.log('Playback')
     if progress_callback:
-        progress_callback(total, total)
+        progress_callback(i, i)
+    return True
+
+
+def _scaled_copy(table: EventTable, tempo_multiplier: float) -> EventTable:
+    """Copy of table (e.g. a memory-mapped one) with its times scaled by tempo_multiplier."""
+    times = table.times
+    if tempo_multiplier != 1.0:
+        times = (int(t * tempo_multiplier) for t in times)
+    return EventTable(array('i', times), array('B', table.keys), array('B', table.mods))
+
+
+def load_events(
+    path: str,
+    tempo_multiplier: float,
+    transpose: int,
+    keymap: Keymap | None = None,
+    cache: EventCache | None = None,
+    budget: KeyBudget | None = None,
+    selection: TrackSelection | None = None,
+) -> EventTable:
+    """The whole song as an EventTable, prepared as run_playback_from_file would play it (for playback
+    elsewhere, e.g. playback_worker). .mcr and .mcrc files keep their keys; tempo_multiplier applies."""
+    from midi_to_macro import midi
+    if path.lower().endswith(COMPILED_SUFFIX):
+        # Copied out of the mapping, which is closed on return
+        with load_compiled(path) as song:
+            return _scaled_copy(song.table, tempo_multiplier)
+    if path.lower().endswith('.mcr'):
+        table = EventTable()
+        for event in _scale_times(mcr.iter_mcr_file(path), tempo_multiplier):
+            table.append(*event)
+        return table
+    song = midi.load_song(path, cache, selection)
+    table = song.compile(tempo_multiplier, transpose, keymap)
+    if budget is not None:
+        table, _ = apply_budget(table, budget, song.notes)
+    return table
 
 
 def run_playback_from_file(
@@ -66,19 +256,89 @@ def run_playback_from_file(
     is_playing: Callable[[], bool],
     progress_callback: Callable[[int, int], None] | None = None,
     done_callback: Callable[[bool], None] | None = None,
+    keymap: Keymap | None = None,
+    cache: EventCache | None = None,
+    budget: KeyBudget | None = None,
+    selection: TrackSelection | None = None,
+    scheduler: Scheduler | None = None,
+    timing: TimingLog | None = None,
+    output: KeyOutput | None = None,
+    session: PlaybackSession | None = None,
 ) -> None:
     """
-    Parse MIDI file and run playback in the current thread.
+    Play a MIDI file in the current thread (notes mapped with keymap, default profile if None;
+    tracks and channels muted in selection are left out).
+    A .mcr macro or compiled song (.mcrc, memory-mapped) plays as recorded: tempo_multiplier applies,
+    transpose and keymap do not.
+    With a budget, a MIDI file is compiled whole and thinned to the keystroke budget before playback.
+    With a cache hit the decoded notes are loaded instead of parsed; otherwise events are streamed into
+    playback (parsing runs ahead by a small lookahead) and the decoded notes are stored when playback ends.
+    timing (optional) records key lateness and output replaces the keyboard, see run_playback_stream.
+    session (optional) pauses, resumes and seeks. Streamed songs still start at once: the whole song is
+    built as an EventTable only when the first seek is requested (compiled songs at their own tempo seek in
+    the mapped table itself).
     done_callback(finished_naturally) is called when playback ends (True if completed, False if stopped).
     """
     from midi_to_macro import midi
     finished_naturally = False
+    collector = None
+    key = None
     try:
-        events = midi.parse_midi(path, tempo_multiplier=tempo_multiplier, transpose=transpose)
-        if progress_callback:
-            progress_callback(0, len(events))
-        run_playback(events, is_playing, progress_callback=progress_callback)
-        finished_naturally = True
+        if path.lower().endswith(COMPILED_SUFFIX):
+            with load_compiled(path) as song:
+                if tempo_multiplier == 1.0:
+                    finished_naturally = run_playback(
+                        song.table, is_playing, progress_callback=progress_callback, scheduler=scheduler,
+                        timing=timing, output=output, session=session,
+                    )
+                    return
+                finished_naturally = run_playback_stream(
+                    _scale_times(song.table.iter_raw(), tempo_multiplier), is_playing,
+                    progress_callback=progress_callback, total=len(song), scheduler=scheduler, timing=timing,
+                    output=output, session=session, load_table=lambda: _scaled_copy(song.table, tempo_multiplier),
+                )
+            return
+        if path.lower().endswith('.mcr'):
+            events = _scale_times(mcr.iter_mcr_file(path), tempo_multiplier)
+            finished_naturally = run_playback_stream(
+                events, is_playing, progress_callback=progress_callback, scheduler=scheduler, timing=timing,
+                output=output, session=session, load_table=lambda: load_events(path, tempo_multiplier, transpose),
+            )
+            return
+        if budget is not None:
+            song = midi.load_song(path, cache, selection)
+            table, _ = apply_budget(song.compile(tempo_multiplier, transpose, keymap), budget, song.notes)
+            finished_naturally = run_playback(
+                table, is_playing, progress_callback=progress_callback, scheduler=scheduler, timing=timing,
+                output=output, session=session,
+            )
+            return
+        if cache is not None:
+            key = cache.key_for_file(path, selection.cache_variant() if selection else '')
+            hit = cache.load(key)
+            if hit is not None:
+                table = Song(*hit).compile(tempo_multiplier, transpose, keymap)
+                finished_naturally = run_playback(
+                    table, is_playing, progress_callback=progress_callback, scheduler=scheduler, timing=timing,
+                    output=output, session=session,
+                )
+                return
+            collector = NoteCollector(midi.iter_note_times(path, selection))
+            events = midi.map_note_times(collector, tempo_multiplier, transpose, keymap)
+            # A seek decodes the rest of the stream into the notes collected so far instead of reparsing
+            load_table = lambda: Song(*collector.finish()).compile(tempo_multiplier, transpose, keymap)
+        else:
+            events = midi.iter_raw_events(
+                path, tempo_multiplier=tempo_multiplier, transpose=transpose, keymap=keymap, selection=selection,
+            )
+            load_table = lambda: load_events(path, tempo_multiplier, transpose, keymap, selection=selection)
+        finished_naturally = run_playback_stream(
+            events, is_playing, progress_callback=progress_callback, scheduler=scheduler, timing=timing,
+            output=output, session=session, load_table=load_table,
+        )
+        # A song stopped early is not decoded to the end just to cache it (that would hold up done_callback)
+        if collector is not None and (finished_naturally or collector.complete):
+            cache.store(key, *collector.finish(), collector.decode_ms)
     except Exception:
         raise
     finally:
@@ -0,0 +1,304 @@
+"""Keystroke playback in a separate process, so key timing does not share the GIL with the GUI and network threads.
+
+The GUI process compiles the song and sends the event arrays over a pipe; the worker plays them and sends
+progress, timing and its log records back. stop/pause/resume/seek/rate are pipe messages read by a thread in the
+worker and applied to the song's PlaybackSession, which the playback loop checks before every chord frame.
+"""
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from array import array
+from typing import Callable
+
+from midi_to_macro.events import Event, EventTable
+from midi_to_macro.session import PlaybackSession
+from midi_to_macro.telemetry import TimingLog
+
+log = logging.getLogger("midi_to_macro.playback_worker")
+
+# How often run() checks is_playing while the worker plays
+POLL_INTERVAL_S = 0.01
+# Progress is sent at most this often (the final count is always sent)
+PROGRESS_INTERVAL_S = 0.02
+# How long close() waits for the process to exit before terminating it
+JOIN_TIMEOUT_S = 2.0
+
+
+class _PipeLogHandler(logging.Handler):
+    """Sends the worker's log records to the GUI process, which writes them to the app log."""
+
+    def __init__(self, send: Callable[[tuple], None]):
+        super().__init__(logging.DEBUG)
+        self._send = send
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._send(('log', record.name, record.levelno, record.getMessage()))
+        except Exception:
+            pass
+
+
+def _pack(table: EventTable) -> tuple[bytes, bytes, bytes]:
+    return table.times.tobytes(), table.keys.tobytes(), table.mods.tobytes()
+
+
+def _unpack(times: bytes, keys: bytes, mods: bytes) -> EventTable:
+    time_array = array('i')
+    time_array.frombytes(times)
+    return EventTable(time_array, array('B', keys), array('B', mods))
+
+
+class _Player:
+    """Worker side: plays one song at a time; commands from the GUI process go to the current session.
+
+    The session is opened by the command reader as soon as 'play' arrives (see open), so commands sent right
+    behind it reach the song even if the playback thread has not started it yet.
+    """
+
+    def __init__(self, send: Callable[[tuple], None]):
+        self._send = send
+        self._lock = threading.Lock()
+        self._session: PlaybackSession | None = None
+
+    def command(self, msg: tuple) -> None:
+        """Apply stop/pause/resume/seek to the song being played (reader thread); ignored between songs."""
+        kind = msg[0]
+        with self._lock:
+            session = self._session
+        if session is None:
+            return
+        if kind in ('stop', 'quit'):
+            session.stop()
+        elif kind == 'pause':
+            session.pause()
+        elif kind == 'resume':
+            session.resume()
+        elif kind == 'seek':
+            session.seek(msg[1])
+        elif kind == 'seek_fraction':
+            session.seek_fraction(msg[1])
+        elif kind == 'rate':
+            session.set_rate(msg[1])
+
+    def open(self) -> PlaybackSession:
+        """New session for the song just received; commands from now on apply to it."""
+        session = PlaybackSession()
+        with self._lock:
+            self._session = session
+        return session
+
+    def play(self, times: bytes, keys: bytes, mods: bytes, options: dict, session: PlaybackSession) -> None:
+        """Play until the song ends or is stopped; always ends with 'timing' and 'done' messages."""
+        from midi_to_macro.output import create_output
+        from midi_to_macro.playback import run_playback
+        from midi_to_macro.scheduler import BURST, CatchUp, Scheduler
+
+        table = _unpack(times, keys, mods)
+        timing = TimingLog()
+        finished = False
+        last_sent = 0.0
+
+        def progress(done: int, total: int) -> None:
+            nonlocal last_sent
+            now = time.monotonic()
+            if done >= total or now - last_sent >= PROGRESS_INTERVAL_S:
+                last_sent = now
+                self._send(('progress', done, total))
+
+        try:
+            output = create_output(options.get('output', 'pynput'))
+            try:
+                finished = run_playback(
+                    table, session.is_playing, progress,
+                    scheduler=Scheduler(catch_up=CatchUp(options.get('catch_up', BURST))),
+                    timing=timing, output=output, session=session,
+                )
+            finally:
+                output.close()
+        except Exception as e:
+            log.exception("Playback failed in worker")
+            self._send(('error', f'{type(e).__name__}: {e}'))
+        finally:
+            with self._lock:
+                if self._session is session:
+                    self._session = None
+            self._send(('timing', [(s, a) for s, a, _ in timing.rows()]))
+            self._send(('done', finished))
+
+
+def _worker_main(conn) -> None:
+    """Worker process entry point: play songs received on conn until 'quit' or the pipe closes."""
+    send_lock = threading.Lock()
+
+    def send(msg: tuple) -> None:
+        with send_lock:
+            conn.send(msg)
+
+    root = logging.getLogger("midi_to_macro")
+    root.setLevel(logging.DEBUG)
+    root.handlers[:] = [_PipeLogHandler(send)]
+    root.propagate = False
+
+    player = _Player(send)
+    songs: queue.Queue = queue.Queue()
+
+    def read_commands() -> None:
+        try:
+            while True:
+                msg = conn.recv()
+                if msg[0] == 'play':
+                    songs.put((*msg, player.open()))
+                else:
+                    player.command(msg)
+                    if msg[0] == 'quit':
+                        break
+        except (EOFError, OSError):
+            player.command(('quit',))
+        songs.put(('quit',))
+
+    threading.Thread(target=read_commands, name='playback-commands', daemon=True).start()
+    while True:
+        msg = songs.get()
+        if msg[0] == 'quit':
+            break
+        player.play(*msg[1:])
+
+
+class PlaybackWorker:
+    """A playback process. run() blocks like playback.run_playback (same is_playing/progress contract);
+    stop(), pause(), resume(), seek() and set_rate() can be called from any thread while it runs.
+
+    output names the key output used in the worker (see output.create_output); catch_up its policy
+    (see scheduler.CatchUp). Log records from the worker (dedupe, timing summaries, ...) go to this
+    process's log. Start the worker once and reuse it: spawning a process takes a few hundred ms.
+    """
+
+    def __init__(self, output: str = 'pynput', catch_up: str = 'burst'):
+        self.output = output
+        self.catch_up = catch_up
+        ctx = multiprocessing.get_context('spawn')
+        self._conn, child_conn = ctx.Pipe()
+        self._process = ctx.Process(target=_worker_main, args=(child_conn,), name='playback-worker', daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._send_lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._done = threading.Event()
+        self._finished = False
+        self._error: str | None = None
+        self._progress_callback: Callable[[int, int], None] | None = None
+        self._timing: TimingLog | None = None
+        threading.Thread(target=self._read, name='playback-worker-reader', daemon=True).start()
+
+    def _send(self, msg: tuple) -> None:
+        with self._send_lock:
+            self._conn.send(msg)
+
+    def _read(self) -> None:
+        try:
+            while True:
+                msg = self._conn.recv()
+                kind = msg[0]
+                if kind == 'progress':
+                    callback = self._progress_callback
+                    if callback:
+                        callback(msg[1], msg[2])
+                elif kind == 'log':
+                    logging.getLogger(msg[1]).log(msg[2], '%s', msg[3])
+                elif kind == 'timing':
+                    timing = self._timing
+                    if timing is not None:
+                        timing.reset()
+                        for scheduled_ms, actual_ms in msg[1]:
+                            timing.record(int(scheduled_ms * 1_000_000), int(actual_ms * 1_000_000))
+                elif kind == 'error':
+                    self._error = msg[1]
+                elif kind == 'done':
+                    self._finished = msg[1]
+                    self._done.set()
+        except (EOFError, OSError):
+            if not self._done.is_set():
+                self._error = self._error or 'Playback process exited'
+                self._finished = False
+                self._done.set()
+
+    def is_alive(self) -> bool:
+        return self._process.is_alive()
+
+    def run(
+        self,
+        events: EventTable | list[Event],
+        is_playing: Callable[[], bool],
+        progress_callback: Callable[[int, int], None] | None = None,
+        timing: TimingLog | None = None,
+        on_started: Callable[[], None] | None = None,
+    ) -> bool:
+        """Play events in the worker and wait until they end. Returns True if every event was played,
+        False if stopped (is_playing() turned False or stop() was called). Raises RuntimeError if playback
+        failed in the worker. on_started is called once the song is sent: pause, seek and rate requests
+        made before then are not seen by it (see session.PlaybackSession.forward_to)."""
+        table = EventTable.coerce(events)
+        with self._run_lock:
+            self._done.clear()
+            self._finished = False
+            self._error = None
+            self._progress_callback = progress_callback
+            self._timing = timing
+            try:
+                self._send((
+                    'play', *_pack(table), {'output': self.output, 'catch_up': self.catch_up},
+                ))
+                if on_started is not None:
+                    on_started()
+                stopping = False
+                while not self._done.wait(POLL_INTERVAL_S):
+                    if not stopping and not is_playing():
+                        self.stop()
+                        stopping = True
+            finally:
+                self._progress_callback = None
+                self._timing = None
+            if self._error:
+                raise RuntimeError(self._error)
+            return self._finished
+
+    def stop(self) -> None:
+        self._command('stop')
+
+    def pause(self) -> None:
+        self._command('pause')
+
+    def resume(self) -> None:
+        self._command('resume')
+
+    def seek(self, time_ms: float) -> None:
+        """Continue from time_ms (song time; paused playback stays paused), see session.PlaybackSession."""
+        self._command('seek', time_ms)
+
+    def seek_fraction(self, fraction: float) -> None:
+        """Continue from this share of the song's events (0..1), see session.PlaybackSession."""
+        self._command('seek_fraction', fraction)
+
+    def set_rate(self, rate: float) -> None:
+        """Change the tempo from the current position on, see session.PlaybackSession.set_rate."""
+        if rate <= 0:
+            raise ValueError(f'rate must be positive, got {rate}')
+        self._command('rate', rate)
+
+    def _command(self, *msg) -> None:
+        try:
+            self._send(msg)
+        except (OSError, ValueError) as e:
+            log.warning("Playback worker did not take %s: %s", msg[0], e)
+
+    def close(self) -> None:
+        """Stop the worker process."""
+        self._command('quit')
+        self._process.join(JOIN_TIMEOUT_S)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join(JOIN_TIMEOUT_S)
+        self._conn.close()
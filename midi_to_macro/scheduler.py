@@ -0,0 +1,227 @@
+"""Playback clock: sleep until shortly before each deadline, then spin on perf_counter_ns for the rest."""
+
+import logging
+import threading
+import time
+
+log = logging.getLogger("midi_to_macro.scheduler")
+
+# Busy-wait this long before each deadline (covers sleep overshoot from the OS timer)
+DEFAULT_SPIN_MARGIN_MS = 2.0
+# Share of each wait that may be spent spinning
+DEFAULT_CPU_CAP = 0.25
+
+# What to do with frames that are already late (see CatchUp)
+BURST = 'burst'
+SKIP = 'skip'
+STRETCH = 'stretch'
+CATCH_UP_POLICIES = (BURST, SKIP, STRETCH)
+# A frame woken up later than this is late
+DEFAULT_LATE_MS = 30.0
+# Clock time over which a stretched schedule eases back onto the original one
+DEFAULT_STRETCH_MS = 2000.0
+
+_NS_PER_MS = 1_000_000
+
+
+class CatchUp:
+    """What playback does with a chord frame that wakes up more than late_ms after its deadline
+    (the thread was stalled by a GC pause, a slow key send or another process).
+
+    burst: play it at once, so every late frame comes out back to back (the old behaviour).
+    skip: drop it; frames that are on time again play normally.
+    stretch: play it now and delay the rest of the song by the same amount, then ease back onto the original
+    schedule over stretch_ms of playback clock time (slightly faster), so late notes keep their spacing instead of bursting.
+    Counts are notes: late (woke up late), skipped, stretched (played off their original time).
+    """
+
+    __slots__ = ('policy', 'late_ms', 'stretch_ms', 'late', 'skipped', 'stretched', '_offset_ms', '_anchor_ms')
+
+    def __init__(self, policy: str = BURST, late_ms: float = DEFAULT_LATE_MS, stretch_ms: float = DEFAULT_STRETCH_MS):
+        if policy not in CATCH_UP_POLICIES:
+            raise ValueError(f'Unknown catch-up policy {policy!r} (choose from {", ".join(CATCH_UP_POLICIES)})')
+        if late_ms < 0:
+            raise ValueError(f'late_ms must not be negative, got {late_ms}')
+        if stretch_ms <= 0:
+            raise ValueError(f'stretch_ms must be positive, got {stretch_ms}')
+        self.policy = policy
+        self.late_ms = late_ms
+        self.stretch_ms = stretch_ms
+        self.reset()
+
+    def reset(self) -> None:
+        self.late = 0
+        self.skipped = 0
+        self.stretched = 0
+        self._offset_ms = 0.0
+        self._anchor_ms = 0.0
+
+    def clear_offset(self) -> None:
+        """Drop a stretch in progress (the schedule was rebased by a pause or seek); counts are kept."""
+        self._offset_ms = 0.0
+
+    def offset_ms(self, time_ms: float, notes: int = 1) -> float:
+        """How far behind the original schedule a frame due at time_ms (clock ms) plays (stretch only)."""
+        if not self._offset_ms:
+            return 0.0
+        left = 1.0 - (time_ms - self._anchor_ms) / self.stretch_ms
+        if left <= 0:
+            self._offset_ms = 0.0
+            return 0.0
+        self.stretched += notes
+        return self._offset_ms * left
+
+    def on_late(self, time_ms: float, now_ms: float, notes: int = 1) -> bool:
+        """A frame due at time_ms woke up at now_ms, more than late_ms late. Returns False to skip it."""
+        self.late += notes
+        if self.policy == SKIP:
+            self.skipped += notes
+            return False
+        if self.policy == STRETCH:
+            if not self._offset_ms:
+                self.stretched += notes
+            self._offset_ms = now_ms - time_ms
+            self._anchor_ms = time_ms
+        return True
+
+    def __str__(self) -> str:
+        text = f'{self.late} notes more than {self.late_ms:g} ms late ({self.policy})'
+        if self.skipped:
+            text += f', {self.skipped} skipped'
+        if self.stretched:
+            text += f', {self.stretched} stretched'
+        return text
+
+    def log(self, name: str) -> None:
+        if self.late:
+            log.info("%s: %s", name, self)
+
+
+class TimeWarp:
+    """Piecewise-linear map from song time (event times, ms) to playback clock time (ms since start).
+
+    Each rate change starts a new piece at the current position: clock = clock_ms + (song - song_ms) * rate,
+    where rate is clock ms per song ms (2.0 plays at half speed). Only the piece being played is kept,
+    since playback moves forward and a seek rebases the clock anyway.
+    """
+
+    __slots__ = ('song_ms', 'clock_ms', 'rate')
+
+    def __init__(self):
+        self.song_ms = 0.0
+        self.clock_ms = 0.0
+        self.rate = 1.0
+
+    def clock_at(self, song_ms: float) -> float:
+        return self.clock_ms + (song_ms - self.song_ms) * self.rate
+
+    def song_at(self, clock_ms: float) -> float:
+        return self.song_ms + (clock_ms - self.clock_ms) / self.rate
+
+    def anchor(self, song_ms: float, clock_ms: float, rate: float | None = None) -> None:
+        """Start a new piece: song_ms plays at clock_ms, later song time at rate (default: unchanged)."""
+        if rate is not None:
+            if rate <= 0:
+                raise ValueError(f'rate must be positive, got {rate}')
+            self.rate = rate
+        self.song_ms = song_ms
+        self.clock_ms = clock_ms
+
+
+class Scheduler:
+    """Waits for event deadlines given in ms since start().
+
+    time.sleep wakes up late by the OS timer granularity (about 1 ms, more under load or on older Windows
+    Pythons), so the wait sleeps until spin_margin_ms before the deadline and spins the rest.
+    cpu_cap bounds the spinning to that share of each wait: 0 only sleeps (lowest CPU, OS precision),
+    1 always spins the full margin. Short gaps (fast runs) spin less, long rests sleep almost all the way.
+    catch_up decides what happens to frames that are already late (default: burst); it works in clock ms.
+    warp maps event times to the clock, so set_rate() changes the tempo from the current position on
+    without recompiling the song.
+    While interrupt (a threading.Event, e.g. PlaybackSession.wake) is set, waits return early: the sleep is
+    an Event.wait and the spin checks it, so a stop or seek does not wait out a long rest.
+    """
+
+    __slots__ = ('spin_margin_ns', 'cpu_cap', 'catch_up', 't0_ns', 'interrupt', 'warp')
+
+    def __init__(
+        self,
+        spin_margin_ms: float = DEFAULT_SPIN_MARGIN_MS,
+        cpu_cap: float = DEFAULT_CPU_CAP,
+        catch_up: CatchUp | None = None,
+    ):
+        if spin_margin_ms < 0:
+            raise ValueError(f'spin_margin_ms must not be negative, got {spin_margin_ms}')
+        if not 0.0 <= cpu_cap <= 1.0:
+            raise ValueError(f'cpu_cap must be between 0 and 1, got {cpu_cap}')
+        self.spin_margin_ns = int(spin_margin_ms * _NS_PER_MS)
+        self.cpu_cap = cpu_cap
+        self.catch_up = catch_up or CatchUp()
+        self.t0_ns = time.perf_counter_ns()
+        self.interrupt: threading.Event | None = None
+        self.warp = TimeWarp()
+
+    def start(self) -> None:
+        """Make now time 0 at normal rate and reset the catch-up counts."""
+        self.t0_ns = time.perf_counter_ns()
+        self.warp.anchor(0.0, 0.0, 1.0)
+        self.catch_up.reset()
+
+    def rebase(self, time_ms: float) -> None:
+        """Make now time_ms (song time), e.g. after a pause or seek, so later deadlines keep their gaps
+        (at the current rate)."""
+        self.t0_ns = time.perf_counter_ns() - int(time_ms * _NS_PER_MS)
+        self.warp.anchor(time_ms, time_ms)
+        self.catch_up.clear_offset()
+
+    def set_rate(self, rate: float) -> None:
+        """Play the rest of the song at rate clock ms per song ms, starting from the current position."""
+        now_ms = self.elapsed_ms()
+        self.warp.anchor(self.warp.song_at(now_ms), now_ms, rate)
+
+    def position_ms(self) -> float:
+        """Song time that is playing now."""
+        return self.warp.song_at(self.elapsed_ms())
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter_ns() - self.t0_ns) / _NS_PER_MS
+
+    def wait_until(self, deadline_ms: float) -> int:
+        """Block until deadline_ms after start(). Returns the time reached in ns since start()
+        (at or after the deadline; later if the deadline had already passed; earlier if interrupted)."""
+        clock = time.perf_counter_ns
+        deadline = self.t0_ns + int(deadline_ms * _NS_PER_MS)
+        now = clock()
+        remaining = deadline - now
+        if remaining > 0:
+            spin = min(self.spin_margin_ns, int(remaining * self.cpu_cap))
+            interrupt = self.interrupt
+            if interrupt is None:
+                if remaining > spin:
+                    time.sleep((remaining - spin) / 1e9)
+                    now = clock()
+                while now < deadline:
+                    now = clock()
+            else:
+                if remaining > spin:
+                    if interrupt.wait((remaining - spin) / 1e9):
+                        return clock() - self.t0_ns
+                    now = clock()
+                is_set = interrupt.is_set
+                while now < deadline and not is_set():
+                    now = clock()
+        return now - self.t0_ns
+
+    def wait_frame(self, time_ms: float, notes: int = 1) -> bool:
+        """Wait for a chord frame due at time_ms, applying the catch-up policy.
+        Returns False if the frame should be skipped, or if the wait was interrupted (interrupt is set)."""
+        catch_up = self.catch_up
+        due_ms = self.warp.clock_at(time_ms)
+        deadline_ms = due_ms + catch_up.offset_ms(due_ms, notes)
+        now_ms = self.wait_until(deadline_ms) / _NS_PER_MS
+        interrupt = self.interrupt
+        if interrupt is not None and interrupt.is_set():
+            return False
+        if now_ms - deadline_ms > catch_up.late_ms:
+            return catch_up.on_late(due_ms, now_ms, notes)
+        return True
@@ -0,0 +1,141 @@
+"""Pause, resume and seek requests for a song being played, made from any thread (e.g. the GUI)."""
+
+import threading
+from bisect import bisect_left
+
+from midi_to_macro.events import EventTable
+
+# How often a paused playback re-checks its is_playing callback (requests on the session wake it at once)
+PAUSE_POLL_S = 0.01
+
+# Seek target kinds
+_MS = 'ms'
+_FRACTION = 'fraction'
+
+
+class PlaybackSession:
+    """Controls for one playback (see playback.run_playback_stream), made from any thread.
+
+    Every request sets the wake Event, which playback waits on (through Scheduler.interrupt) instead of
+    sleeping, so stop, pause and seek take effect within about a millisecond even during a long rest.
+    stop() ends playback for good: create one session per song, so a stopped song can never be restarted
+    by the next one (is_playing() stays False). pause() holds playback and releases held modifiers;
+    resume() continues with the remaining gaps intact (the playback clock is rebased by the paused time).
+    seek(ms) or seek_fraction(f) jump to that point of the song: the next event is found by binary search
+    over the event times, so a jump costs O(log n) however long the song is. Seeking while paused stays paused.
+    set_rate(rate) changes the tempo from the current position on (see scheduler.TimeWarp).
+    forward_to(controls) hands requests still pending to whatever plays the song from then on.
+    """
+
+    __slots__ = ('_lock', 'paused', '_seek', '_rate', '_stopped', 'wake')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.paused = False
+        self._seek: tuple[str, float] | None = None
+        self._rate: float | None = None
+        self._stopped = threading.Event()
+        self.wake = threading.Event()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.wake.set()
+
+    def is_playing(self) -> bool:
+        return not self._stopped.is_set()
+
+    def wait_stopped(self, timeout: float) -> bool:
+        """Block up to timeout seconds; returns True as soon as the session is stopped."""
+        return self._stopped.wait(timeout)
+
+    def pause(self) -> None:
+        self.paused = True
+        self.wake.set()
+
+    def resume(self) -> None:
+        self.paused = False
+        self.wake.set()
+
+    def toggle_pause(self) -> bool:
+        """Pause if playing, resume if paused. Returns True if now paused."""
+        self.paused = not self.paused
+        self.wake.set()
+        return self.paused
+
+    def seek(self, time_ms: float) -> None:
+        """Continue from time_ms (ms since the start of the song as played, i.e. after tempo)."""
+        with self._lock:
+            self._seek = (_MS, max(0.0, float(time_ms)))
+        self.wake.set()
+
+    def seek_fraction(self, fraction: float) -> None:
+        """Continue from this share of the song's events (0..1, as the progress bar shows it)."""
+        with self._lock:
+            self._seek = (_FRACTION, min(max(float(fraction), 0.0), 1.0))
+        self.wake.set()
+
+    def set_rate(self, rate: float) -> None:
+        """Play the rest of the song at rate times its compiled durations (new tempo multiplier divided by
+        the one the song was compiled with; 2.0 is half speed)."""
+        if rate <= 0:
+            raise ValueError(f'rate must be positive, got {rate}')
+        with self._lock:
+            self._rate = float(rate)
+        self.wake.set()
+
+    def take_rate(self) -> float | None:
+        """Consume the rate change, if any."""
+        with self._lock:
+            rate, self._rate = self._rate, None
+        return rate
+
+    @property
+    def pending(self) -> bool:
+        """True if playback has to act before the next frame (paused or a seek was requested)."""
+        return self.paused or self._seek is not None
+
+    @property
+    def seeking(self) -> bool:
+        """True if a seek was requested and not taken yet."""
+        return self._seek is not None
+
+    def forward_to(self, controls) -> None:
+        """Apply the pause state and consume the pending seek and rate onto controls (anything with pause, seek,
+        seek_fraction and set_rate, e.g. a PlaybackWorker), for requests made before the song reached it."""
+        with self._lock:
+            target, self._seek = self._seek, None
+            rate, self._rate = self._rate, None
+        if self.paused:
+            controls.pause()
+        if target is not None:
+            kind, value = target
+            if kind == _FRACTION:
+                controls.seek_fraction(value)
+            else:
+                controls.seek(value)
+        if rate is not None:
+            controls.set_rate(rate)
+
+    def take_seek(self, table: EventTable | None) -> tuple[int, int] | None:
+        """Consume the seek request, if any: (index of the next event, song ms that plays now).
+        Without a table (streamed playback) the request is dropped."""
+        with self._lock:
+            target, self._seek = self._seek, None
+        if target is None or table is None:
+            return None
+        return seek_index(table, *target)
+
+
+def seek_index(table: EventTable, kind: str, value: float) -> tuple[int, int]:
+    """(index of the first event to play, song ms to rebase the clock to) for a seek target."""
+    times = table.times
+    n = len(times)
+    if kind == _FRACTION:
+        i = min(int(value * n), n)
+        if i == n:
+            return n, (times[-1] if n else 0)
+        # Start at the beginning of the chord frame the index falls in
+        time_ms = times[i]
+        return bisect_left(times, time_ms), time_ms
+    time_ms = int(value)
+    return bisect_left(times, time_ms), time_ms
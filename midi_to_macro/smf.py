@@ -0,0 +1,186 @@
+"""Minimal Standard MIDI File reader: decodes only note-on and tempo events straight from the file bytes.
+
+No message objects are created; controller, pitch-bend, sysex and other meta events are skipped by length.
+Raises ValueError for anything it does not handle (SMPTE timing, RIFF wrappers, malformed tracks) so the
+caller can fall back to mido.
+"""
+
+import heapq
+from operator import itemgetter
+from typing import Collection, Iterator
+
+# Channel value used for tempo events in decoded tuples (note is the tempo in µs per beat)
+TEMPO = -1
+
+# skip_channels mask that drops every channel event (tempo only)
+ALL_CHANNELS = 0xFFFF
+
+# Data bytes following a channel status (by high nibble); 0xC0 program change and 0xD0 aftertouch take one
+_DATA_LEN = {0x80: 2, 0x90: 2, 0xA0: 2, 0xB0: 2, 0xC0: 1, 0xD0: 1, 0xE0: 2}
+
+
+class SmfFile:
+    """Parsed chunk layout: header fields plus one memoryview per MTrk chunk (no events decoded yet)."""
+
+    __slots__ = ('format', 'ticks_per_beat', 'tracks')
+
+    def __init__(self, format: int, ticks_per_beat: int, tracks: list[memoryview]):
+        self.format = format
+        self.ticks_per_beat = ticks_per_beat
+        self.tracks = tracks
+
+    def iter_track(self, index: int, skip_channels: int = 0) -> Iterator[tuple[int, int, int, int]]:
+        return iter_track(self.tracks[index], skip_channels)
+
+    def iter_merged(
+        self,
+        muted_tracks: Collection[int] = (),
+        skip_channels: int = 0,
+    ) -> Iterator[tuple[int, int, int, int]]:
+        """All tracks merged by tick; ties keep track order (same as mido.merge_tracks).
+        Muted tracks only contribute tempo changes; notes on channels in the skip_channels bit mask are dropped.
+        """
+        streams = [
+            iter_track(t, ALL_CHANNELS if i in muted_tracks else skip_channels)
+            for i, t in enumerate(self.tracks)
+        ]
+        return heapq.merge(*streams, key=itemgetter(0))
+
+
+def read_smf(data: bytes | memoryview) -> SmfFile:
+    """Split SMF bytes into header fields and track chunks."""
+    view = memoryview(data)
+    if len(view) < 14 or bytes(view[0:4]) != b'MThd':
+        raise ValueError('MThd not found')
+    header_len = int.from_bytes(view[4:8], 'big')
+    if header_len < 6:
+        raise ValueError('MThd chunk too short')
+    fmt = int.from_bytes(view[8:10], 'big')
+    ntracks = int.from_bytes(view[10:12], 'big')
+    division = int.from_bytes(view[12:14], 'big')
+    if division & 0x8000 or division == 0:
+        raise ValueError('SMPTE time division is not supported')
+    pos = 8 + header_len
+    tracks: list[memoryview] = []
+    while len(tracks) < ntracks:
+        if pos + 8 > len(view):
+            raise ValueError(f'Expected {ntracks} tracks, found {len(tracks)}')
+        chunk_id = bytes(view[pos:pos + 4])
+        size = int.from_bytes(view[pos + 4:pos + 8], 'big')
+        start = pos + 8
+        pos = start + size
+        if pos > len(view):
+            raise ValueError('Track chunk runs past end of file')
+        if chunk_id == b'MTrk':
+            tracks.append(view[start:pos])
+    return SmfFile(fmt, division, tracks)
+
+
+def read_smf_file(path: str) -> SmfFile:
+    with open(path, 'rb') as f:
+        return read_smf(f.read())
+
+
+def iter_track(track: memoryview, skip_channels: int = 0) -> Iterator[tuple[int, int, int, int]]:
+    """Yield (abs_tick, channel, note, velocity) for note-on with velocity > 0,
+    and (abs_tick, TEMPO, tempo, 0) for set_tempo. Everything else is skipped, as are
+    note-ons on channels whose bit is set in skip_channels.
+    """
+    pos = 0
+    end = len(track)
+    tick = 0
+    status = 0
+    data_len = _DATA_LEN
+    try:
+        while pos < end:
+            # Delta time (variable-length quantity)
+            b = track[pos]
+            pos += 1
+            delta = b & 0x7F
+            while b & 0x80:
+                b = track[pos]
+                pos += 1
+                delta = (delta << 7) | (b & 0x7F)
+            tick += delta
+            b = track[pos]
+            if b & 0x80:
+                pos += 1
+                if b == 0xFF:
+                    # Meta event: type, length, data. Does not change running status.
+                    mtype = track[pos]
+                    pos += 1
+                    length = 0
+                    while True:
+                        b = track[pos]
+                        pos += 1
+                        length = (length << 7) | (b & 0x7F)
+                        if not b & 0x80:
+                            break
+                    if mtype == 0x51 and length == 3:
+                        yield (tick, TEMPO, (track[pos] << 16) | (track[pos + 1] << 8) | track[pos + 2], 0)
+                    pos += length
+                    continue
+                if b == 0xF0 or b == 0xF7:
+                    length = 0
+                    while True:
+                        c = track[pos]
+                        pos += 1
+                        length = (length << 7) | (c & 0x7F)
+                        if not c & 0x80:
+                            break
+                    pos += length
+                    status = 0  # running status after sysex is left to mido
+                    continue
+                if b > 0xF0:
+                    raise ValueError(f'Unsupported status byte 0x{b:02X}')
+                status = b
+            elif not status:
+                raise ValueError('Running status without a previous status byte')
+            kind = status & 0xF0
+            if kind == 0x90:
+                vel = track[pos + 1]
+                if vel and not skip_channels >> (status & 0x0F) & 1:
+                    yield (tick, status & 0x0F, track[pos], vel)
+                pos += 2
+            else:
+                pos += data_len[kind]
+    except IndexError:
+        raise ValueError('Track data ends in the middle of an event') from None
+    if pos > end:
+        raise ValueError('Track data ends in the middle of an event')
+
+
+def track_name(track: memoryview) -> str:
+    """Name from the track's leading meta events (sequence/track name, 0x03), or '' if none."""
+    pos = 0
+    end = len(track)
+    try:
+        while pos < end:
+            b = track[pos]
+            pos += 1
+            delta = b & 0x7F
+            while b & 0x80:
+                b = track[pos]
+                pos += 1
+                delta = (delta << 7) | (b & 0x7F)
+            if delta or track[pos] != 0xFF:
+                break  # names come before the first timed or channel event
+            mtype = track[pos + 1]
+            pos += 2
+            length = 0
+            while True:
+                b = track[pos]
+                pos += 1
+                length = (length << 7) | (b & 0x7F)
+                if not b & 0x80:
+                    break
+            if mtype == 0x03:
+                raw = bytes(track[pos:pos + length])
+                try:
+                    return raw.decode('utf-8').strip()
+                except UnicodeDecodeError:
+                    return raw.decode('latin-1').strip()
+            pos += length
+    except IndexError:
+        pass
+    return ''
@@ -0,0 +1,57 @@
+"""Canonical song: decoded note times and raw note numbers; tempo, transpose and keymap applied as transforms."""
+
+from array import array
+
+from midi_to_macro.events import EventTable
+from midi_to_macro.keymap import DEFAULT_KEYMAP, Keymap
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class Song:
+    """A MIDI file parsed once: absolute ms per note-on ('d') and raw MIDI note numbers ('B').
+
+    compile() turns it into an EventTable for any tempo multiplier, transpose and keymap without reparsing:
+    tempo is one scale over the times, transpose and keymap are a byte translation of the notes.
+    """
+
+    __slots__ = ('times', 'notes')
+
+    def __init__(self, times: array | None = None, notes: array | None = None):
+        self.times = times if times is not None else array('d')
+        self.notes = notes if notes is not None else array('B')
+        if len(self.times) != len(self.notes):
+            raise ValueError('times and notes must have the same length')
+
+    def __len__(self) -> int:
+        return len(self.notes)
+
+    def duration_ms(self) -> float:
+        return self.times[-1] if self.times else 0.0
+
+    def scaled_times(self, tempo_multiplier: float = 1.0) -> array:
+        """Event times in whole ms for a tempo multiplier ('i')."""
+        if np is not None and self.times:
+            scaled = (np.frombuffer(self.times, dtype=np.float64) * tempo_multiplier).astype(np.intc)
+            out = array('i')
+            out.frombytes(scaled.tobytes())
+            return out
+        return array('i', [int(t * tempo_multiplier) for t in self.times])
+
+    def compile(
+        self,
+        tempo_multiplier: float = 1.0,
+        transpose: int = 0,
+        keymap: Keymap | None = None,
+    ) -> EventTable:
+        """EventTable for these settings (same result as parsing with them)."""
+        masks, codes = (keymap or DEFAULT_KEYMAP).transposed(transpose)
+        notes = self.notes.tobytes()
+        return EventTable(
+            self.scaled_times(tempo_multiplier),
+            array('B', notes.translate(codes)),
+            array('B', notes.translate(masks)),
+        )
@@ -1,11 +1,13 @@
-"""Per-song tempo/transpose persistence (no UI)."""
+"""Per-song tempo/transpose and track/channel selection persistence (no UI)."""
 
 import json
 import os
 
 
 class SongSettings:
-    """Load/save tempo and transpose per song key (file path or 'os:{sid}')."""
+    """Load/save tempo and transpose per song key (file path or 'os:{sid}').
+    Muted tracks/channels and the cached auto-transpose result are kept in the same entry
+    but saved and cleared on their own."""
 
     def __init__(self, settings_dir: str = ""):
         self._dir = settings_dir or os.path.join(os.path.expanduser("~"), ".midi_to_macro")
@@ -39,16 +41,65 @@ class SongSettings:
             pass
 
     def get(self, key: str) -> dict[str, float | int] | None:
-        return self._data.get(key)
+        """Saved tempo/transpose for key, or None when none are saved."""
+        entry = self._data.get(key)
+        if not isinstance(entry, dict) or "tempo" not in entry:
+            return None
+        return entry
 
     def set(self, key: str, tempo: float, transpose: int) -> None:
-        self._data[key] = {"tempo": tempo, "transpose": transpose}
+        entry = self._data.setdefault(key, {})
+        entry["tempo"] = tempo
+        entry["transpose"] = transpose
         self.save()
 
     def delete(self, key: str) -> None:
-        if key in self._data:
+        """Forget tempo/transpose for key (a saved track selection is kept)."""
+        entry = self._data.get(key)
+        if entry is None:
+            return
+        entry.pop("tempo", None)
+        entry.pop("transpose", None)
+        if not entry:
             del self._data[key]
-            self.save()
+        self.save()
 
     def has(self, key: str) -> bool:
-        return key in self._data
+        return self.get(key) is not None
+
+    def get_mutes(self, key: str) -> tuple[list[int], list[int]]:
+        """(muted track indices, muted channels 0–15) saved for key; empty lists when none."""
+        entry = self._data.get(key)
+        if not isinstance(entry, dict):
+            return ([], [])
+        tracks = entry.get("muted_tracks", [])
+        channels = entry.get("muted_channels", [])
+        return (
+            [int(t) for t in tracks if isinstance(t, int)] if isinstance(tracks, list) else [],
+            [int(c) for c in channels if isinstance(c, int)] if isinstance(channels, list) else [],
+        )
+
+    def set_mutes(self, key: str, tracks: list[int], channels: list[int]) -> None:
+        """Save muted tracks/channels for key; empty lists clear them."""
+        entry = self._data.setdefault(key, {})
+        for name, values in (("muted_tracks", tracks), ("muted_channels", channels)):
+            if values:
+                entry[name] = sorted(values)
+            else:
+                entry.pop(name, None)
+        if not entry:
+            del self._data[key]
+        self.save()
+
+    def get_auto_transpose(self, key: str, source: str) -> dict[str, int] | None:
+        """Cached auto-transpose result for key, if it was computed from the same source
+        (file content, track selection and keymap); None otherwise."""
+        entry = self._data.get(key)
+        cached = entry.get("auto_transpose") if isinstance(entry, dict) else None
+        if not isinstance(cached, dict) or cached.get("source") != source:
+            return None
+        return cached
+
+    def set_auto_transpose(self, key: str, source: str, result: dict[str, int]) -> None:
+        self._data.setdefault(key, {})["auto_transpose"] = {"source": source, **result}
+        self.save()
@@ -245,7 +245,8 @@ class Room:
                 midi_bytes = base64.b64decode(b64)
                 tempo = float(msg.get('tempo', 1.0))
                 transpose = int(msg.get('transpose', 0))
-                self.on_play_file(start_in, midi_bytes, tempo, transpose, host_send_time, host_playing_label)
+                suffix = str(msg.get('suffix', '.mid'))  # older hosts only send MIDI files
+                self.on_play_file(start_in, midi_bytes, tempo, transpose, host_send_time, host_playing_label, suffix)
             except (TypeError, ValueError):
                 pass
         elif cmd == 'play_os' and self.on_play_os:
@@ -299,8 +300,8 @@ class Room:
         self._host_playing_label = label[:200]
         self._broadcast_room_playing()
 
-    def send_play_file(self, start_in_sec: float, midi_bytes: bytes, tempo: float, transpose: int, host_playing_label: str = ''):
-        """Host only: broadcast play file to all clients."""
+    def send_play_file(self, start_in_sec: float, midi_bytes: bytes, tempo: float, transpose: int, host_playing_label: str = '', suffix: str = '.mid'):
+        """Host only: broadcast play file to all clients (suffix: the file's extension, so clients play it as that format)."""
         if not self.is_host():
             return
         host_send_time = time.time()
@@ -312,6 +313,7 @@ class Room:
             'tempo': tempo,
             'transpose': transpose,
             'host_playing_label': host_playing_label,
+            'suffix': suffix,
         }
         line = (json.dumps(payload) + '\n').encode('utf-8')
         with self._lock:
@@ -0,0 +1,121 @@
+"""Keystroke timing telemetry: scheduled vs actual emit time per event, kept in a preallocated ring buffer."""
+
+import csv
+import json
+import logging
+import os
+from array import array
+
+log = logging.getLogger("midi_to_macro.telemetry")
+
+# Events kept (the most recent ones); about 1.6 MB
+DEFAULT_CAPACITY = 1 << 17
+# Lateness counted as a miss in the summary
+DEFAULT_LATE_MS = 5.0
+
+_NS_PER_MS = 1_000_000
+
+
+class LatenessSummary:
+    """Lateness statistics in ms over the recorded events; late counts events over threshold_ms."""
+
+    __slots__ = ('count', 'mean', 'p50', 'p95', 'p99', 'max', 'threshold_ms', 'late')
+
+    def __init__(self, lateness_ms: list[float], threshold_ms: float = DEFAULT_LATE_MS):
+        values = sorted(lateness_ms)
+        n = len(values)
+        self.count = n
+        self.threshold_ms = threshold_ms
+        self.mean = sum(values) / n if n else 0.0
+        self.p50 = _percentile(values, 50)
+        self.p95 = _percentile(values, 95)
+        self.p99 = _percentile(values, 99)
+        self.max = values[-1] if n else 0.0
+        self.late = sum(1 for v in values if v > threshold_ms)
+
+    def __str__(self) -> str:
+        return (
+            f'{self.count} events, lateness mean {self.mean:.2f} ms, p50 {self.p50:.2f}, p95 {self.p95:.2f}, '
+            f'p99 {self.p99:.2f}, max {self.max:.2f}; {self.late} over {self.threshold_ms:g} ms'
+        )
+
+
+def _percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+class TimingLog:
+    """Scheduled and actual emit time (ns since playback start) of the last `capacity` events.
+
+    The arrays are allocated once; record() only stores two integers, so it can stay on during normal play.
+    Reuse one log across songs with reset().
+    """
+
+    __slots__ = ('capacity', 'scheduled', 'actual', 'count')
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError(f'capacity must be at least 1, got {capacity}')
+        self.capacity = capacity
+        self.scheduled = array('q', bytes(8 * capacity))
+        self.actual = array('q', bytes(8 * capacity))
+        self.count = 0
+
+    def reset(self) -> None:
+        self.count = 0
+
+    def record(self, scheduled_ns: int, actual_ns: int) -> None:
+        i = self.count % self.capacity
+        self.scheduled[i] = scheduled_ns
+        self.actual[i] = actual_ns
+        self.count += 1
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def _order(self) -> range | list[int]:
+        """Buffer indices oldest first."""
+        if self.count <= self.capacity:
+            return range(self.count)
+        start = self.count % self.capacity
+        return [*range(start, self.capacity), *range(start)]
+
+    def rows(self) -> list[tuple[float, float, float]]:
+        """(scheduled_ms, actual_ms, lateness_ms) per kept event, oldest first."""
+        scheduled, actual = self.scheduled, self.actual
+        return [
+            (scheduled[i] / _NS_PER_MS, actual[i] / _NS_PER_MS, (actual[i] - scheduled[i]) / _NS_PER_MS)
+            for i in self._order()
+        ]
+
+    def lateness_ms(self) -> list[float]:
+        scheduled, actual = self.scheduled, self.actual
+        return [(actual[i] - scheduled[i]) / _NS_PER_MS for i in self._order()]
+
+    def summary(self, threshold_ms: float = DEFAULT_LATE_MS) -> LatenessSummary:
+        return LatenessSummary(self.lateness_ms(), threshold_ms)
+
+    def log_summary(self, name: str, threshold_ms: float = DEFAULT_LATE_MS) -> LatenessSummary:
+        """Write the summary to the application log (see log_config) and return it."""
+        summary = self.summary(threshold_ms)
+        if summary.count:
+            dropped = self.count - summary.count
+            extra = f' (oldest {dropped} not kept)' if dropped else ''
+            log.info("%s timing: %s%s", name, summary, extra)
+        return summary
+
+    def dump(self, path: str) -> None:
+        """Write every kept event as .json (list of objects) or CSV (any other extension)."""
+        rows = self.rows()
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            if os.path.splitext(path)[1].lower() == '.json':
+                json.dump(
+                    [{'scheduled_ms': s, 'actual_ms': a, 'lateness_ms': late} for s, a, late in rows],
+                    f, indent=0,
+                )
+            else:
+                writer = csv.writer(f)
+                writer.writerow(('scheduled_ms', 'actual_ms', 'lateness_ms'))
+                writer.writerows(rows)
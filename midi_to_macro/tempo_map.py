@@ -0,0 +1,80 @@
+"""Tempo map: tick -> ms conversion over tempo segments (exact across tempo changes)."""
+
+from array import array
+from bisect import bisect_right
+from typing import Iterable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_TEMPO = 500_000  # µs per beat (120 BPM)
+
+
+class TempoMap:
+    """Sorted segment start ticks with the cumulative ms at each start and the ms-per-tick inside it.
+
+    A tick converts with one bisect and one multiply: ms = offset[i] + (tick - start[i]) * scale[i].
+    Tempo changes must be added in tick order (as a merged track stream delivers them).
+    """
+
+    __slots__ = ('ticks_per_beat', 'starts', 'offsets', 'scales')
+
+    def __init__(self, ticks_per_beat: int, changes: Iterable[tuple[int, int]] = ()):
+        if ticks_per_beat <= 0:
+            raise ValueError(f'ticks_per_beat must be positive, got {ticks_per_beat}')
+        self.ticks_per_beat = ticks_per_beat
+        self.starts: list[int] = [0]
+        self.offsets: list[float] = [0.0]
+        self.scales: list[float] = [DEFAULT_TEMPO / 1000.0 / ticks_per_beat]
+        for tick, tempo in changes:
+            self.add(tick, tempo)
+
+    def add(self, tick: int, tempo: int) -> None:
+        """Start a new segment at tick with tempo (µs per beat)."""
+        last = self.starts[-1]
+        if tick < last:
+            raise ValueError(f'Tempo change at tick {tick} is before the previous one at {last}')
+        scale = tempo / 1000.0 / self.ticks_per_beat
+        if tick == last:
+            self.scales[-1] = scale
+            return
+        self.offsets.append(self.offsets[-1] + (tick - last) * self.scales[-1])
+        self.starts.append(tick)
+        self.scales.append(scale)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def to_ms(self, tick: int) -> float:
+        i = bisect_right(self.starts, tick) - 1
+        if i < 0:
+            i = 0
+        return self.offsets[i] + (tick - self.starts[i]) * self.scales[i]
+
+    def to_ms_many(self, ticks: Iterable[int]) -> array:
+        """Convert many ticks at once (any order). Vectorized with NumPy when available."""
+        out = array('d')
+        if np is not None:
+            t = np.asarray(ticks if isinstance(ticks, (array, list)) else list(ticks), dtype=np.float64)
+            starts = np.asarray(self.starts, dtype=np.float64)
+            idx = np.searchsorted(starts, t, side='right') - 1
+            np.maximum(idx, 0, out=idx)
+            ms = np.asarray(self.offsets)[idx] + (t - starts[idx]) * np.asarray(self.scales)[idx]
+            out.frombytes(ms.tobytes())
+            return out
+        starts, offsets, scales = self.starts, self.offsets, self.scales
+        last = len(starts) - 1
+        i = 0
+        prev = None
+        for tick in ticks:
+            if prev is None or tick < prev:
+                i = max(bisect_right(starts, tick) - 1, 0)
+            else:
+                # Sorted input: walk forward instead of bisecting
+                while i < last and starts[i + 1] <= tick:
+                    i += 1
+            out.append(offsets[i] + (tick - starts[i]) * scales[i])
+            prev = tick
+        return out
@@ -0,0 +1,188 @@
+"""Per-track and per-channel note index of a MIDI file, and the track/channel selection used when parsing."""
+
+import logging
+import os
+from collections import OrderedDict
+from typing import Iterable, Iterator
+
+import mido
+
+from midi_to_macro.smf import TEMPO, read_smf, track_name
+from midi_to_macro.tempo_map import TempoMap
+
+log = logging.getLogger("midi_to_macro.track_index")
+
+DRUM_CHANNEL = 9  # General MIDI percussion (shown as channel 10)
+
+# Indexes kept in memory (one per recently selected file)
+INDEX_CACHE_SIZE = 32
+
+
+class TrackSelection:
+    """Tracks and channels left out of parsing. Channels are 0-based (drums are 9)."""
+
+    __slots__ = ('muted_tracks', 'muted_channels')
+
+    def __init__(self, muted_tracks: Iterable[int] = (), muted_channels: Iterable[int] = ()):
+        self.muted_tracks = frozenset(int(t) for t in muted_tracks)
+        self.muted_channels = frozenset(int(c) for c in muted_channels if 0 <= int(c) < 16)
+
+    def __bool__(self) -> bool:
+        return bool(self.muted_tracks or self.muted_channels)
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, TrackSelection)
+            and self.muted_tracks == other.muted_tracks
+            and self.muted_channels == other.muted_channels
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.muted_tracks, self.muted_channels))
+
+    @property
+    def channel_mask(self) -> int:
+        """Muted channels as a bit mask (see smf.iter_track skip_channels)."""
+        mask = 0
+        for c in self.muted_channels:
+            mask |= 1 << c
+        return mask
+
+    def cache_variant(self) -> str:
+        """Suffix for cache keys, so each selection of a file is cached separately ('' when nothing is muted)."""
+        if not self:
+            return ''
+        tracks = '.'.join(map(str, sorted(self.muted_tracks)))
+        channels = '.'.join(map(str, sorted(self.muted_channels)))
+        return f't{tracks}c{channels}'
+
+
+class NoteStats:
+    """Note count and pitch range for one track or channel; density is notes per second of the song."""
+
+    __slots__ = ('notes', 'low', 'high', 'density')
+
+    def __init__(self):
+        self.notes = 0
+        self.low = 127
+        self.high = 0
+        self.density = 0.0
+
+    def add(self, note: int) -> None:
+        self.notes += 1
+        if note < self.low:
+            self.low = note
+        if note > self.high:
+            self.high = note
+
+
+class TrackInfo(NoteStats):
+    __slots__ = ('index', 'name', 'channels', 'has_tempo')
+
+    def __init__(self, index: int, name: str = ''):
+        super().__init__()
+        self.index = index
+        self.name = name
+        self.channels: set[int] = set()
+        self.has_tempo = False
+
+
+class ChannelInfo(NoteStats):
+    __slots__ = ('channel',)
+
+    def __init__(self, channel: int):
+        super().__init__()
+        self.channel = channel
+
+    @property
+    def is_drums(self) -> bool:
+        return self.channel == DRUM_CHANNEL
+
+
+class MidiIndex:
+    """Tracks (in file order) and channels that hold notes, with the song duration in ms."""
+
+    __slots__ = ('tracks', 'channels', 'duration_ms')
+
+    def __init__(self, tracks: list[TrackInfo], channels: list[ChannelInfo], duration_ms: float):
+        self.tracks = tracks
+        self.channels = channels
+        self.duration_ms = duration_ms
+
+    @property
+    def notes(self) -> int:
+        return sum(t.notes for t in self.tracks)
+
+
+def _index_streams(tpb: int, names: list[str], streams: list[Iterable[tuple[int, int, int, int]]]) -> MidiIndex:
+    tempo_map = TempoMap(tpb)
+    tracks = [TrackInfo(i, name) for i, name in enumerate(names)]
+    channels: dict[int, ChannelInfo] = {}
+    tempos: list[tuple[int, int]] = []
+    last_tick = 0
+    for info, stream in zip(tracks, streams):
+        for tick, channel, note, _velocity in stream:
+            if channel == TEMPO:
+                info.has_tempo = True
+                tempos.append((tick, note))
+                continue
+            info.add(note)
+            info.channels.add(channel)
+            ch = channels.get(channel)
+            if ch is None:
+                ch = channels[channel] = ChannelInfo(channel)
+            ch.add(note)
+            if tick > last_tick:
+                last_tick = tick
+    # Tracks are indexed one after another, so tempo changes are merged by tick here (stable for ties)
+    for tick, tempo in sorted(tempos, key=lambda t: t[0]):
+        tempo_map.add(tick, tempo)
+    duration_ms = tempo_map.to_ms(last_tick)
+    seconds = duration_ms / 1000.0
+    for stats in (*tracks, *channels.values()):
+        stats.density = stats.notes / seconds if seconds > 0 else 0.0
+    return MidiIndex(tracks, sorted(channels.values(), key=lambda c: c.channel), duration_ms)
+
+
+def mido_track_notes(track) -> Iterator[tuple[int, int, int, int]]:
+    """Same items as smf.iter_track, from a mido track."""
+    tick = 0
+    for msg in track:
+        tick += msg.time
+        if msg.type == 'set_tempo':
+            yield (tick, TEMPO, msg.tempo, 0)
+        elif msg.type == 'note_on' and msg.velocity > 0:
+            yield (tick, msg.channel, msg.note, msg.velocity)
+
+
+def build_index(path: str) -> MidiIndex:
+    """Decode every track once and count its notes per channel (built-in reader, mido as fallback)."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        smf = read_smf(data)
+        names = [track_name(t) for t in smf.tracks]
+        return _index_streams(smf.ticks_per_beat, names, [smf.iter_track(i) for i in range(len(smf.tracks))])
+    except ValueError as e:
+        log.info("Native MIDI decoder could not index %s (%s); using mido", path, e)
+    mid = mido.MidiFile(path)
+    return _index_streams(
+        mid.ticks_per_beat, [t.name for t in mid.tracks], [mido_track_notes(t) for t in mid.tracks],
+    )
+
+
+_index_cache: OrderedDict[tuple[str, int, int], MidiIndex] = OrderedDict()
+
+
+def get_index(path: str) -> MidiIndex:
+    """Index for path, built on first request and kept while the file is unchanged (size and mtime)."""
+    st = os.stat(path)
+    key = (os.path.normpath(path), st.st_size, st.st_mtime_ns)
+    index = _index_cache.get(key)
+    if index is None:
+        index = _index_cache[key] = build_index(path)
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    else:
+        _index_cache.move_to_end(key)
+    return index
@@ -0,0 +1,71 @@
+"""Thread-safe hand-off of UI updates to the Tk main loop, drained at a fixed frame rate."""
+
+import logging
+import threading
+from typing import Callable, Hashable
+
+log = logging.getLogger("midi_to_macro.ui_dispatch")
+
+# Drain interval (~30 updates per second)
+FRAME_MS = 33
+
+
+class UiDispatcher:
+    """Queue of calls made from any thread and run on the Tk main thread every FRAME_MS.
+
+    post(fn, *args) queues a call. post_latest(key, fn, *args) also drops a call with the same key that has not
+    run yet, so a burst of progress updates costs one call per frame. Calls run in the order they were posted.
+    """
+
+    __slots__ = ('_root', '_frame_ms', '_lock', '_queue', '_pending', '_after_id')
+
+    def __init__(self, root, frame_ms: int = FRAME_MS):
+        self._root = root
+        self._frame_ms = frame_ms
+        self._lock = threading.Lock()
+        self._queue: list[list] = []  # [key, fn, args]
+        self._pending: dict[Hashable, list] = {}
+        self._after_id = None
+        self._schedule()
+
+    def post(self, fn: Callable, *args) -> None:
+        with self._lock:
+            self._queue.append([None, fn, args])
+
+    def post_latest(self, key: Hashable, fn: Callable, *args) -> None:
+        with self._lock:
+            stale = self._pending.get(key)
+            if stale is not None:
+                stale[1] = None
+            entry = self._pending[key] = [key, fn, args]
+            self._queue.append(entry)
+
+    def _schedule(self) -> None:
+        self._after_id = self._root.after(self._frame_ms, self.drain)
+
+    def drain(self) -> None:
+        """Run every queued call (main thread), then schedule the next drain."""
+        with self._lock:
+            queue, self._queue = self._queue, []
+            self._pending.clear()
+        for _key, fn, args in queue:
+            if fn is None:
+                continue
+            try:
+                fn(*args)
+            except Exception:
+                log.exception("UI update %r failed", fn)
+        if self._after_id is not None:
+            self._schedule()
+
+    def stop(self) -> None:
+        """Stop draining (queued calls are dropped)."""
+        if self._after_id is not None:
+            try:
+                self._root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+        with self._lock:
+            self._queue = []
+            self._pending.clear()
@@ -0,0 +1,59 @@
+"""Tests for midi_to_macro.auto_transpose: histogram scoring against a keymap."""
+
+from array import array
+
+import pytest
+
+from midi_to_macro import auto_transpose
+from midi_to_macro.auto_transpose import pitch_histogram, score_transposes, suggest_octave_folds, suggest_transpose
+from midi_to_macro.keymap import DEFAULT_KEYMAP
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        if auto_transpose.np is None:
+            pytest.skip('numpy not installed')
+    else:
+        monkeypatch.setattr(auto_transpose, 'np', None)
+    return request.param
+
+
+class TestScoreTransposes:
+    def test_counts(self, backend):
+        # C4 and C#4 (60, 61): same key (A), one with Shift; 100 is above the 95 clamp
+        hist = pitch_histogram(array('B', [60, 60, 61, 100]))
+        (score,) = score_transposes(hist, DEFAULT_KEYMAP, [0])
+        assert (score.clamped, score.collided, score.black) == (1, 0, 1)
+
+    def test_collisions_from_clamping(self, backend):
+        # 96 and 97 both clamp to 95 (same key as 95): the less frequent pitches collide
+        hist = pitch_histogram([95, 95, 96, 97])
+        (score,) = score_transposes(hist, DEFAULT_KEYMAP, [0])
+        assert score.clamped == 2
+        assert score.collided == 2
+
+    def test_backends_agree(self, monkeypatch):
+        if auto_transpose.np is None:
+            pytest.skip('numpy not installed')
+        hist = pitch_histogram(array('B', [n % 110 for n in range(0, 2000, 7)]))
+        vectorized = [repr(s) for s in score_transposes(hist)]
+        monkeypatch.setattr(auto_transpose, 'np', None)
+        assert [repr(s) for s in score_transposes(hist)] == vectorized
+
+
+class TestSuggestTranspose:
+    def test_moves_song_into_range(self, backend):
+        # White-key octave just above the clamp (95): only an octave down keeps it on distinct white keys
+        notes = array('B', [96, 98, 100, 101, 103, 105, 107])
+        best = suggest_transpose(notes)
+        assert best.transpose == -12
+
+    def test_prefers_no_shift_when_equal(self, backend):
+        assert suggest_transpose(array('B', [60, 62, 64])).transpose == 0
+
+    def test_octave_folds(self, backend):
+        # First phrase fits; second phrase sits an octave above the clamp
+        times = [0.0, 100.0, 5000.0, 5100.0, 5200.0]
+        notes = [60, 62, 98, 100, 101]
+        assert suggest_octave_folds(times, notes, 0, phrase_ms=4000.0) == [(4000.0, -12)]
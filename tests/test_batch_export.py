@@ -0,0 +1,62 @@
+"""Tests for midi_to_macro.batch_export: folder discovery, output paths, pooled conversion."""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from midi_to_macro.batch_export import convert_folder, find_midi_files, mcr_path_for
+from midi_to_macro.compiled import COMPILED_SUFFIX, load_compiled
+from midi_to_macro.midi import build_mcr_lines, compile_midi
+
+SAMPLE = Path(__file__).resolve().parent.parent / 'sample' / 'sample.mid'
+
+
+@pytest.fixture
+def library(tmp_path):
+    if not SAMPLE.exists():
+        pytest.skip('sample/sample.mid not found')
+    (tmp_path / 'sub').mkdir()
+    shutil.copy(SAMPLE, tmp_path / 'a.mid')
+    shutil.copy(SAMPLE, tmp_path / 'sub' / 'b.MIDI')
+    (tmp_path / 'notes.txt').write_text('not midi')
+    (tmp_path / 'broken.mid').write_bytes(b'MThd garbage')
+    return tmp_path
+
+
+class TestFindMidiFiles:
+    def test_recurses_and_filters(self, library):
+        names = [Path(p).relative_to(library).as_posix() for p in find_midi_files(str(library))]
+        assert names == ['a.mid', 'broken.mid', 'sub/b.MIDI']
+
+    def test_mcr_path_for(self, tmp_path):
+        src = str(tmp_path / 'sub' / 'song.mid')
+        assert mcr_path_for(src, str(tmp_path)) == str(tmp_path / 'sub' / 'song.mcr')
+        assert mcr_path_for(src, str(tmp_path), str(tmp_path / 'out')) == str(tmp_path / 'out' / 'sub' / 'song.mcr')
+
+
+class TestConvertFolder:
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_converts_and_reports_failures(self, library, tmp_path, workers):
+        out = tmp_path / 'out'
+        progress = []
+        result = convert_folder(
+            str(library), str(out), workers=workers, progress_callback=lambda d, t, p: progress.append((d, t)),
+        )
+        assert sorted(Path(p).relative_to(out).as_posix() for p in result.converted) == ['a.mcr', 'sub/b.mcr']
+        assert [Path(p).name for p, _ in result.failed] == ['broken.mid']
+        assert progress == [(1, 3), (2, 3), (3, 3)]
+        expected = build_mcr_lines(compile_midi(str(SAMPLE)))
+        assert (out / 'sub' / 'b.mcr').read_text(encoding='utf-8').splitlines() == expected
+        assert result.events == 2 * len(compile_midi(str(SAMPLE)))
+
+    def test_compiled_suffix(self, library, tmp_path):
+        out = tmp_path / 'out'
+        result = convert_folder(str(library), str(out), workers=1, suffix=COMPILED_SUFFIX)
+        assert len(result.converted) == 2
+        with load_compiled(str(out / ('a' + COMPILED_SUFFIX))) as song:
+            assert list(song.table.iter_raw()) == list(compile_midi(str(SAMPLE)).iter_raw())
+
+    def test_empty_folder(self, tmp_path):
+        result = convert_folder(str(tmp_path))
+        assert len(result) == 0
@@ -0,0 +1,71 @@
+"""Tests for midi_to_macro.budget: keystroke-rate thinning with top-voice priority."""
+
+from array import array
+
+import pytest
+
+from midi_to_macro.budget import KeyBudget, apply_budget
+from midi_to_macro.events import EventTable
+
+
+def _table(events):
+    """(time_ms, key) pairs -> EventTable without modifiers."""
+    return EventTable(
+        array('i', [t for t, _ in events]),
+        array('B', [ord(k) for _, k in events]),
+        array('B', [0] * len(events)),
+    )
+
+
+def _pairs(table):
+    return [(t, chr(k)) for t, _, k in table.iter_raw()]
+
+
+class TestKeyBudget:
+    def test_rejects_bad_limits(self):
+        with pytest.raises(ValueError):
+            KeyBudget(keys_per_sec=0)
+        with pytest.raises(ValueError):
+            KeyBudget(burst=0)
+
+
+class TestApplyBudget:
+    def test_within_budget_unchanged(self):
+        table = _table([(0, 'Z'), (0, 'X'), (100, 'C'), (200, 'V')])
+        out, report = apply_budget(table, KeyBudget(keys_per_sec=20, burst=4, same_key_gap_ms=30))
+        assert _pairs(out) == _pairs(table)
+        assert report.changed == 0
+        assert report.total == 4
+
+    def test_same_key_merged(self):
+        table = _table([(0, 'Z'), (10, 'Z'), (50, 'Z')])
+        out, report = apply_budget(table, KeyBudget(keys_per_sec=1000, same_key_gap_ms=30))
+        assert _pairs(out) == [(0, 'Z'), (50, 'Z')]
+        assert report.merged == 1
+
+    def test_chord_keeps_top_voice(self):
+        # Burst of 2: only the two highest notes of a 4-note chord fit
+        table = _table([(0, 'Z'), (0, 'X'), (0, 'C'), (0, 'V')])
+        pitches = array('B', [48, 72, 60, 67])
+        out, report = apply_budget(table, KeyBudget(keys_per_sec=10, burst=2, same_key_gap_ms=0), pitches)
+        assert _pairs(out) == [(0, 'X'), (0, 'V')]
+        assert report.dropped == 2
+
+    def test_top_voice_shifted_not_dropped(self):
+        # 10 keys/s, burst 1: a note 90ms after the previous is delayed 10ms instead of dropped
+        table = _table([(0, 'Z'), (90, 'X'), (90, 'C')])
+        pitches = array('B', [60, 50, 70])
+        out, report = apply_budget(
+            table, KeyBudget(keys_per_sec=10, burst=1, same_key_gap_ms=0, max_shift_ms=20), pitches,
+        )
+        assert _pairs(out) == [(0, 'Z'), (100, 'C')]
+        assert (report.shifted, report.dropped) == (1, 1)
+
+    def test_sustained_rate(self):
+        # 100 keys/s requested, 20 allowed: output stays within the rate
+        table = _table([(i * 10, 'ZXCVB'[i % 5]) for i in range(1000)])
+        out, report = apply_budget(table, KeyBudget(keys_per_sec=20, burst=1, same_key_gap_ms=0, max_shift_ms=0))
+        assert len(out) == 200
+        assert all(b - a >= 50 for a, b in zip(out.times, out.times[1:]))
+        assert report.dropped == 800
+        assert str(report).startswith('800 of 1000')
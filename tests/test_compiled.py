@@ -0,0 +1,58 @@
+"""Tests for midi_to_macro.compiled: binary song round trip through mmap."""
+
+from pathlib import Path
+
+import pytest
+
+from midi_to_macro.compiled import COMPILED_SUFFIX, load_compiled, write_compiled
+from midi_to_macro.events import EventTable
+from midi_to_macro.midi import compile_midi
+
+SAMPLE = Path(__file__).resolve().parent.parent / 'sample' / 'sample.mid'
+
+
+class TestCompiledSong:
+    def test_round_trip(self, tmp_path):
+        events = [(0, [], 'Z'), (0, ['SHIFT'], 'X'), (125, ['CTRL'], 'X'), (70000, [], 'Q')]
+        path = str(tmp_path / ('song' + COMPILED_SUFFIX))
+        write_compiled(path, events)
+        with load_compiled(path) as song:
+            assert len(song) == 4
+            assert song.table.to_list() == events
+            assert list(song.table.frames())[0] == (0, [(0, ord('Z')), (1, ord('X'))])
+
+    def test_zero_copy_views(self, tmp_path):
+        path = str(tmp_path / ('song' + COMPILED_SUFFIX))
+        write_compiled(path, EventTable.from_events([(5, [], 'Z')]))
+        song = load_compiled(path)
+        assert isinstance(song.table.times, memoryview)
+        assert song.table.times.readonly
+        song.close()
+        song.close()
+
+    def test_sample(self, tmp_path):
+        if not SAMPLE.exists():
+            pytest.skip('sample/sample.mid not found')
+        table = compile_midi(str(SAMPLE))
+        path = str(tmp_path / ('sample' + COMPILED_SUFFIX))
+        write_compiled(path, table)
+        with load_compiled(path) as song:
+            assert list(song.table.iter_raw()) == list(table.iter_raw())
+
+    def test_empty(self, tmp_path):
+        path = str(tmp_path / ('empty' + COMPILED_SUFFIX))
+        write_compiled(path, [])
+        with load_compiled(path) as song:
+            assert len(song) == 0
+
+    def test_rejects_bad_files(self, tmp_path):
+        bad = tmp_path / 'bad.mcrc'
+        bad.write_bytes(b'MThd' + bytes(20))
+        with pytest.raises(ValueError):
+            load_compiled(str(bad))
+        path = str(tmp_path / ('song' + COMPILED_SUFFIX))
+        write_compiled(path, [(0, [], 'Z'), (1, [], 'X')])
+        data = Path(path).read_bytes()
+        Path(path).write_bytes(data[:-1])
+        with pytest.raises(ValueError, match='truncated'):
+            load_compiled(path)
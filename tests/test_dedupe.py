@@ -0,0 +1,41 @@
+"""Tests for midi_to_macro.dedupe: duplicate keys in chord frames."""
+
+from midi_to_macro.dedupe import DedupeReport, dedupe, dedupe_frame
+from midi_to_macro.events import MOD_CTRL, MOD_SHIFT, EventTable
+from midi_to_macro.midi import build_mcr_lines
+
+Z, X = ord('Z'), ord('X')
+
+
+class TestDedupeFrame:
+    def test_single_note_untouched(self):
+        frame = [(0, Z)]
+        assert dedupe_frame(frame) is frame
+
+    def test_duplicates_removed(self):
+        report = DedupeReport()
+        assert dedupe_frame([(0, Z), (0, X), (0, Z), (MOD_SHIFT, Z), (MOD_SHIFT, Z)], report) == [
+            (0, Z), (0, X), (MOD_SHIFT, Z),
+        ]
+        assert (report.total, report.removed, report.keystrokes_saved) == (5, 2, 3)
+
+    def test_order_kept(self):
+        report = DedupeReport()
+        frame = [(MOD_CTRL, X), (MOD_SHIFT, Z), (0, Z)]
+        # Send order is left to modifiers.ModifierState.order
+        assert dedupe_frame(frame, report) == frame
+        assert report.removed == 0
+
+
+class TestDedupe:
+    def test_table(self):
+        table = EventTable.from_events([(0, [], 'Z'), (0, [], 'Z'), (10, [], 'Z'), (10, ['SHIFT'], 'X'), (10, [], 'X')])
+        out, report = dedupe(table)
+        assert out.to_list() == [(0, [], 'Z'), (10, [], 'Z'), (10, ['SHIFT'], 'X'), (10, [], 'X')]
+        assert report.removed == 1
+        assert str(report).startswith('1 of 5')
+
+    def test_mcr_writes_each_key_once(self):
+        lines = build_mcr_lines([(0, [], 'Z'), (0, [], 'Z'), (0, ['SHIFT'], 'Z')])
+        assert lines.count('Keyboard : Z : KeyDown') == 2
+        assert lines.index('Keyboard : ShiftLeft : KeyDown') > lines.index('Keyboard : Z : KeyUp')
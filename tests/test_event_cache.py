@@ -0,0 +1,89 @@
+"""Tests for midi_to_macro.event_cache: entry round trip, LRU eviction, cached note loading."""
+
+import os
+import time
+from array import array
+from pathlib import Path
+
+import pytest
+
+from midi_to_macro import midi
+from midi_to_macro.event_cache import EventCache, NoteCollector
+
+SAMPLE = Path(__file__).resolve().parent.parent / 'sample' / 'sample.mid'
+
+
+class TestEventCache:
+    """Test store/load and eviction."""
+
+    def test_round_trip(self, tmp_path):
+        cache = EventCache(str(tmp_path))
+        key = cache.key_for_bytes(b'song')
+        assert cache.load(key) is None
+        cache.store(key, array('d', [0.0, 12.5]), array('B', [60, 61]), decode_ms=3.0)
+        times, notes = cache.load(key)
+        assert list(times) == [0.0, 12.5]
+        assert list(notes) == [60, 61]
+
+    def test_key_depends_on_content(self):
+        assert EventCache.key_for_bytes(b'a') != EventCache.key_for_bytes(b'b')
+        assert EventCache.key_for_bytes(b'a') == EventCache.key_for_bytes(b'a')
+
+    def test_corrupt_entry_is_discarded(self, tmp_path):
+        cache = EventCache(str(tmp_path))
+        cache.store('k', array('d', [1.0]), array('B', [60]))
+        path = os.path.join(cache.cache_dir, 'k.notes')
+        with open(path, 'r+b') as f:
+            f.truncate(10)
+        assert cache.load('k') is None
+        assert not os.path.exists(path)
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = EventCache(str(tmp_path), max_bytes=10**6)
+        notes = array('B', [60] * 1000)
+        times = array('d', [0.0] * 1000)
+        for i, key in enumerate(['a', 'b', 'c']):
+            cache.store(key, times, notes)
+            stamp = time.time() - 100 + i
+            os.utime(os.path.join(cache.cache_dir, key + '.notes'), (stamp, stamp))
+        cache.load('a')  # refresh 'a'
+        entry_size = cache.size_bytes() // 3
+        cache.max_bytes = entry_size * 2
+        assert cache.evict() == 1
+        assert cache.load('b') is None
+        assert cache.load('a') is not None
+        assert cache.load('c') is not None
+
+
+class TestNoteCollector:
+    """Test that the collector keeps a copy of what it streams."""
+
+    def test_finish_drains_remainder(self):
+        collector = NoteCollector(iter([(0.0, 60), (5.0, 62), (9.0, 64)]))
+        assert next(collector) == (0.0, 60)
+        assert not collector.complete
+        times, notes = collector.finish()
+        assert collector.complete
+        assert list(times) == [0.0, 5.0, 9.0]
+        assert list(notes) == [60, 62, 64]
+
+
+class TestCachedLoad:
+    """Test midi.load_notes with a cache."""
+
+    def test_second_load_skips_parsing(self, tmp_path, monkeypatch):
+        if not SAMPLE.exists():
+            pytest.skip('sample/sample.mid not found')
+        cache = EventCache(str(tmp_path))
+        first = midi.load_notes(str(SAMPLE), cache)
+
+        def fail(path):
+            raise AssertionError('parsed again')
+
+        monkeypatch.setattr(midi, 'decode_notes', fail)
+        second = midi.load_notes(str(SAMPLE), cache)
+        assert list(first[0]) == list(second[0])
+        assert list(first[1]) == list(second[1])
+        table = midi.compile_midi(str(SAMPLE), cache=cache)
+        monkeypatch.undo()
+        assert table.to_list() == midi.parse_midi(str(SAMPLE))
@@ -0,0 +1,82 @@
+"""Tests for midi_to_macro.events: EventTable storage and legacy tuple compatibility."""
+
+import pytest
+
+from midi_to_macro.events import (
+    MOD_CTRL,
+    MOD_SHIFT,
+    EventTable,
+    iter_frames,
+    mask_to_mods,
+    mods_to_mask,
+)
+
+
+class TestModifierMask:
+    """Test conversion between modifier lists and masks."""
+
+    def test_round_trip(self):
+        assert mods_to_mask([]) == 0
+        assert mods_to_mask(['SHIFT']) == MOD_SHIFT
+        assert mods_to_mask(['CTRL']) == MOD_CTRL
+        assert mask_to_mods(MOD_SHIFT | MOD_CTRL) == ['SHIFT', 'CTRL']
+
+    def test_mask_to_mods_returns_fresh_list(self):
+        a = mask_to_mods(MOD_SHIFT)
+        a.append('X')
+        assert mask_to_mods(MOD_SHIFT) == ['SHIFT']
+
+
+class TestEventTable:
+    """Test EventTable construction and iteration."""
+
+    def test_from_events_iterates_legacy_tuples(self):
+        events = [(0, [], 'Z'), (0, ['CTRL'], 'X'), (214, ['SHIFT'], 'Q')]
+        table = EventTable.from_events(events)
+        assert len(table) == 3
+        assert list(table) == events
+        assert table[1] == (0, ['CTRL'], 'X')
+        assert table.to_list() == events
+
+    def test_iter_raw(self):
+        table = EventTable.from_events([(5, ['SHIFT'], 'A')])
+        assert list(table.iter_raw()) == [(5, MOD_SHIFT, ord('A'))]
+
+    def test_coerce_returns_same_table(self):
+        table = EventTable()
+        assert EventTable.coerce(table) is table
+        assert isinstance(EventTable.coerce([(0, [], 'Z')]), EventTable)
+
+    def test_compact_storage(self):
+        table = EventTable.from_events([(i, [], 'Z') for i in range(1000)])
+        assert table.nbytes() == 1000 * (table.times.itemsize + 2)
+        assert table.duration_ms() == 999
+
+    def test_rejects_multi_char_key(self):
+        with pytest.raises(ValueError):
+            EventTable.from_events([(0, [], 'ShiftLeft')])
+
+    def test_mismatched_arrays_raise(self):
+        from array import array
+        with pytest.raises(ValueError):
+            EventTable(array('i', [0]), array('B'), array('B'))
+
+
+class TestIterFrames:
+    def test_groups_same_time(self):
+        events = [(0, 0, 90), (0, MOD_SHIFT, 88), (120, 0, 67), (300, 0, 86), (300, 0, 66)]
+        assert list(iter_frames(events)) == [
+            (0, [(0, 90), (MOD_SHIFT, 88)]),
+            (120, [(0, 67)]),
+            (300, [(0, 86), (0, 66)]),
+        ]
+
+    def test_empty(self):
+        assert list(iter_frames([])) == []
+
+    def test_first_frame_not_at_zero(self):
+        assert list(iter_frames(iter([(50, 0, 90)]))) == [(50, [(0, 90)])]
+
+    def test_table_frames(self):
+        table = EventTable.from_events([(0, [], 'Z'), (0, ['CTRL'], 'X')])
+        assert list(table.frames()) == [(0, [(0, ord('Z')), (MOD_CTRL, ord('X'))])]
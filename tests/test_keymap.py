@@ -0,0 +1,85 @@
+"""Tests for midi_to_macro.keymap: default profile table, profile files."""
+
+import json
+
+import pytest
+
+from midi_to_macro.events import MOD_CTRL, MOD_SHIFT
+from midi_to_macro.keymap import (
+    DEFAULT_KEYMAP,
+    HIGH_KEYS,
+    LOW_KEYS,
+    MID_KEYS,
+    Keymap,
+    available_keymaps,
+    load_keymap,
+)
+
+
+def _reference_mapping(note):
+    """Original per-note row/black-key logic the default table must reproduce."""
+    note = min(max(note, 0), 95)
+    semitone = note % 12
+    key_index = (0, 0, 1, 1, 2, 3, 3, 4, 4, 5, 5, 6)[semitone]
+    if semitone in (1, 3, 6, 8, 10):
+        mask = MOD_CTRL if (note < 60 and key_index == 1) else MOD_SHIFT
+    else:
+        mask = 0
+    row = LOW_KEYS if note < 60 else (MID_KEYS if note < 72 else HIGH_KEYS)
+    return (mask, row[key_index])
+
+
+class TestDefaultKeymap:
+    """Test the compiled default profile."""
+
+    def test_matches_reference_for_all_notes(self):
+        for note in range(-20, 150):
+            assert DEFAULT_KEYMAP.lookup(note) == _reference_mapping(note), note
+
+    def test_table_has_128_entries(self):
+        assert len(DEFAULT_KEYMAP.masks) == 128
+        assert len(DEFAULT_KEYMAP.codes) == 128
+
+
+class TestLoadKeymap:
+    """Test loading profiles from JSON files."""
+
+    def test_rows_ctrl_and_overrides(self, tmp_path):
+        path = tmp_path / 'two_rows.json'
+        path.write_text(json.dumps({
+            'name': 'Two rows',
+            'note_min': 48,
+            'note_max': 71,
+            'rows': [
+                {'start': 60, 'keys': list('ASDFGHJ'), 'ctrl': [5]},
+                {'start': 0, 'keys': list('ZXCVBNM')},
+            ],
+            'notes': {'72': 'CTRL+Q'},
+        }), encoding='utf-8')
+        km = load_keymap(str(path))
+        assert km.name == 'Two rows'
+        assert km.lookup(48) == (0, 'Z')
+        assert km.lookup(30) == (0, 'Z')       # clamped up to note_min
+        assert km.lookup(70) == (MOD_CTRL, 'H')  # A# on second row uses CTRL
+        assert km.lookup(51) == (MOD_SHIFT, 'X')
+        assert km.lookup(72) == (MOD_CTRL, 'Q')  # override
+        assert km.lookup(80) == (0, 'J')       # clamped down to note_max
+
+    def test_invalid_file_raises(self, tmp_path):
+        path = tmp_path / 'bad.json'
+        path.write_text('{"rows": [{"start": 0, "keys": ["Z"]}]}', encoding='utf-8')
+        with pytest.raises(ValueError):
+            load_keymap(str(path))
+        path.write_text('not json', encoding='utf-8')
+        with pytest.raises(ValueError):
+            load_keymap(str(path))
+
+    def test_available_keymaps_includes_default_and_files(self, tmp_path):
+        folder = tmp_path / 'keymaps'
+        folder.mkdir()
+        (folder / 'flute.json').write_text(
+            json.dumps({'rows': [{'start': 0, 'keys': list('QWERTYU')}]}), encoding='utf-8')
+        (folder / 'broken.json').write_text('{', encoding='utf-8')
+        maps = available_keymaps(str(tmp_path))
+        assert set(maps) == {'Default', 'flute'}
+        assert isinstance(maps['flute'], Keymap)
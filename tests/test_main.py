@@ -24,8 +24,9 @@ def test_build_mcr_lines_groups_and_modifiers(tmp_path):
         (214, [], 'X'),
     ]
     lines = build_mcr_lines(events)
-    # Expect a leading DELAY : 0
-    assert any(l.startswith('DELAY : 0') for l in lines)
+    # First note at 0ms: no leading delay, and never a zero delay
+    assert not lines[0].startswith('DELAY')
+    assert 'DELAY : 0' not in lines
     # CTRL modifier should produce ControlLeft KeyDown and KeyUp
     assert any('ControlLeft : KeyDown' in l for l in lines)
     assert any('ControlLeft : KeyUp' in l for l in lines)
@@ -0,0 +1,86 @@
+"""Tests for midi_to_macro.mcr: reading .mcr lines back into timed key events."""
+
+from pathlib import Path
+
+import pytest
+
+from midi_to_macro.dedupe import dedupe
+from midi_to_macro.events import MOD_CTRL, MOD_SHIFT, EventTable
+from midi_to_macro.mcr import first_difference, iter_mcr_events, read_mcr
+from midi_to_macro.midi import build_mcr_lines, compile_midi, export_mcr
+from midi_to_macro.modifiers import group_modifiers
+
+SAMPLE_DIR = Path(__file__).resolve().parent.parent / 'sample'
+
+
+class TestIterMcrEvents:
+    def test_delays_accumulate(self):
+        lines = [
+            'DELAY : 0', 'Keyboard : Z : KeyDown', 'Keyboard : Z : KeyUp',
+            'DELAY : 120', 'Keyboard : X : KeyDown', 'Keyboard : X : KeyUp',
+            'DELAY : 30', 'Keyboard : C : KeyDown', 'Keyboard : C : KeyUp',
+        ]
+        assert list(iter_mcr_events(lines)) == [(0, 0, ord('Z')), (120, 0, ord('X')), (150, 0, ord('C'))]
+
+    def test_modifiers_and_modifier_delay(self):
+        lines = [
+            'Keyboard : ShiftLeft : KeyDown\n', 'DELAY : 2\n',
+            'Keyboard : Q : KeyDown\n', 'Keyboard : Q : KeyUp\n', 'Keyboard : ShiftLeft : KeyUp\n',
+            'DELAY : 100\n', 'Keyboard : ControlLeft : KeyDown\n', 'DELAY : 2\n',
+            'Keyboard : X : KeyDown\n', 'Keyboard : X : KeyUp\n', 'Keyboard : ControlLeft : KeyUp\n',
+            '\n',
+        ]
+        assert list(iter_mcr_events(lines)) == [(0, MOD_SHIFT, ord('Q')), (100, MOD_CTRL, ord('X'))]
+
+    def test_delay_with_modifier_held(self):
+        lines = [
+            'Keyboard : ShiftLeft : KeyDown', 'DELAY : 2', 'Keyboard : Q : KeyDown', 'Keyboard : Q : KeyUp',
+            'DELAY : 100', 'Keyboard : A : KeyDown', 'Keyboard : A : KeyUp', 'Keyboard : ShiftLeft : KeyUp',
+        ]
+        assert list(iter_mcr_events(lines)) == [(0, MOD_SHIFT, ord('Q')), (100, MOD_SHIFT, ord('A'))]
+
+    def test_unknown_line_raises(self):
+        with pytest.raises(ValueError, match='Line 2'):
+            list(iter_mcr_events(['DELAY : 5', 'Mouse : 1 : 2']))
+
+    def test_round_trip_build_mcr_lines(self):
+        events = [(0, [], 'Z'), (0, ['SHIFT'], 'X'), (40, ['CTRL'], 'X'), (90, [], 'Q')]
+        table = EventTable.from_events(events)
+        back = EventTable()
+        for event in iter_mcr_events(build_mcr_lines(events)):
+            back.append(*event)
+        assert first_difference(table, back) is None
+
+
+class TestReadMcr:
+    @pytest.mark.parametrize('name', ['giorno', 'gnr'])
+    def test_export_round_trip(self, name, tmp_path):
+        mid = SAMPLE_DIR / f'{name}.mid'
+        if not mid.exists():
+            pytest.skip(f'sample/{name}.mid not found')
+        table = group_modifiers(dedupe(compile_midi(str(mid)))[0])
+        out = tmp_path / 'out.mcr'
+        export_mcr(str(out), table)
+        assert first_difference(table, read_mcr(str(out))) is None
+
+    def test_reads_sample_macros(self):
+        path = SAMPLE_DIR / 'gnr-correct.mcr'
+        if not path.exists():
+            pytest.skip('sample/gnr-correct.mcr not found')
+        table = read_mcr(str(path))
+        assert len(table) > 0
+        assert list(table.times) == sorted(table.times)
+
+
+class TestFirstDifference:
+    def test_reports_index(self):
+        a = EventTable.from_events([(0, [], 'Z'), (10, [], 'X'), (20, [], 'C')])
+        b = EventTable.from_events([(0, [], 'Z'), (11, [], 'X'), (20, ['SHIFT'], 'C')])
+        assert first_difference(a, b) == 1
+        assert first_difference(a, b, tolerance_ms=1) == 2
+
+    def test_length_mismatch(self):
+        a = EventTable.from_events([(0, [], 'Z')])
+        b = EventTable.from_events([(0, [], 'Z'), (5, [], 'X')])
+        assert first_difference(a, b) == 1
+        assert first_difference(a, a) is None
@@ -3,9 +3,15 @@
 import pytest
 from pathlib import Path
 
+from midi_to_macro.events import EventTable
+from midi_to_macro.keymap import Keymap
 from midi_to_macro.midi import (
     build_mcr_lines,
+    compile_midi,
+    convert_midi_to_mcr,
     export_mcr,
+    iter_events,
+    iter_raw_events,
     map_note_to_key,
     parse_midi,
 )
@@ -48,6 +54,11 @@ class TestMapNoteToKey:
         mods, key = map_note_to_key(-5)
         assert key == 'Z'
 
+    def test_custom_keymap(self):
+        km = Keymap.from_rows('High only', [(0, ['Q', 'W', 'E', 'R', 'T', 'Y', 'U'])])
+        assert map_note_to_key(48, km) == ([], 'Q')
+        assert map_note_to_key(49, km) == (['SHIFT'], 'Q')
+
 
 class TestBuildMcrLines:
     """Test build_mcr_lines output format."""
@@ -55,8 +66,7 @@ class TestBuildMcrLines:
     def test_single_note(self):
         events = [(0, [], 'Z')]
         lines = build_mcr_lines(events)
-        assert lines[0] == 'DELAY : 0'
-        assert 'Keyboard : Z : KeyDown' in lines
+        assert lines[0] == 'Keyboard : Z : KeyDown'
         assert 'Keyboard : Z : KeyUp' in lines
 
     def test_delay_between_notes(self):
@@ -71,10 +81,36 @@ class TestBuildMcrLines:
         assert 'Keyboard : ShiftLeft : KeyDown' in lines
         assert 'Keyboard : ShiftLeft : KeyUp' in lines
 
+    def test_modifier_held_across_notes(self):
+        events = [(0, ['SHIFT'], 'Q'), (100, ['SHIFT'], 'A'), (200, [], 'Z')]
+        lines = build_mcr_lines(events)
+        assert lines.count('Keyboard : ShiftLeft : KeyDown') == 1
+        assert lines.count('DELAY : 2') == 1
+        assert lines.index('Keyboard : ShiftLeft : KeyUp') < lines.index('Keyboard : Z : KeyDown')
+
+    def test_modifier_released_before_long_rest(self):
+        events = [(0, ['SHIFT'], 'Q'), (5000, ['SHIFT'], 'A')]
+        lines = build_mcr_lines(events)
+        assert lines.count('Keyboard : ShiftLeft : KeyDown') == 2
+        assert lines[-1] == 'Keyboard : ShiftLeft : KeyUp'
+
+    def test_accepts_event_table(self):
+        events = [(0, [], 'Z'), (100, ['CTRL'], 'X')]
+        assert build_mcr_lines(EventTable.from_events(events)) == build_mcr_lines(events)
+
     def test_chord_same_time(self):
         events = [(0, [], 'Z'), (0, [], 'X')]
         lines = build_mcr_lines(events)
-        assert lines.count('DELAY : 0') >= 1
+        assert lines == [
+            'Keyboard : Z : KeyDown', 'Keyboard : Z : KeyUp',
+            'Keyboard : X : KeyDown', 'Keyboard : X : KeyUp',
+        ]
+
+    def test_chord_single_delay(self):
+        events = [(0, [], 'Z'), (100, [], 'X'), (100, ['SHIFT'], 'C'), (250, [], 'V')]
+        lines = build_mcr_lines(events)
+        delays = [l for l in lines if l.startswith('DELAY') and l != 'DELAY : 2']
+        assert delays == ['DELAY : 100', 'DELAY : 150']
 
 
 class TestExportMcr:
@@ -87,10 +123,28 @@ class TestExportMcr:
         assert out.exists()
         content = out.read_text(encoding='utf-8')
         assert content.endswith('\n')
-        assert 'DELAY : 0' in content
+        assert 'DELAY : 0' not in content
         assert 'Keyboard : Z : KeyDown' in content
         assert 'Keyboard : ShiftLeft : KeyDown' in content
 
+    def test_matches_build_mcr_lines(self, tmp_path):
+        events = [(0, [], 'Z'), (0, ['CTRL'], 'X'), (50, ['SHIFT'], 'Q'), (75, [], 'W')]
+        out = tmp_path / 'out.mcr'
+        export_mcr(str(out), events)
+        assert out.read_text(encoding='utf-8') == '\n'.join(build_mcr_lines(events)) + '\n'
+
+    def test_streams_raw_events(self, tmp_path):
+        events = [(0, [], 'Z'), (50, ['SHIFT'], 'Q')]
+        out = tmp_path / 'out.mcr'
+        export_mcr(str(out), EventTable.from_events(events).iter_raw())
+        assert out.read_text(encoding='utf-8').splitlines() == build_mcr_lines(events)
+
+    def test_empty(self, tmp_path):
+        out = tmp_path / 'out.mcr'
+        export_mcr(str(out), [])
+        assert out.read_text(encoding='utf-8') == ''
+        assert build_mcr_lines([]) == []
+
 
 class TestParseMidi:
     """Test parse_midi with optional sample file."""
@@ -122,6 +176,58 @@ class TestParseMidi:
         events = parse_midi(str(sample_mid_path), transpose=12)
         assert isinstance(events, list)
 
+    def test_compile_midi_matches_parse_midi(self, sample_mid_path):
+        if not sample_mid_path:
+            pytest.skip('sample/sample.mid not found')
+        table = compile_midi(str(sample_mid_path), transpose=2)
+        assert isinstance(table, EventTable)
+        assert table.to_list() == parse_midi(str(sample_mid_path), transpose=2)
+
+    def test_compile_midi_with_keymap(self, sample_mid_path):
+        if not sample_mid_path:
+            pytest.skip('sample/sample.mid not found')
+        km = Keymap.from_rows('Low only', [(0, ['Z', 'X', 'C', 'V', 'B', 'N', 'M'])])
+        table = compile_midi(str(sample_mid_path), keymap=km)
+        assert set(chr(c) for c in table.keys) <= set('ZXCVBNM')
+
+    def test_convert_midi_to_mcr(self, sample_mid_path, tmp_path):
+        if not sample_mid_path:
+            pytest.skip('sample/sample.mid not found')
+        out = tmp_path / 'out.mcr'
+        n = convert_midi_to_mcr(str(sample_mid_path), str(out))
+        assert n == len(parse_midi(str(sample_mid_path)))
+        assert 'KeyDown' in out.read_text(encoding='utf-8')
+
+    def test_iter_events_matches_parse_midi(self, sample_mid_path):
+        if not sample_mid_path:
+            pytest.skip('sample/sample.mid not found')
+        it = iter_events(str(sample_mid_path), tempo_multiplier=1.5, transpose=-3)
+        assert not isinstance(it, list)
+        assert list(it) == parse_midi(str(sample_mid_path), tempo_multiplier=1.5, transpose=-3)
+
+    def test_iter_raw_events_is_lazy(self, sample_mid_path):
+        if not sample_mid_path:
+            pytest.skip('sample/sample.mid not found')
+        it = iter_raw_events(str(sample_mid_path))
+        first = next(it)
+        assert first == next(compile_midi(str(sample_mid_path)).iter_raw())
+
+    def test_tempo_change_keeps_earlier_notes(self, tmp_path):
+        import mido
+        mid = mido.MidiFile(ticks_per_beat=96)
+        track = mido.MidiTrack()
+        mid.tracks.append(track)
+        track.append(mido.Message('note_on', note=60, velocity=64, time=0))
+        track.append(mido.Message('note_on', note=62, velocity=64, time=96))
+        track.append(mido.MetaMessage('set_tempo', tempo=250_000, time=96))
+        track.append(mido.Message('note_on', note=64, velocity=64, time=0))
+        track.append(mido.Message('note_on', note=65, velocity=64, time=96))
+        path = tmp_path / 'tempo.mid'
+        mid.save(str(path))
+        expected = [0, 500, 1000, 1250]
+        assert [t for t, _, _ in parse_midi(str(path))] == expected
+        assert [t for t, _, _ in iter_events(str(path))] == expected
+
     def test_parse_midi_invalid_path_raises(self):
         with pytest.raises((FileNotFoundError, OSError)):
             parse_midi('nonexistent_file_12345.mid')
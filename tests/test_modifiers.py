@@ -0,0 +1,45 @@
+"""Tests for midi_to_macro.modifiers: modifier changes, chord grouping and hold limit."""
+
+from midi_to_macro.events import MOD_CTRL, MOD_SHIFT, EventTable
+from midi_to_macro.modifiers import MODIFIER_HOLD_MS, ModifierState, group_modifiers
+
+
+class TestModifierState:
+    def test_run_of_shift_notes_presses_once(self):
+        state = ModifierState()
+        changes = [state.change(MOD_SHIFT) for _ in range(8)]
+        assert changes[0] == (0, MOD_SHIFT)
+        assert changes[1:] == [(0, 0)] * 7
+        assert (state.presses, state.naive) == (1, 8)
+        assert state.release_all() == MOD_SHIFT
+        assert state.held == 0
+
+    def test_switch_modifier(self):
+        state = ModifierState()
+        state.change(MOD_SHIFT)
+        assert state.change(MOD_CTRL) == (MOD_SHIFT, MOD_CTRL)
+        assert state.change(0) == (MOD_CTRL, 0)
+
+    def test_order_puts_held_group_first(self):
+        state = ModifierState()
+        frame = [(MOD_CTRL, 1), (0, 2), (MOD_SHIFT, 3), (0, 4)]
+        assert state.order(frame) == [(0, 2), (0, 4), (MOD_SHIFT, 3), (MOD_CTRL, 1)]
+        state.change(MOD_SHIFT)
+        assert state.order(frame) == [(MOD_SHIFT, 3), (0, 2), (0, 4), (MOD_CTRL, 1)]
+        assert state.reordered == 2
+        assert state.order([(0, 2), (MOD_SHIFT, 3)]) == [(MOD_SHIFT, 3), (0, 2)]
+        assert state.order([(MOD_SHIFT, 3), (0, 2)]) == [(MOD_SHIFT, 3), (0, 2)]
+        assert state.reordered == 3
+
+
+class TestGroupModifiers:
+    def test_frames_follow_held_modifier(self):
+        table = EventTable()
+        table.append(0, MOD_SHIFT, ord('Q'))
+        table.append(10, 0, ord('W'))
+        table.append(10, MOD_SHIFT, ord('E'))
+        table.append(10 + MODIFIER_HOLD_MS + 1, 0, ord('R'))
+        table.append(10 + MODIFIER_HOLD_MS + 1, MOD_SHIFT, ord('T'))
+        grouped = group_modifiers(table)
+        # Shift still held at 10 ms: its group goes first; after the long rest it was released
+        assert list(grouped.keys) == [ord(c) for c in 'QEWRT']
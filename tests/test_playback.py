@@ -0,0 +1,297 @@
+"""Tests for midi_to_macro.playback driven through the recording and null key outputs."""
+
+import threading
+import time
+
+import pytest
+
+from midi_to_macro import playback
+from midi_to_macro.compiled import COMPILED_SUFFIX, write_compiled
+from midi_to_macro.event_cache import EventCache
+from midi_to_macro.events import MOD_CTRL, MOD_SHIFT, EventTable
+from midi_to_macro.midi import compile_midi
+from midi_to_macro.output import NullOutput, RecordingOutput, create_output
+from midi_to_macro.scheduler import SKIP, STRETCH, CatchUp, Scheduler
+from midi_to_macro.session import PlaybackSession
+from midi_to_macro.telemetry import TimingLog
+
+
+def _table(*events):
+    table = EventTable()
+    for t, mask, key in events:
+        table.append(t, mask, ord(key))
+    return table
+
+
+class StallingOutput(RecordingOutput):
+    """Recording output whose first send blocks, like a stalled key injection."""
+
+    def __init__(self, stall_ms):
+        super().__init__()
+        self.stall_ms = stall_ms
+
+    def send(self, ops):
+        super().send(ops)
+        if self.stall_ms:
+            time.sleep(self.stall_ms / 1000)
+            self.stall_ms = 0
+
+
+class TestRunPlayback:
+    def test_key_operations(self):
+        out = RecordingOutput()
+        table = _table((0, 0, 'Q'), (5, MOD_SHIFT, 'A'), (5, MOD_CTRL, 'Z'))
+        assert playback.run_playback(table, lambda: True, output=out)
+        assert [(p, k) for _, p, k in out.ops] == [
+            (True, 'q'), (False, 'q'),
+            (True, 'shift'), (True, 'a'), (False, 'a'), (False, 'shift'),
+            (True, 'ctrl'), (True, 'z'), (False, 'z'), (False, 'ctrl'),
+        ]
+
+    def test_modifier_held_across_notes(self):
+        out = RecordingOutput()
+        table = _table(*[(i, MOD_SHIFT, 'Q') for i in range(4)], (4, 0, 'W'))
+        playback.run_playback(table, lambda: True, output=out)
+        keys = [('+' if p else '-') + k for _, p, k in out.ops]
+        assert keys == ['+shift'] + ['+q', '-q'] * 4 + ['-shift', '+w', '-w']
+
+    def test_modifier_released_when_stopped(self):
+        out = RecordingOutput()
+        played = []
+
+        def is_playing():
+            played.append(1)
+            return len(played) == 1
+
+        playback.run_playback(_table((0, MOD_SHIFT, 'Q'), (1, MOD_SHIFT, 'W')), is_playing, output=out)
+        assert out.ops[-1][1:] == (False, 'shift')
+
+    def test_chord_duplicates_removed(self):
+        out = RecordingOutput()
+        playback.run_playback(_table((0, 0, 'Q'), (0, 0, 'Q'), (0, 0, 'W')), lambda: True, output=out)
+        assert out.presses() == ['q', 'w']
+
+    def test_keys_not_sent_early(self):
+        out = RecordingOutput()
+        scheduler = Scheduler()
+        table = _table((0, 0, 'Q'), (10, 0, 'W'), (20, 0, 'E'))
+        playback.run_playback(table, lambda: True, scheduler=scheduler, output=out)
+        pressed_ms = [(t - scheduler.t0_ns) / 1e6 for t, is_press, _ in out.ops if is_press]
+        for actual, deadline in zip(pressed_ms, (0, 10, 20)):
+            assert actual >= deadline
+
+    def test_progress_and_stop(self):
+        progress = []
+        played = []
+
+        def is_playing():
+            played.append(1)
+            return len(played) <= 2
+
+        table = _table((0, 0, 'Q'), (0, 0, 'W'), (1, 0, 'E'), (2, 0, 'R'))
+        finished = playback.run_playback(table, is_playing, lambda c, t: progress.append((c, t)), output=NullOutput())
+        assert finished is False
+        assert progress == [(0, 4), (2, 4)]
+
+    def test_catch_up_skip_after_stall(self):
+        out = StallingOutput(stall_ms=55)
+        scheduler = Scheduler(catch_up=CatchUp(SKIP, late_ms=20))
+        table = _table(*[(t, 0, 'Q') for t in range(0, 100, 10)])
+        playback.run_playback(table, lambda: True, scheduler=scheduler, output=out)
+        # The first key stalls 55 ms: the frames due at 10..30 ms are over 20 ms late and skipped
+        assert scheduler.catch_up.skipped == 3
+        assert len(out.presses()) == 7
+
+    def test_catch_up_stretch_keeps_spacing(self):
+        out = StallingOutput(stall_ms=60)
+        scheduler = Scheduler(catch_up=CatchUp(STRETCH, late_ms=20, stretch_ms=1000))
+        table = _table(*[(t, 0, 'Q') for t in range(0, 100, 10)])
+        playback.run_playback(table, lambda: True, scheduler=scheduler, output=out)
+        pressed = [t for t, is_press, _ in out.ops if is_press]
+        gaps_ms = [(b - a) / 1e6 for a, b in zip(pressed[1:], pressed[2:])]
+        assert len(pressed) == 10
+        assert min(gaps_ms) > 5  # no back-to-back burst after the stall
+
+    def test_timing_recorded(self):
+        timing = TimingLog(capacity=16)
+        table = _table((0, 0, 'Q'), (3, 0, 'W'), (3, 0, 'E'))
+        playback.run_playback(table, lambda: True, timing=timing, output=NullOutput())
+        rows = timing.rows()
+        assert [row[0] for row in rows] == [0.0, 3.0, 3.0]
+        assert all(late >= 0 for _, _, late in rows)
+
+
+class TestSession:
+    def test_seek_skips_ahead(self):
+        out = RecordingOutput()
+        session = PlaybackSession()
+        progress = []
+
+        def on_progress(current, total):
+            progress.append(current)
+            if current == 0:
+                session.seek(900)
+
+        table = _table(*[(t * 100, 0, 'QWERTYUASDF'[t]) for t in range(11)])
+        start = time.monotonic()
+        assert playback.run_playback(table, lambda: True, on_progress, output=out, session=session)
+        assert out.presses() == ['d', 'f']  # the seek also cancels the frame it interrupted
+        assert progress == [0, 9, 9, 10, 11]
+        assert time.monotonic() - start < 0.5
+
+    def test_pause_keeps_remaining_gaps(self):
+        out = RecordingOutput()
+        session = PlaybackSession()
+        resume = threading.Timer(0.05, session.resume)
+
+        def on_progress(current, total):
+            # Pause once before the second frame (it is waited for again after resume)
+            if current == 1 and not resume.is_alive() and not resume.finished.is_set():
+                session.pause()
+                resume.start()
+
+        table = _table((0, MOD_SHIFT, 'Q'), (20, MOD_SHIFT, 'W'), (40, 0, 'E'))
+        assert playback.run_playback(table, lambda: True, on_progress, output=out, session=session)
+        pressed = [t for t, is_press, key in out.ops if is_press and key != 'shift']
+        gaps_ms = [(b - a) / 1e6 for a, b in zip(pressed, pressed[1:])]
+        assert gaps_ms[0] >= 60
+        assert 15 < gaps_ms[1] < 45
+        # Shift is released while paused and pressed again for W
+        assert [k for _, p, k in out.ops].count('shift') == 4
+
+    def test_live_tempo_change(self):
+        out = RecordingOutput()
+        session = PlaybackSession()
+        changed = []
+
+        def on_progress(current, total):
+            # Once, while waiting for the second frame (which is then waited for again)
+            if current == 1 and not changed:
+                changed.append(1)
+                session.set_rate(0.25)
+
+        table = _table((0, 0, 'Q'), (100, 0, 'W'), (200, 0, 'E'), (300, 0, 'R'))
+        assert playback.run_playback(table, lambda: True, on_progress, output=out, session=session)
+        pressed = [t for t, is_press, _ in out.ops if is_press]
+        gaps_ms = [(b - a) / 1e6 for a, b in zip(pressed, pressed[1:])]
+        # From the change on, 100 ms of song plays in 25 ms
+        assert gaps_ms[0] < 60
+        assert all(20 <= gap < 45 for gap in gaps_ms[1:])
+
+    def test_stop_interrupts_long_rest(self):
+        session = PlaybackSession()
+        out = RecordingOutput()
+        threading.Timer(0.05, session.stop).start()
+        start = time.monotonic()
+        assert not playback.run_playback(
+            _table((0, 0, 'Q'), (5000, 0, 'W')), lambda: True, output=out, session=session,
+        )
+        assert time.monotonic() - start < 0.2
+        assert out.presses() == ['q']
+
+    def test_stop_while_paused(self):
+        session = PlaybackSession()
+        session.pause()
+        stopped = threading.Event()
+        threading.Timer(0.03, stopped.set).start()
+        table = _table((0, 0, 'Q'), (10, 0, 'W'))
+        assert not playback.run_playback(table, lambda: not stopped.is_set(), output=NullOutput(), session=session)
+
+
+def _write_mid(path, notes, step_ms):
+    """Notes step_ms apart (one tick per ms)."""
+    import mido
+    mid = mido.MidiFile(ticks_per_beat=96)
+    track = mido.MidiTrack([mido.MetaMessage('set_tempo', tempo=96_000, time=0)])
+    for i, note in enumerate(notes):
+        track.append(mido.Message('note_on', note=note, velocity=64, time=0 if i == 0 else step_ms))
+    mid.tracks.append(track)
+    mid.save(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def scale_mid(tmp_path):
+    """Eleven white-key notes 100 ms apart."""
+    return _write_mid(tmp_path / 'scale.mid', (60, 62, 64, 65, 67, 69, 71, 72, 74, 76, 77), 100)
+
+
+def _seek_once(session, time_ms):
+    """Progress callback seeking to time_ms when the first frame is reached."""
+    def on_progress(current, total):
+        if current == 0:
+            session.seek(time_ms)
+    return on_progress
+
+
+class TestRunPlaybackFromFile:
+    def test_session_streams(self, scale_mid, monkeypatch):
+        def load_events(*args, **kwargs):
+            raise AssertionError('the whole song was loaded before playing')
+        monkeypatch.setattr(playback, 'load_events', load_events)
+        out = RecordingOutput()
+        finished = []
+        playback.run_playback_from_file(
+            scale_mid, 0.1, 0, lambda: True, done_callback=finished.append, output=out, session=PlaybackSession(),
+        )
+        assert finished == [True]
+        assert out.presses() == [playback._key_char(k) for k in compile_midi(scale_mid).keys]
+
+    @pytest.mark.parametrize('cached', [False, True])
+    def test_seek_loads_streamed_song(self, scale_mid, tmp_path, cached):
+        cache = EventCache(str(tmp_path)) if cached else None
+        out = RecordingOutput()
+        session = PlaybackSession()
+        progress = []
+        seek = _seek_once(session, 900)
+        start = time.monotonic()
+        playback.run_playback_from_file(
+            scale_mid, 1.0, 0, lambda: True, lambda c, t: (progress.append(t), seek(c, t)),
+            cache=cache, output=out, session=session,
+        )
+        assert time.monotonic() - start < 0.5
+        keys = compile_midi(scale_mid).keys
+        assert out.presses() == [playback._key_char(k) for k in keys[9:]]
+        # The length is known from the seek on
+        assert progress[0] == 0 and progress[-1] == 11
+        if cached:
+            assert cache.load(cache.key_for_file(scale_mid)) is not None
+
+    def test_stopped_song_not_cached(self, tmp_path):
+        # Longer than the lookahead, so stopping leaves part of the file undecoded
+        long_mid = _write_mid(tmp_path / 'long.mid', [60 + i % 12 for i in range(playback.LOOKAHEAD * 2)], 10)
+        cache = EventCache(str(tmp_path))
+        session = PlaybackSession()
+
+        def on_progress(current, total):
+            if current == 1:
+                session.stop()
+
+        playback.run_playback_from_file(
+            long_mid, 1.0, 0, lambda: True, on_progress, cache=cache, output=NullOutput(), session=session,
+        )
+        assert cache.load(cache.key_for_file(long_mid)) is None
+        playback.run_playback_from_file(long_mid, 0.01, 0, lambda: True, cache=cache, output=NullOutput())
+        assert cache.load(cache.key_for_file(long_mid)) is not None
+
+    def test_compiled_song_seeks_in_mapping(self, tmp_path):
+        path = str(tmp_path / ('song' + COMPILED_SUFFIX))
+        write_compiled(path, _table(*[(t * 100, 0, 'QWERTYUASDF'[t]) for t in range(11)]))
+        out = RecordingOutput()
+        session = PlaybackSession()
+        finished = []
+        playback.run_playback_from_file(
+            path, 1.0, 0, lambda: True, _seek_once(session, 900), finished.append, output=out, session=session,
+        )
+        assert finished == [True]
+        assert out.presses() == ['d', 'f']
+
+
+class TestCreateOutput:
+    def test_by_name(self):
+        assert isinstance(create_output('null'), NullOutput)
+        assert isinstance(create_output('record'), RecordingOutput)
+
+    def test_unknown(self):
+        with pytest.raises(ValueError):
+            create_output('midi')
@@ -0,0 +1,71 @@
+"""Tests for midi_to_macro.playback_worker: a real worker process with the null key output."""
+
+import threading
+import time
+
+import pytest
+
+from midi_to_macro.events import EventTable
+from midi_to_macro.playback_worker import PlaybackWorker
+from midi_to_macro.telemetry import TimingLog
+
+
+def _table(n, step_ms):
+    table = EventTable()
+    for i in range(n):
+        table.append(i * step_ms, 0, ord('Q'))
+    return table
+
+
+@pytest.fixture(scope='module')
+def worker():
+    worker = PlaybackWorker(output='null')
+    yield worker
+    worker.close()
+    assert not worker.is_alive()
+
+
+class TestPlaybackWorker:
+    def test_plays_to_end(self, worker):
+        progress = []
+        timing = TimingLog()
+        assert worker.run(_table(20, 2), lambda: True, lambda c, t: progress.append((c, t)), timing=timing)
+        assert progress[-1] == (20, 20)
+        assert len(timing) == 20
+
+    def test_stop_from_is_playing(self, worker):
+        playing = [True]
+        threading.Timer(0.1, lambda: playing.__setitem__(0, False)).start()
+        start = time.monotonic()
+        assert not worker.run(_table(100, 50), lambda: playing[0])
+        assert time.monotonic() - start < 1.0
+
+    def test_pause_and_seek(self, worker):
+        progress = []
+
+        def control():
+            time.sleep(0.1)
+            worker.pause()
+            time.sleep(0.1)
+            # Jump to the last event (paused playback stays paused until resumed)
+            worker.seek(990)
+            worker.resume()
+
+        threading.Thread(target=control).start()
+        start = time.monotonic()
+        assert worker.run(_table(100, 10), lambda: True, lambda c, t: progress.append(c))
+        assert time.monotonic() - start < 0.6
+        assert 99 in progress and progress[-1] == 100
+
+    def test_commands_right_after_play(self, worker):
+        progress = []
+
+        def on_started():
+            # Sent before the worker's playback thread has picked the song up
+            worker.seek(990)
+            worker.set_rate(0.5)
+
+        start = time.monotonic()
+        assert worker.run(_table(100, 10), lambda: True, lambda c, t: progress.append(c), on_started=on_started)
+        assert time.monotonic() - start < 0.5
+        assert progress[-1] == 100 and len(progress) <= 3
@@ -0,0 +1,109 @@
+"""Tests for midi_to_macro.scheduler: deadlines are never early, and settings are validated."""
+
+import threading
+import time
+
+import pytest
+
+from midi_to_macro.scheduler import BURST, SKIP, STRETCH, CatchUp, Scheduler, TimeWarp
+
+
+class TestScheduler:
+    def test_wait_reaches_deadline(self):
+        scheduler = Scheduler(spin_margin_ms=2.0, cpu_cap=1.0)
+        scheduler.start()
+        for deadline_ms in (1.0, 5.0, 5.0, 12.0):
+            reached_ns = scheduler.wait_until(deadline_ms)
+            assert reached_ns >= deadline_ms * 1_000_000
+
+    def test_sleep_only(self):
+        scheduler = Scheduler(cpu_cap=0.0)
+        scheduler.start()
+        assert scheduler.wait_until(3.0) >= 3_000_000
+
+    def test_past_deadline_returns_immediately(self):
+        scheduler = Scheduler()
+        scheduler.start()
+        scheduler.wait_until(5.0)
+        before = scheduler.elapsed_ms()
+        scheduler.wait_until(1.0)
+        assert scheduler.elapsed_ms() - before < 5.0
+
+    def test_interrupt_ends_wait(self):
+        scheduler = Scheduler()
+        scheduler.interrupt = threading.Event()
+        threading.Timer(0.02, scheduler.interrupt.set).start()
+        scheduler.start()
+        start = time.monotonic()
+        assert not scheduler.wait_frame(5000.0)
+        assert time.monotonic() - start < 0.5
+        assert scheduler.catch_up.late == 0
+
+    def test_set_rate_from_current_position(self):
+        scheduler = Scheduler(cpu_cap=1.0)
+        scheduler.start()
+        scheduler.wait_until(10.0)
+        scheduler.set_rate(2.0)
+        position = scheduler.position_ms()
+        assert 10.0 <= position < 15.0
+        assert scheduler.wait_frame(position + 5.0)
+        # 5 ms of song at half speed is 10 ms of clock
+        assert scheduler.elapsed_ms() >= scheduler.warp.clock_ms + 10.0
+
+    @pytest.mark.parametrize('margin, cap', [(-1.0, 0.5), (2.0, -0.1), (2.0, 1.5)])
+    def test_invalid_settings(self, margin, cap):
+        with pytest.raises(ValueError):
+            Scheduler(margin, cap)
+
+
+class TestTimeWarp:
+    def test_pieces(self):
+        warp = TimeWarp()
+        assert warp.clock_at(100) == 100
+        warp.anchor(100, 100, 2.0)
+        assert warp.clock_at(150) == 200
+        assert warp.song_at(200) == 150
+        warp.anchor(150, 200, 0.5)
+        assert warp.clock_at(250) == 250
+        warp.anchor(0, 0)
+        assert warp.rate == 0.5
+
+    def test_invalid_rate(self):
+        with pytest.raises(ValueError):
+            TimeWarp().anchor(0, 0, 0.0)
+
+
+class TestCatchUp:
+    def test_burst_plays_late_frames(self):
+        catch_up = CatchUp(BURST, late_ms=10)
+        assert catch_up.on_late(100, 150, notes=2)
+        assert (catch_up.late, catch_up.skipped, catch_up.stretched) == (2, 0, 0)
+        assert catch_up.offset_ms(120) == 0.0
+
+    def test_skip_drops_late_frames(self):
+        catch_up = CatchUp(SKIP, late_ms=10)
+        assert not catch_up.on_late(100, 150, notes=3)
+        assert catch_up.skipped == 3
+
+    def test_stretch_eases_back(self):
+        catch_up = CatchUp(STRETCH, late_ms=10, stretch_ms=1000)
+        assert catch_up.on_late(100, 300)
+        assert catch_up.offset_ms(100) == 200.0
+        assert catch_up.offset_ms(600) == 100.0
+        assert catch_up.offset_ms(1100) == 0.0
+        assert catch_up.offset_ms(1200) == 0.0
+        assert catch_up.stretched == 3
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            CatchUp('rewind')
+        with pytest.raises(ValueError):
+            CatchUp(STRETCH, stretch_ms=0)
+
+    def test_scheduler_skips_past_deadline(self):
+        scheduler = Scheduler(catch_up=CatchUp(SKIP, late_ms=5))
+        scheduler.start()
+        scheduler.wait_until(20.0)
+        assert not scheduler.wait_frame(1.0)
+        assert scheduler.wait_frame(25.0)
+        assert scheduler.catch_up.skipped == 1
@@ -0,0 +1,70 @@
+"""Tests for midi_to_macro.session: seek targets resolve to whole chord frames."""
+
+from unittest.mock import Mock
+
+from midi_to_macro.events import EventTable
+from midi_to_macro.session import PlaybackSession, seek_index
+
+
+def _times(*times):
+    table = EventTable()
+    for t in times:
+        table.append(t, 0, ord('Q'))
+    return table
+
+
+class TestSeekIndex:
+    def test_ms_finds_next_event(self):
+        table = _times(0, 100, 100, 250)
+        assert seek_index(table, 'ms', 0) == (0, 0)
+        assert seek_index(table, 'ms', 50) == (1, 50)
+        assert seek_index(table, 'ms', 100) == (1, 100)
+        assert seek_index(table, 'ms', 300) == (4, 300)
+
+    def test_fraction_starts_at_chord(self):
+        table = _times(0, 100, 100, 250)
+        # Half of four events is index 2, inside the chord at 100 ms
+        assert seek_index(table, 'fraction', 0.5) == (1, 100)
+        assert seek_index(table, 'fraction', 1.0) == (4, 250)
+        assert seek_index(EventTable(), 'fraction', 0.5) == (0, 0)
+
+
+class TestPlaybackSession:
+    def test_take_seek_once(self):
+        session = PlaybackSession()
+        assert not session.pending
+        session.seek_fraction(2.0)
+        assert session.pending
+        assert session.take_seek(_times(0, 10)) == (2, 10)
+        assert session.take_seek(_times(0, 10)) is None
+        assert not session.pending
+
+    def test_seek_dropped_without_table(self):
+        session = PlaybackSession()
+        session.seek(500)
+        assert session.take_seek(None) is None
+        assert not session.pending
+
+    def test_toggle_pause(self):
+        session = PlaybackSession()
+        assert session.toggle_pause()
+        assert session.pending
+        assert not session.toggle_pause()
+
+    def test_forward_pending_requests(self):
+        session = PlaybackSession()
+        session.pause()
+        session.seek_fraction(0.5)
+        session.set_rate(2.0)
+        controls = Mock()
+        session.forward_to(controls)
+        controls.pause.assert_called_once_with()
+        controls.seek_fraction.assert_called_once_with(0.5)
+        controls.set_rate.assert_called_once_with(2.0)
+        assert session.take_rate() is None
+        assert session.take_seek(_times(0, 10)) is None
+
+    def test_forward_nothing_pending(self):
+        controls = Mock()
+        PlaybackSession().forward_to(controls)
+        assert controls.mock_calls == []
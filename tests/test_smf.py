@@ -0,0 +1,111 @@
+"""Tests for midi_to_macro.smf: native SMF chunk reader and its mido fallback."""
+
+from pathlib import Path
+
+import mido
+import pytest
+
+from midi_to_macro import midi
+from midi_to_macro.smf import TEMPO, iter_track, read_smf
+
+SAMPLE_DIR = Path(__file__).resolve().parent.parent / 'sample'
+
+
+def _smf(*tracks: bytes, division: int = 96, fmt: int = 1) -> bytes:
+    header = b'MThd' + (6).to_bytes(4, 'big') + fmt.to_bytes(2, 'big') + len(tracks).to_bytes(2, 'big') + division.to_bytes(2, 'big')
+    return header + b''.join(b'MTrk' + len(t).to_bytes(4, 'big') + t for t in tracks)
+
+
+class TestIterTrack:
+    """Test decoding of single track chunks."""
+
+    def test_notes_tempo_and_running_status(self):
+        track = bytes([
+            0x00, 0xFF, 0x51, 0x03, 0x07, 0xA1, 0x20,  # tempo 500000
+            0x00, 0x90, 60, 100,                      # note on
+            0x10, 62, 90,                             # running status note on
+            0x00, 0xB0, 7, 127,                       # controller (skipped)
+            0x05, 0xC0, 3,                            # program change, 1 data byte
+            0x00, 0xF0, 0x02, 0x01, 0xF7,             # sysex (skipped)
+            0x81, 0x00, 0x91, 64, 0,                  # note on velocity 0 (skipped), delta 128
+            0x00, 0xE2, 0x00, 0x40,                   # pitch bend (skipped)
+            0x00, 0x92, 67, 80,
+            0x00, 0xFF, 0x2F, 0x00,
+        ])
+        events = list(iter_track(memoryview(track)))
+        assert events == [
+            (0, TEMPO, 500000, 0),
+            (0, 0, 60, 100),
+            (16, 0, 62, 90),
+            (149, 2, 67, 80),
+        ]
+
+    def test_truncated_track_raises(self):
+        with pytest.raises(ValueError):
+            list(iter_track(memoryview(bytes([0x00, 0x90, 60]))))
+
+    def test_running_status_without_status_raises(self):
+        with pytest.raises(ValueError):
+            list(iter_track(memoryview(bytes([0x00, 60, 100]))))
+
+
+class TestReadSmf:
+    """Test header and chunk parsing."""
+
+    def test_header_and_tracks(self):
+        smf = read_smf(_smf(b'\x00\xff\x2f\x00', b'\x00\x90\x3c\x40', division=480))
+        assert smf.ticks_per_beat == 480
+        assert len(smf.tracks) == 2
+        assert list(smf.iter_merged()) == [(0, 0, 60, 64)]
+
+    def test_smpte_division_rejected(self):
+        with pytest.raises(ValueError):
+            read_smf(_smf(b'', division=0xE728))
+
+    def test_not_midi_rejected(self):
+        with pytest.raises(ValueError):
+            read_smf(b'RIFF\x00\x00\x00\x00')
+
+    @pytest.mark.parametrize('name', ['sample.mid', 'giorno.mid', 'gnr.mid'])
+    def test_matches_mido_on_samples(self, name):
+        path = SAMPLE_DIR / name
+        if not path.exists():
+            pytest.skip(f'sample/{name} not found')
+        tpb, native = midi.open_note_stream(str(path))
+        mido_tpb, reference = midi._mido_note_stream(str(path))
+        assert tpb == mido_tpb
+        assert list(native) == list(reference)
+
+
+class TestFallback:
+    """Test that mido takes over when the native decoder gives up."""
+
+    def test_rejected_file_uses_mido(self, tmp_path, monkeypatch):
+        path = tmp_path / 'x.mid'
+        mid = mido.MidiFile()
+        track = mido.MidiTrack([mido.Message('note_on', note=60, velocity=64, time=0)])
+        mid.tracks.append(track)
+        mid.save(str(path))
+
+        def reject(data):
+            raise ValueError('unsupported')
+
+        monkeypatch.setattr(midi, 'read_smf', reject)
+        _, stream = midi.open_note_stream(str(path))
+        assert list(stream) == [(0, 0, 60, 64)]
+
+    def test_mid_stream_failure_resumes_from_mido(self, tmp_path):
+        path = tmp_path / 'x.mid'
+        mid = mido.MidiFile()
+        mid.tracks.append(mido.MidiTrack([
+            mido.Message('note_on', note=n, velocity=64, time=10) for n in range(60, 65)
+        ]))
+        mid.save(str(path))
+
+        def broken():
+            yield (10, 0, 60, 64)
+            yield (20, 0, 61, 64)
+            raise ValueError('bad byte')
+
+        items = list(midi._native_with_fallback(broken(), str(path)))
+        assert [n for _, _, n, _ in items] == [60, 61, 62, 63, 64]
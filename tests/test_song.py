@@ -0,0 +1,52 @@
+"""Tests for midi_to_macro.song: canonical form and tempo/transpose/keymap transforms."""
+
+from array import array
+from pathlib import Path
+
+import pytest
+
+from midi_to_macro import midi
+from midi_to_macro.keymap import DEFAULT_KEYMAP, Keymap
+from midi_to_macro.song import Song
+
+SAMPLE = Path(__file__).resolve().parent.parent / 'sample' / 'giorno.mid'
+
+
+class TestSong:
+    """Test Song.compile against the per-note mapping."""
+
+    def test_compile_matches_map_note_to_key(self):
+        song = Song(array('d', [0.0, 10.4, 250.0]), array('B', [48, 61, 127]))
+        table = song.compile(tempo_multiplier=2.0, transpose=-1)
+        assert list(table.times) == [0, 20, 500]
+        assert table.to_list() == [
+            (t, *midi.map_note_to_key(n - 1)) for t, n in zip([0, 20, 500], [48, 61, 127])
+        ]
+
+    def test_transpose_clamps_to_table(self):
+        song = Song(array('d', [0.0, 0.0]), array('B', [0, 127]))
+        low, high = song.compile(transpose=-12), song.compile(transpose=12)
+        assert low[0][1:] == tuple(midi.map_note_to_key(0))
+        assert high[1][1:] == tuple(midi.map_note_to_key(127))
+
+    def test_custom_keymap(self):
+        km = Keymap.from_rows('Q row', [(0, list('QWERTYU'))])
+        table = Song(array('d', [0.0]), array('B', [62])).compile(keymap=km)
+        assert table.to_list() == [(0, [], 'W')]
+
+    def test_transposed_tables_are_cached(self):
+        assert DEFAULT_KEYMAP.transposed(3) is DEFAULT_KEYMAP.transposed(3)
+        masks, codes = DEFAULT_KEYMAP.transposed(3)
+        assert len(masks) == len(codes) == 256
+
+    def test_mismatched_arrays_raise(self):
+        with pytest.raises(ValueError):
+            Song(array('d', [0.0]), array('B'))
+
+    def test_matches_streaming_parse(self):
+        if not SAMPLE.exists():
+            pytest.skip('sample/giorno.mid not found')
+        song = midi.load_song(str(SAMPLE))
+        for tempo, transpose in ((1.0, 0), (0.5, 7), (1.75, -12)):
+            assert song.compile(tempo, transpose).to_list() == list(
+                midi.iter_events(str(SAMPLE), tempo, transpose))
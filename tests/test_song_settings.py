@@ -0,0 +1,30 @@
+"""Tests for midi_to_macro.song_settings: tempo/transpose and track selection persistence."""
+
+from midi_to_macro.song_settings import SongSettings
+
+
+class TestSongSettings:
+    def test_tempo_transpose_round_trip(self, tmp_path):
+        settings = SongSettings(str(tmp_path))
+        settings.set('song', 1.25, -3)
+        assert SongSettings(str(tmp_path)).get('song') == {'tempo': 1.25, 'transpose': -3}
+
+    def test_mutes_independent_of_tempo(self, tmp_path):
+        settings = SongSettings(str(tmp_path))
+        settings.set_mutes('song', [2], [9])
+        assert not settings.has('song')
+        assert settings.get('song') is None
+        settings.set('song', 1.0, 0)
+        settings.delete('song')
+        reloaded = SongSettings(str(tmp_path))
+        assert reloaded.get_mutes('song') == ([2], [9])
+        reloaded.set_mutes('song', [], [])
+        assert SongSettings(str(tmp_path)).get_mutes('song') == ([], [])
+
+    def test_auto_transpose_cache(self, tmp_path):
+        settings = SongSettings(str(tmp_path))
+        settings.set_auto_transpose('song', 'hash:Default', {'transpose': 5, 'clamped': 1})
+        reloaded = SongSettings(str(tmp_path))
+        assert reloaded.get_auto_transpose('song', 'hash:Default')['transpose'] == 5
+        assert reloaded.get_auto_transpose('song', 'other:Default') is None
+        assert not reloaded.has('song')
@@ -94,6 +94,15 @@ class TestRoom:
         assert received[0][4] == 0
         assert received[0][5] is not None
 
+    def test_handle_message_play_file_passes_suffix(self):
+        r = Room()
+        received = []
+        r.on_play_file = lambda *args: received.append(args[-1])
+        payload = {'cmd': 'play_file', 'midi_base64': base64.b64encode(b'x').decode('ascii')}
+        r._handle_message(payload)
+        r._handle_message({**payload, 'suffix': '.mcr'})
+        assert received == ['.mid', '.mcr']
+
     def test_handle_message_play_os_invokes_callback(self):
         r = Room()
         received = []
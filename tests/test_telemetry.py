@@ -0,0 +1,55 @@
+"""Tests for midi_to_macro.telemetry: ring buffer, lateness summary and dumps."""
+
+import csv
+import json
+
+import pytest
+
+from midi_to_macro.telemetry import LatenessSummary, TimingLog
+
+
+class TestTimingLog:
+    def test_rows(self):
+        timing = TimingLog(capacity=8)
+        timing.record(0, 500_000)
+        timing.record(10_000_000, 12_000_000)
+        assert len(timing) == 2
+        assert timing.rows() == [(0.0, 0.5, 0.5), (10.0, 12.0, 2.0)]
+
+    def test_ring_keeps_latest(self):
+        timing = TimingLog(capacity=3)
+        for i in range(5):
+            timing.record(i * 1_000_000, i * 1_000_000 + i)
+        assert len(timing) == 3
+        assert [row[0] for row in timing.rows()] == [2.0, 3.0, 4.0]
+        timing.reset()
+        assert len(timing) == 0
+
+    def test_invalid_capacity(self):
+        with pytest.raises(ValueError):
+            TimingLog(capacity=0)
+
+    def test_dump_csv_and_json(self, tmp_path):
+        timing = TimingLog(capacity=4)
+        timing.record(1_000_000, 3_000_000)
+        timing.dump(str(tmp_path / 't.csv'))
+        timing.dump(str(tmp_path / 't.json'))
+        with open(tmp_path / 't.csv', newline='') as f:
+            rows = list(csv.reader(f))
+        assert rows == [['scheduled_ms', 'actual_ms', 'lateness_ms'], ['1.0', '3.0', '2.0']]
+        with open(tmp_path / 't.json') as f:
+            assert json.load(f) == [{'scheduled_ms': 1.0, 'actual_ms': 3.0, 'lateness_ms': 2.0}]
+
+
+class TestLatenessSummary:
+    def test_statistics(self):
+        summary = LatenessSummary([float(v) for v in range(100)], threshold_ms=90.0)
+        assert summary.count == 100
+        assert summary.mean == 49.5
+        assert (summary.p50, summary.p95, summary.p99, summary.max) == (50.0, 95.0, 99.0, 99.0)
+        assert summary.late == 9
+
+    def test_empty(self):
+        summary = LatenessSummary([])
+        assert summary.count == 0
+        assert summary.max == 0.0
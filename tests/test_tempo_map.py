@@ -0,0 +1,58 @@
+"""Tests for midi_to_macro.tempo_map: segment accumulation and batch conversion."""
+
+import random
+
+import pytest
+
+from midi_to_macro.tempo_map import TempoMap
+
+
+class TestTempoMap:
+    """Test tick -> ms conversion across tempo changes."""
+
+    def test_default_tempo(self):
+        tm = TempoMap(480)
+        assert tm.to_ms(0) == 0
+        assert tm.to_ms(480) == pytest.approx(500.0)
+
+    def test_change_does_not_retime_earlier_ticks(self):
+        tm = TempoMap(96, [(192, 250_000)])  # 120 BPM for two beats, then 240 BPM
+        assert tm.to_ms(96) == pytest.approx(500.0)
+        assert tm.to_ms(192) == pytest.approx(1000.0)
+        assert tm.to_ms(288) == pytest.approx(1250.0)
+
+    def test_same_tick_change_replaces_tempo(self):
+        tm = TempoMap(96, [(0, 1_000_000), (0, 250_000)])
+        assert len(tm) == 1
+        assert tm.to_ms(96) == pytest.approx(250.0)
+
+    def test_out_of_order_change_raises(self):
+        tm = TempoMap(96, [(100, 400_000)])
+        with pytest.raises(ValueError):
+            tm.add(50, 500_000)
+
+    def test_many_changes_exact_and_batch_matches(self):
+        rng = random.Random(5)
+        changes = []
+        tick = 0
+        for _ in range(500):
+            tick += rng.randint(1, 200)
+            changes.append((tick, rng.randint(200_000, 1_500_000)))
+        tm = TempoMap(480, changes)
+        # Reference: step through every segment accumulating µs
+        def reference(t):
+            us = 0.0
+            prev_tick, tempo = 0, 500_000
+            for c_tick, c_tempo in changes:
+                if c_tick > t:
+                    break
+                us += (c_tick - prev_tick) * tempo / 480
+                prev_tick, tempo = c_tick, c_tempo
+            return (us + (t - prev_tick) * tempo / 480) / 1000
+        ticks = [rng.randint(0, tick + 1000) for _ in range(300)]
+        batch = tm.to_ms_many(ticks)
+        batch_sorted = tm.to_ms_many(sorted(ticks))
+        for t, ms in zip(ticks, batch):
+            assert ms == pytest.approx(reference(t))
+            assert tm.to_ms(t) == pytest.approx(ms)
+        assert list(batch_sorted) == pytest.approx(sorted(batch))
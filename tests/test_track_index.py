@@ -0,0 +1,80 @@
+"""Tests for midi_to_macro.track_index: per-track/channel index and selective parsing."""
+
+import mido
+import pytest
+
+from midi_to_macro import midi
+from midi_to_macro.event_cache import EventCache
+from midi_to_macro.midi import compile_midi, load_notes, parse_midi
+from midi_to_macro.track_index import TrackSelection, build_index, get_index
+
+
+@pytest.fixture
+def band_mid(tmp_path):
+    """Conductor track with a tempo change, a piano track (ch 1) and a drum track (ch 10)."""
+    mid = mido.MidiFile(ticks_per_beat=96)
+    conductor = mido.MidiTrack([
+        mido.MetaMessage('track_name', name='Conductor', time=0),
+        mido.MetaMessage('set_tempo', tempo=250_000, time=192),
+    ])
+    piano = mido.MidiTrack([mido.MetaMessage('track_name', name='Piano', time=0)])
+    for i, note in enumerate((60, 64, 67, 72)):
+        piano.append(mido.Message('note_on', channel=0, note=note, velocity=64, time=0 if i == 0 else 96))
+    drums = mido.MidiTrack()
+    for i in range(6):
+        drums.append(mido.Message('note_on', channel=9, note=36, velocity=100, time=0 if i == 0 else 48))
+    mid.tracks += [conductor, piano, drums]
+    path = tmp_path / 'band.mid'
+    mid.save(str(path))
+    return str(path)
+
+
+class TestBuildIndex:
+    def test_tracks_and_channels(self, band_mid):
+        index = build_index(band_mid)
+        assert [(t.name, t.notes) for t in index.tracks] == [('Conductor', 0), ('Piano', 4), ('', 6)]
+        assert index.tracks[0].has_tempo
+        piano = index.tracks[1]
+        assert (piano.low, piano.high, piano.channels) == (60, 72, {0})
+        assert [(c.channel, c.notes, c.is_drums) for c in index.channels] == [(0, 4, False), (9, 6, True)]
+        # Last note at tick 288: 2 beats at 120 BPM then 1 beat at 240 BPM
+        assert index.duration_ms == 1250
+        assert piano.density == pytest.approx(4 / 1.25)
+        assert index.notes == 10
+
+    def test_get_index_is_memoized(self, band_mid):
+        assert get_index(band_mid) is get_index(band_mid)
+
+
+class TestSelection:
+    def test_mute_channel(self, band_mid):
+        events = parse_midi(band_mid)
+        assert len(events) == 10
+        table = compile_midi(band_mid, selection=TrackSelection(muted_channels=[9]))
+        assert list(table.times) == [0, 500, 1000, 1250]
+
+    def test_muted_track_keeps_tempo(self, band_mid):
+        table = compile_midi(band_mid, selection=TrackSelection(muted_tracks=[0, 2]))
+        assert list(table.times) == [0, 500, 1000, 1250]
+
+    @pytest.mark.parametrize('muted, expected', [([1], 6), ([2], 4), ([1, 2], 0)])
+    def test_mido_fallback_mutes_each_track(self, band_mid, monkeypatch, muted, expected):
+        def reject(data):
+            raise ValueError('forced')
+
+        monkeypatch.setattr(midi, 'read_smf', reject)
+        table = compile_midi(band_mid, selection=TrackSelection(muted_tracks=muted))
+        assert len(table) == expected
+
+    def test_selection_cached_separately(self, band_mid, tmp_path):
+        cache = EventCache(str(tmp_path / 'settings'))
+        all_times, _ = load_notes(band_mid, cache)
+        piano_times, _ = load_notes(band_mid, cache, TrackSelection(muted_tracks=[2]))
+        assert len(all_times) == 10 and len(piano_times) == 4
+        assert len(load_notes(band_mid, cache, TrackSelection(muted_tracks=[2]))[0]) == 4
+
+    def test_cache_variant(self):
+        assert TrackSelection().cache_variant() == ''
+        assert not TrackSelection()
+        assert TrackSelection([2, 1], [9]).cache_variant() == 't1.2c9'
+        assert TrackSelection(muted_channels=[0, 9]).channel_mask == 0b1000000001
@@ -0,0 +1,80 @@
+"""Tests for midi_to_macro.ui_dispatch: ordering and coalescing of queued UI calls."""
+
+import threading
+
+from midi_to_macro.ui_dispatch import UiDispatcher
+
+
+class FakeRoot:
+    """Stands in for Tk: after() only records the callback, tests call it."""
+
+    def __init__(self):
+        self.scheduled = []
+        self.cancelled = []
+
+    def after(self, ms, fn):
+        self.scheduled.append(fn)
+        return len(self.scheduled)
+
+    def after_cancel(self, after_id):
+        self.cancelled.append(after_id)
+
+
+class TestUiDispatcher:
+    def test_calls_run_in_order_on_drain(self):
+        root = FakeRoot()
+        ui = UiDispatcher(root)
+        calls = []
+        ui.post(calls.append, 'a')
+        ui.post(calls.append, 'b')
+        assert calls == []
+        ui.drain()
+        assert calls == ['a', 'b']
+        assert len(root.scheduled) == 2  # rescheduled after the drain
+
+    def test_latest_replaces_pending(self):
+        ui = UiDispatcher(FakeRoot())
+        calls = []
+        for i in range(1000):
+            ui.post_latest('progress', lambda c, t: calls.append((c, t)), i, 1000)
+        ui.drain()
+        assert calls == [(999, 1000)]
+
+    def test_latest_keeps_order_with_other_posts(self):
+        ui = UiDispatcher(FakeRoot())
+        calls = []
+        ui.post_latest('progress', calls.append, 1)
+        ui.post(calls.append, 'done')
+        ui.post_latest('progress', calls.append, 0)
+        ui.drain()
+        assert calls == ['done', 0]
+
+    def test_failing_call_does_not_stop_drain(self):
+        ui = UiDispatcher(FakeRoot())
+        calls = []
+        ui.post(lambda: 1 / 0)
+        ui.post(calls.append, 'after')
+        ui.drain()
+        assert calls == ['after']
+
+    def test_post_from_threads(self):
+        ui = UiDispatcher(FakeRoot())
+        calls = []
+        threads = [threading.Thread(target=lambda: [ui.post(calls.append, 1) for _ in range(500)]) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        ui.drain()
+        assert len(calls) == 2000
+
+    def test_stop(self):
+        root = FakeRoot()
+        ui = UiDispatcher(root)
+        calls = []
+        ui.post(calls.append, 'dropped')
+        ui.stop()
+        assert root.cancelled == [1]
+        ui.drain()
+        assert calls == []
+        assert len(root.scheduled) == 1
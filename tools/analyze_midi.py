@@ -1,18 +1,24 @@
-import mido
+import os
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from midi_to_macro.midi import open_note_stream
+from midi_to_macro.smf import TEMPO
+
 path = sys.argv[1]
-mid = mido.MidiFile(path)
-ticks_per_beat = mid.ticks_per_beat
+ticks_per_beat, stream = open_note_stream(path)
 tempo = 500000
 time_sec = 0.0
+prev_tick = 0
 
 print('ticks_per_beat:', ticks_per_beat)
-for msg in mido.merge_tracks(mid.tracks):
-    # delta ticks -> seconds
-    delta_sec = mido.tick2second(msg.time, ticks_per_beat, tempo)
+for tick, channel, note, velocity in stream:
+    # delta ticks -> seconds (since the previous note or tempo change)
+    delta_sec = (tick - prev_tick) * tempo / 1e6 / ticks_per_beat
     time_sec += delta_sec
-    if msg.type == 'set_tempo':
-        tempo = msg.tempo
-    if msg.type == 'note_on' and getattr(msg, 'velocity', 0) > 0:
-        print(f"time={time_sec:.3f}s delta_ms={int(delta_sec*1000)} note={msg.note} vel={msg.velocity}")
+    prev_tick = tick
+    if channel == TEMPO:
+        tempo = note
+        continue
+    print(f"time={time_sec:.3f}s delta_ms={int(delta_sec*1000)} note={note} vel={velocity}")
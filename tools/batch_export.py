@@ -0,0 +1,45 @@
+"""Convert every MIDI file in a folder (and subfolders) to .mcr using all cores.
+
+Usage: python tools/batch_export.py FOLDER [--out DIR] [--tempo 1.0] [--transpose 0] [--keymap FILE] [--workers N]
+       [--compiled]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from midi_to_macro.batch_export import convert_folder
+from midi_to_macro.compiled import COMPILED_SUFFIX
+from midi_to_macro.keymap import load_keymap
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert a folder of MIDI files to .mcr')
+    parser.add_argument('folder')
+    parser.add_argument('--out', help='output folder (default: next to each MIDI file)')
+    parser.add_argument('--tempo', type=float, default=1.0)
+    parser.add_argument('--transpose', type=int, default=0)
+    parser.add_argument('--keymap', help='keymap profile JSON')
+    parser.add_argument('--workers', type=int, help='processes (default: all cores)')
+    parser.add_argument('--compiled', action='store_true', help=f'write memory-mappable {COMPILED_SUFFIX} files')
+    args = parser.parse_args()
+
+    keymap = load_keymap(args.keymap) if args.keymap else None
+
+    def progress(done, total, path):
+        print(f'[{done}/{total}] {os.path.relpath(path, args.folder)}', flush=True)
+
+    result = convert_folder(
+        args.folder, args.out, args.tempo, args.transpose, keymap, args.workers, progress,
+        suffix=COMPILED_SUFFIX if args.compiled else '.mcr',
+    )
+    print(f'{len(result.converted)} converted ({result.events} events), {len(result.failed)} failed')
+    for path, error in result.failed:
+        print(f'  {path}: {error}')
+    return 1 if result.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
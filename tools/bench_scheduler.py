@@ -0,0 +1,100 @@
+"""Measure how late playback sends each key (through the null output by default, so no keys are pressed).
+
+Usage: python tools/bench_scheduler.py [FILE ...] [--seconds 20] [--speed 1.0] [--margin MS] [--cpu-cap 0..1]
+       [--output null|record|pynput] [--catch-up burst|skip|stretch] [--late-ms MS] [--dump DIR]
+       With no files, every .mid/.mcr in sample/ is measured.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from midi_to_macro import mcr, midi
+from midi_to_macro.events import EventTable
+from midi_to_macro.output import OUTPUTS, KeyOutput, create_output
+from midi_to_macro.playback import run_playback
+from midi_to_macro.scheduler import (
+    CATCH_UP_POLICIES,
+    DEFAULT_CPU_CAP,
+    DEFAULT_LATE_MS,
+    DEFAULT_SPIN_MARGIN_MS,
+    CatchUp,
+    Scheduler,
+)
+from midi_to_macro.telemetry import TimingLog
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', 'sample')
+
+
+def song_events(path: str, seconds: float, speed: float) -> EventTable:
+    """The first `seconds` of the song (from its first note), played `speed` times faster."""
+    if path.lower().endswith('.mcr'):
+        table = mcr.read_mcr(path)
+    else:
+        table = midi.load_song(path).compile()
+    out = EventTable()
+    if not len(table):
+        return out
+    start = table.times[0]
+    for t, mask, code in table.iter_raw():
+        at = int((t - start) / speed)
+        if at > seconds * 1000:
+            break
+        out.append(at, mask, code)
+    return out
+
+
+def measure(table: EventTable, scheduler: Scheduler, timing: TimingLog, output: KeyOutput) -> float:
+    """Play table (timing records every key); return the share of one core used during playback."""
+    cpu0 = time.process_time()
+    run_playback(table, lambda: True, scheduler=scheduler, timing=timing, output=output)
+    wall = scheduler.elapsed_ms() / 1000
+    cpu = time.process_time() - cpu0
+    return cpu / wall if wall > 0 else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scheduler lateness per chord frame')
+    parser.add_argument('files', nargs='*')
+    parser.add_argument('--seconds', type=float, default=20.0, help='song time measured per file')
+    parser.add_argument('--speed', type=float, default=1.0, help='play faster than the song (shorter run)')
+    parser.add_argument('--margin', type=float, default=DEFAULT_SPIN_MARGIN_MS, help='spin margin in ms')
+    parser.add_argument('--cpu-cap', type=float, default=DEFAULT_CPU_CAP, help='0 = sleep only, 1 = full spin')
+    parser.add_argument('--output', choices=list(OUTPUTS), default='null', help='where keys go (pynput presses them)')
+    parser.add_argument('--catch-up', choices=CATCH_UP_POLICIES, default='burst', help='policy for late frames')
+    parser.add_argument('--late-ms', type=float, default=DEFAULT_LATE_MS, help='lateness that triggers catch-up')
+    parser.add_argument('--dump', help='folder for per-file timing CSVs')
+    args = parser.parse_args()
+
+    files = args.files or sorted(
+        glob.glob(os.path.join(SAMPLE_DIR, '*.mid')) + glob.glob(os.path.join(SAMPLE_DIR, '*.mcr'))
+    )
+    scheduler = Scheduler(args.margin, args.cpu_cap, CatchUp(args.catch_up, args.late_ms))
+    timing = TimingLog()
+    output = create_output(args.output)
+    print(f'margin {args.margin} ms, cpu cap {args.cpu_cap}, catch-up {args.catch_up}')
+    print(f'{"file":<32} {"keys":>6} {"median":>8} {"p99":>8} {"max":>8} {"cpu":>5} {"late":>5} {"skip":>5}')
+    for path in files:
+        table = song_events(path, args.seconds, args.speed)
+        if not len(table):
+            continue
+        cpu = measure(table, scheduler, timing, output)
+        summary = timing.summary()
+        print(
+            f'{os.path.basename(path):<32} {summary.count:>6} {summary.p50:>8.3f} '
+            f'{summary.p99:>8.3f} {summary.max:>8.3f} {cpu:>5.0%} '
+            f'{scheduler.catch_up.late:>5} {scheduler.catch_up.skipped:>5}',
+            flush=True,
+        )
+        if args.dump:
+            os.makedirs(args.dump, exist_ok=True)
+            timing.dump(os.path.join(args.dump, os.path.splitext(os.path.basename(path))[0] + '.csv'))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())